@@ -0,0 +1,240 @@
+"""碁盤処理の速度計測。
+"""
+from collections import deque
+from enum import Enum
+import hashlib
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+import numpy as np
+
+from board.constant import BOARD_SIZE, PASS
+from board.factory import create_go_board
+from board.go_board import GoBoard, copy_board
+from board.stone import Stone
+from nn.feature import generate_input_planes
+
+# 計測する碁盤の大きさ
+BENCHMARK_BOARD_SIZES = [size for size in (9, 13, 19) if size <= BOARD_SIZE] or [BOARD_SIZE]
+
+
+def generate_random_games(board_size: int, games: int, seed: int, \
+    max_moves: int=0) -> List[List[Tuple[Stone, int]]]:
+    """速度計測に使用するランダムな対局の着手列を生成する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+        games (int): 生成する対局数。
+        seed (int): 乱数のシード値。
+        max_moves (int, optional): 1局あたりの最大手数。0の場合は碁盤の交点数の2倍。
+
+    Returns:
+        List[List[Tuple[Stone, int]]]: 対局ごとの(着手の色、座標)のリスト。
+    """
+    rng = random.Random(seed)
+    board = GoBoard(board_size=board_size)
+    if max_moves == 0:
+        max_moves = board_size * board_size * 2
+    game_list = []
+
+    for _ in range(games):
+        board.clear()
+        color = Stone.BLACK
+        moves = []
+        passes = 0
+        while len(moves) < max_moves and passes < 2:
+            candidates = [pos for pos in board.onboard_pos if board.is_legal_not_eye(pos, color)]
+            pos = rng.choice(candidates) if candidates else PASS
+            passes = passes + 1 if pos == PASS else 0
+            board.put_stone(pos, color)
+            moves.append((color, pos))
+            color = Stone.get_opponent_color(color)
+        game_list.append(moves)
+
+    return game_list
+
+
+def measure_put_stone(board: GoBoard, game_list: List[List[Tuple[Stone, int]]]) -> float:
+    """着手処理の実行時間を計測する。
+
+    Args:
+        board (GoBoard): 計測に使用する碁盤。
+        game_list (List[List[Tuple[Stone, int]]]): 再生する対局の着手列。
+
+    Returns:
+        float: put_stoneの実行時間の合計(秒)。
+    """
+    elapsed = 0.0
+    for moves in game_list:
+        board.clear()
+        start_time = time.perf_counter()
+        for color, pos in moves:
+            board.put_stone(pos, color)
+        elapsed += time.perf_counter() - start_time
+    return elapsed
+
+
+def measure_legal_check(board: GoBoard, game_list: List[List[Tuple[Stone, int]]]) -> \
+    Tuple[float, int]:
+    """合法手判定の実行時間を計測する。各局面で全ての交点に対して判定する。
+
+    Args:
+        board (GoBoard): 計測に使用する碁盤。
+        game_list (List[List[Tuple[Stone, int]]]): 再生する対局の着手列。
+
+    Returns:
+        Tuple[float, int]: is_legalの実行時間の合計(秒)と呼び出し回数。
+    """
+    elapsed = 0.0
+    checks = 0
+    for moves in game_list:
+        board.clear()
+        for color, pos in moves:
+            start_time = time.perf_counter()
+            for check_pos in board.onboard_pos:
+                board.is_legal(check_pos, color)
+            elapsed += time.perf_counter() - start_time
+            checks += len(board.onboard_pos)
+            board.put_stone(pos, color)
+    return elapsed, checks
+
+
+def measure_position_func(board: GoBoard, game_list: List[List[Tuple[Stone, int]]], \
+    func: Callable[[GoBoard, Stone], Any]) -> Tuple[float, int]:
+    """対局を再生しながら、各局面で指定した処理を実行した時間を計測する。
+
+    Args:
+        board (GoBoard): 計測に使用する碁盤。
+        game_list (List[List[Tuple[Stone, int]]]): 再生する対局の着手列。
+        func (Callable[[GoBoard, Stone], Any]): 局面と手番の色を受け取る計測対象の処理。
+
+    Returns:
+        Tuple[float, int]: 処理の実行時間の合計(秒)と呼び出し回数。
+    """
+    elapsed = 0.0
+    calls = 0
+    for moves in game_list:
+        board.clear()
+        for color, pos in moves:
+            start_time = time.perf_counter()
+            func(board, color)
+            elapsed += time.perf_counter() - start_time
+            calls += 1
+            board.put_stone(pos, color)
+    return elapsed, calls
+
+
+def compute_checksum(board: GoBoard, game_list: List[List[Tuple[Stone, int]]]) -> str:
+    """全ての対局の最終局面の石の配置、アゲハマ、地の差からチェックサムを計算する。
+    碁盤の処理を変更したときに、結果が変わっていないことの確認に使用する。
+
+    Args:
+        board (GoBoard): 計測に使用する碁盤。
+        game_list (List[List[Tuple[Stone, int]]]): 再生する対局の着手列。
+
+    Returns:
+        str: SHA-256のチェックサムの16進数文字列。
+    """
+    checksum = hashlib.sha256()
+    for moves in game_list:
+        board.clear()
+        for color, pos in moves:
+            board.put_stone(pos, color)
+        checksum.update(board.get_board_array().tobytes())
+        checksum.update(f"{board.prisoner[0]},{board.prisoner[1]},{board.count_score()};" \
+            .encode("utf-8"))
+    return checksum.hexdigest()
+
+
+def get_object_size(obj: Any, seen: Set[int]) -> int:
+    """オブジェクトが参照しているデータも含めたメモリ使用量を計算する。
+    列挙型の定数と関数は盤面ごとのデータではないので数えない。
+
+    Args:
+        obj (Any): 計算対象のオブジェクト。
+        seen (Set[int]): 計算済みのオブジェクトのID。共有しているデータを除外する時にも使う。
+
+    Returns:
+        int: メモリ使用量(バイト)。
+    """
+    if id(obj) in seen or isinstance(obj, Enum) or callable(obj):
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(get_object_size(key, seen) + get_object_size(value, seen) \
+            for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(get_object_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += get_object_size(vars(obj), seen)
+    return size
+
+
+def measure_board_memory(board: GoBoard) -> int:
+    """盤面1つあたりのメモリ使用量を計算する。同じ碁盤サイズで共有するテーブルと、
+    着手を戻すための履歴は除く。
+
+    Args:
+        board (GoBoard): 計算対象の碁盤。
+
+    Returns:
+        int: メモリ使用量(バイト)。
+    """
+    shared = {id(value) for value in vars(board).values() if isinstance(value, tuple)}
+    shared.add(id(board.undo_stack))
+    return get_object_size(board, shared)
+
+
+def run_board_benchmark(board_size: int, games: int, seed: int, superko: bool, \
+    backend: str="list") -> Dict[str, Any]:
+    """碁盤の各処理のスループットを計測する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+        games (int): 計測に使用する対局数。
+        seed (int): 乱数のシード値。
+        superko (bool): 超劫の判定有効化フラグ。
+        backend (str, optional): 計測する碁盤の実装の名前。デフォルトは"list"。
+
+    Returns:
+        Dict[str, Any]: 計測結果。
+    """
+    game_list = generate_random_games(board_size, games, seed)
+    board = create_go_board(board_size=board_size, check_superko=superko, backend=backend)
+    copy_dst = create_go_board(board_size=board_size, check_superko=superko, backend=backend)
+    total_moves = sum(len(moves) for moves in game_list)
+
+    put_time = measure_put_stone(board, game_list)
+    legal_time, checks = measure_legal_check(board, game_list)
+    all_legal_time, positions = measure_position_func(board, game_list, \
+        lambda position, color: position.get_all_legal_pos(color))
+    copy_time, _ = measure_position_func(board, game_list, \
+        lambda position, _: copy_board(copy_dst, position))
+    score_time, _ = measure_position_func(board, game_list, \
+        lambda position, _: position.count_score())
+    planes_time, _ = measure_position_func(board, game_list, generate_input_planes)
+    checksum = compute_checksum(board, game_list)
+    memory = measure_board_memory(board)
+
+    return {
+        "board_size": board_size,
+        "backend": backend,
+        "games": games,
+        "moves": total_moves,
+        "put_stone_per_sec": total_moves / put_time,
+        "legal_checks": checks,
+        "legal_checks_per_sec": checks / legal_time,
+        "get_all_legal_pos_per_sec": positions / all_legal_time,
+        "copy_board_per_sec": positions / copy_time,
+        "count_score_per_sec": positions / score_time,
+        "input_planes_per_sec": positions / planes_time,
+        "board_memory_bytes": memory,
+        "checksum": checksum,
+    }
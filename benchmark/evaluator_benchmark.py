@@ -0,0 +1,132 @@
+"""ニューラルネットワークの推論バックエンドの出力の一致確認と速度計測。
+"""
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+
+from benchmark.board_benchmark import generate_random_games
+from board.go_board import GoBoard
+from nn.evaluator import Evaluator, create_evaluator
+from nn.feature import generate_input_planes
+from nn.network.dual_net import DualNet
+
+# 既定で計測する推論バックエンド。onnxは実験的なので明示的に指定した時だけ計測する
+BENCHMARK_BACKENDS = ["torch", "torchscript"]
+
+# 計測するミニバッチサイズ
+BENCHMARK_BATCH_SIZES = [1, 8, 32, 128]
+
+# PyTorchの推論結果との差の許容値
+PARITY_TOLERANCE = 1e-4
+
+
+def generate_benchmark_inputs(board_size: int, num_inputs: int, seed: int) -> torch.Tensor:
+    """ランダムな対局の局面から、計測に使用するニューラルネットワークの入力データを生成する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+        num_inputs (int): 生成する入力データの数。
+        seed (int): 乱数のシード値。
+
+    Returns:
+        torch.Tensor: 入力特徴テンソル。
+    """
+    board = GoBoard(board_size=board_size)
+    input_planes = []
+    game_index = 0
+    while len(input_planes) < num_inputs:
+        board.clear()
+        for color, pos in generate_random_games(board_size, 1, seed + game_index)[0]:
+            input_planes.append(generate_input_planes(board, color))
+            board.put_stone(pos, color)
+            if len(input_planes) == num_inputs:
+                break
+        game_index += 1
+    return torch.Tensor(np.array(input_planes))
+
+
+def measure_parity(reference: Evaluator, evaluator: Evaluator, \
+    input_planes: torch.Tensor) -> Dict[str, float]:
+    """PyTorchの推論結果との差の最大値を求める。
+
+    Args:
+        reference (Evaluator): 基準にするPyTorchのEvaluator。
+        evaluator (Evaluator): 比較するEvaluator。
+        input_planes (torch.Tensor): 入力特徴テンソル。
+
+    Returns:
+        Dict[str, float]: PolicyとValueの差の絶対値の最大値。
+    """
+    reference_policy, reference_value = reference.inference(input_planes)
+    policy, value = evaluator.inference(input_planes)
+    return {
+        "policy_max_error": float((policy - reference_policy).abs().max()),
+        "value_max_error": float((value - reference_value).abs().max()),
+    }
+
+
+def measure_throughput(evaluator: Evaluator, input_planes: torch.Tensor, batch_size: int, \
+    iterations: int) -> float:
+    """指定したミニバッチサイズで推論のスループットを計測する。
+
+    Args:
+        evaluator (Evaluator): 計測するEvaluator。
+        input_planes (torch.Tensor): 入力特徴テンソル。ミニバッチサイズ以上の数が必要。
+        batch_size (int): ミニバッチサイズ。
+        iterations (int): 計測する推論の回数。
+
+    Returns:
+        float: 1秒あたりに推論した局面数。
+    """
+    batch = input_planes[:batch_size].contiguous()
+    # 初回の推論は最適化などの準備を含むので計測しない
+    evaluator.inference(batch)
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        evaluator.inference(batch)
+    elapsed = time.perf_counter() - start_time
+
+    return batch_size * iterations / elapsed
+
+
+def run_evaluator_benchmark(network: DualNet, backends: List[str], batch_sizes: List[int], \
+    iterations: int, seed: int) -> List[Dict[str, Any]]:
+    """推論バックエンドごとに、PyTorchの推論結果との一致を確認してミニバッチサイズごとのスループットを計測する。
+
+    Args:
+        network (DualNet): 計測するニューラルネットワーク。
+        backends (List[str]): 推論バックエンドの名前のリスト。
+        batch_sizes (List[int]): ミニバッチサイズのリスト。
+        iterations (int): ミニバッチサイズごとに計測する推論の回数。
+        seed (int): 乱数のシード値。
+
+    Returns:
+        List[Dict[str, Any]]: 推論バックエンドごとの計測結果。
+    """
+    input_planes = generate_benchmark_inputs(network.board_size, max(batch_sizes), seed)
+    reference = create_evaluator(network, "torch")
+    results = []
+
+    with torch.no_grad():
+        for backend in backends:
+            try:
+                evaluator = create_evaluator(network, backend)
+            except RuntimeError as error:
+                results.append({"backend": backend, "error": str(error)})
+                continue
+
+            parity = measure_parity(reference, evaluator, input_planes)
+            results.append({
+                "backend": backend,
+                "policy_max_error": parity["policy_max_error"],
+                "value_max_error": parity["value_max_error"],
+                "matches": parity["policy_max_error"] <= PARITY_TOLERANCE \
+                    and parity["value_max_error"] <= PARITY_TOLERANCE,
+                "positions_per_sec": {batch_size: measure_throughput(evaluator, input_planes, \
+                    batch_size, iterations) for batch_size in batch_sizes},
+            })
+
+    return results
@@ -0,0 +1,95 @@
+"""PUCB値による着手選択の速度計測。
+"""
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from mcts.edge_pool import EdgePool
+from mcts.node import MCTSNode
+from mcts.pucb.pucb import calculate_pucb_value
+
+# 計測する子ノードの数
+BENCHMARK_NUM_CHILDREN = [10, 20, 82, 170, 362]
+
+
+def create_benchmark_node(num_children: int, seed: int) -> MCTSNode:
+    """探索途中を模した乱数の探索結果を持つノードを生成する。
+
+    Args:
+        num_children (int): 子ノードの数。
+        seed (int): 乱数のシード値。
+
+    Returns:
+        MCTSNode: 生成したノード。
+    """
+    rng = np.random.default_rng(seed)
+    policy = rng.dirichlet([0.3] * num_children)
+    node = MCTSNode()
+    node.expand(dict(enumerate(policy.tolist())), EdgePool(chunk_size=num_children))
+    node.children_visits[:] = rng.integers(0, 50, size=num_children)
+    node.children_value_sum[:] = node.children_visits * rng.random(num_children)
+    node.node_visits = int(node.children_visits.sum())
+    return node
+
+
+def select_by_reference(node: MCTSNode, cgos_mode: bool) -> int:
+    """calculate_pucb_valueで全ての子ノードのPUCB値を求めて着手を選択する。速度と結果の比較用。
+
+    Args:
+        node (MCTSNode): 着手を選択するノード。
+        cgos_mode (bool): 全ての石を打ち上げるまでパスを抑制するモード。
+
+    Returns:
+        int: 選択した子ノードのインデックス。
+    """
+    pucb_values = calculate_pucb_value(node.node_visits + node.virtual_loss, \
+        node.children_visits + node.children_virtual_loss, \
+        node.children_value_sum, node.children_policy + node.noise)
+    if cgos_mode:
+        pucb_values[node.num_children - 1] -= 0.1
+    return int(np.argmax(pucb_values))
+
+
+def run_pucb_benchmark(num_children: int, iterations: int, seed: int) -> Dict[str, Any]:
+    """指定した子ノードの数のノードで、着手選択のスループットを計測する。
+
+    Args:
+        num_children (int): 子ノードの数。
+        iterations (int): 計測する着手選択の回数。
+        seed (int): 乱数のシード値。
+
+    Returns:
+        Dict[str, Any]: 計測結果。
+    """
+    node = create_benchmark_node(num_children, seed)
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        node.select_next_action(False)
+    select_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        select_by_reference(node, False)
+    reference_time = time.perf_counter() - start_time
+
+    # 探索の進行を模して選んだ子ノードを更新しながら、両者の選択が一致するか確かめる
+    matches = True
+    rng = np.random.default_rng(seed)
+    for i in range(iterations):
+        cgos_mode = i % 2 == 1
+        index = node.select_next_action(cgos_mode)
+        matches = matches and index == select_by_reference(node, cgos_mode)
+        node.add_virtual_loss(index)
+        if i % 4 == 0:
+            node.update_child_value(index, rng.random())
+            node.update_node_value(0.0)
+
+    return {
+        "num_children": num_children,
+        "iterations": iterations,
+        "select_per_sec": iterations / select_time,
+        "reference_per_sec": iterations / reference_time,
+        "matches": matches,
+    }
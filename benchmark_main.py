@@ -0,0 +1,66 @@
+"""碁盤処理の速度計測のエントリーポイント。
+"""
+import json
+import platform
+from typing import Tuple
+
+import click
+
+from benchmark.board_benchmark import BENCHMARK_BOARD_SIZES, run_board_benchmark
+from board.constant import BOARD_SIZE
+from board.factory import BOARD_BACKENDS
+from common.print_console import print_out
+
+
+@click.command()
+@click.option('--size', type=click.IntRange(2, BOARD_SIZE), multiple=True, \
+    default=BENCHMARK_BOARD_SIZES, \
+    help="碁盤のサイズを指定。複数回指定できる。デフォルトはBOARD_SIZE以下の9, 13, 19。")
+@click.option('--games', type=click.IntRange(min=1), default=50, \
+    help="計測に使用するランダム対局の数。デフォルトは50。")
+@click.option('--seed', type=click.INT, default=0, help="乱数のシード値。デフォルトは0。")
+@click.option('--superko', type=click.BOOL, default=False, help="超劫の有効化フラグ。デフォルトはFalse。")
+@click.option('--board-backend', type=click.Choice(list(BOARD_BACKENDS.keys())), default="list", \
+    help="計測する碁盤の実装の指定。デフォルトはlist。")
+@click.option('--json', 'json_output', type=click.BOOL, default=False, \
+    help="計測結果をJSON形式で出力するフラグ。デフォルトはFalse。")
+def benchmark_main(size: Tuple[int, ...], games: int, seed: int, superko: bool, \
+    board_backend: str, json_output: bool): # pylint: disable=R0913
+    """碁盤の各処理のスループットを計測して表示する。
+
+    Args:
+        size (Tuple[int, ...]): 碁盤の大きさのリスト。
+        games (int): 計測に使用するランダム対局の数。
+        seed (int): 乱数のシード値。
+        superko (bool): 超劫の有効化フラグ。
+        board_backend (str): 計測する碁盤の実装の名前。
+        json_output (bool): 計測結果をJSON形式で出力するフラグ。
+    """
+    results = [run_board_benchmark(board_size, games, seed, superko, board_backend) \
+        for board_size in size]
+
+    if json_output:
+        print_out(json.dumps({
+            "python": platform.python_version(),
+            "seed": seed,
+            "superko": superko,
+            "results": results,
+        }, indent=2))
+        return
+
+    for result in results:
+        print_out(f"board size     : {result['board_size']}")
+        print_out(f"board backend  : {result['backend']}")
+        print_out(f"games / moves  : {result['games']} / {result['moves']}")
+        print_out(f"put_stone      : {result['put_stone_per_sec']:.1f} moves/sec")
+        print_out(f"is_legal       : {result['legal_checks_per_sec']:.1f} checks/sec")
+        print_out(f"all legal pos  : {result['get_all_legal_pos_per_sec']:.1f} positions/sec")
+        print_out(f"copy_board     : {result['copy_board_per_sec']:.1f} positions/sec")
+        print_out(f"count_score    : {result['count_score_per_sec']:.1f} positions/sec")
+        print_out(f"input planes   : {result['input_planes_per_sec']:.1f} positions/sec")
+        print_out(f"board memory   : {result['board_memory_bytes'] / 1024:.1f} KiB")
+        print_out(f"checksum       : {result['checksum']}")
+
+
+if __name__ == "__main__":
+    benchmark_main() # pylint: disable=E1120
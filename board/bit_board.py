@@ -0,0 +1,424 @@
+"""多倍長整数のビットボードで連を扱う碁盤の実装。
+"""
+from typing import List, NoReturn
+
+import numpy as np
+
+from board.constant import PASS
+from board.go_board import GoBoard
+from board.move_delta import MoveDelta
+from board.stone import Stone
+from board.zobrist_hash import affect_stone_hash, affect_string_hash
+
+
+def get_positions(bits: int) -> List[int]:
+    """ビットボードで立っているビットの座標を取得する。
+
+    Args:
+        bits (int): ビットボード。
+
+    Returns:
+        List[int]: 座標の昇順に並んだ座標列。
+    """
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return positions
+
+
+def count_bits(bits: int) -> int:
+    """ビットボードで立っているビットの数を数える。
+
+    Args:
+        bits (int): ビットボード。
+
+    Returns:
+        int: 立っているビットの数。
+    """
+    return bin(bits).count("1")
+
+
+class BitGoBoard(GoBoard):
+    """黒石と白石の配置をPythonの多倍長整数のビットボードで保持する碁盤クラス。
+    座標xのビットが1 << xに対応し、連の抽出、呼吸点の計算、打ち上げの判定を
+    シフト演算による近傍展開で処理する。連の管理データ(StringData)は持たない。
+    """
+    def _init_strings(self) -> NoReturn:
+        """盤上の座標のマスクとビットボードを生成する。
+        """
+        self.onboard_bits = 0
+        for y_coord in range(self.board_start, self.board_end + 1):
+            for x_coord in range(self.board_start, self.board_end + 1):
+                self.onboard_bits |= 1 << self.POS(x_coord, y_coord)
+        self.strings = None
+        self.bitboard = {Stone.BLACK: 0, Stone.WHITE: 0}
+
+    def _clear_strings(self) -> NoReturn:
+        """全ての石を取り除く。
+        """
+        self.bitboard = {Stone.BLACK: 0, Stone.WHITE: 0}
+
+    def _copy_strings(self, src: GoBoard) -> NoReturn:
+        """石の配置のビットボードをコピーする。
+
+        Args:
+            src (GoBoard): コピー元の盤面情報のデータ。
+        """
+        self.bitboard = src.bitboard.copy()
+
+    def _expand(self, bits: int) -> int:
+        """ビットボードを上下左右に1路ずつ広げる。
+
+        Args:
+            bits (int): 広げるビットボード。
+
+        Returns:
+            int: 上下左右に隣接する盤上の座標を加えたビットボード。
+        """
+        width = self.board_size_with_ob
+        return (bits | (bits << 1) | (bits >> 1) | (bits << width) | (bits >> width)) \
+            & self.onboard_bits
+
+    def _get_string_bits(self, pos: int, stones: int) -> int:
+        """指定した座標の石を含む連のビットボードを取得する。
+
+        Args:
+            pos (int): 連を構成する石の座標。
+            stones (int): 連と同じ色の石のビットボード。
+
+        Returns:
+            int: 連を構成する石のビットボード。
+        """
+        string = 1 << pos
+        while True:
+            expanded = self._expand(string) & stones
+            if expanded == string:
+                return string
+            string = expanded
+
+    def _get_empty_bits(self) -> int:
+        """空点のビットボードを取得する。
+
+        Returns:
+            int: 空点のビットボード。
+        """
+        return self.onboard_bits & ~(self.bitboard[Stone.BLACK] | self.bitboard[Stone.WHITE])
+
+    def _get_liberty_bits(self, pos: int) -> int:
+        """指定した座標の石を含む連の呼吸点のビットボードを取得する。
+
+        Args:
+            pos (int): 石の座標。
+
+        Returns:
+            int: 呼吸点のビットボード。
+        """
+        string = self._get_string_bits(pos, self.bitboard[self.board[pos]])
+        return self._expand(string) & self._get_empty_bits()
+
+    def get_num_liberties(self, pos: int) -> int:
+        """指定した座標の石を含む連の呼吸点数を取得する。
+
+        Args:
+            pos (int): 石の座標。
+
+        Returns:
+            int: 呼吸点数。石がない場合は0。
+        """
+        if self.board[pos] is not Stone.BLACK and self.board[pos] is not Stone.WHITE:
+            return 0
+        return count_bits(self._get_liberty_bits(pos))
+
+    def put_stone(self, pos: int, color: Stone) -> NoReturn:
+        """指定された座標に指定された色の石を石を置く。
+
+        Args:
+            pos (int): 石を置く座標。
+            color (Stone): 置く石の色。
+        """
+        delta = MoveDelta(pos, color, self.ko_move, self.ko_pos, \
+            tuple(self.prisoner), self.positional_hash)
+        self.undo_stack.append(delta)
+
+        if pos == PASS:
+            self.record.save(self.moves, color, pos, self.positional_hash)
+            self.moves += 1
+            return
+
+        delta.pat3 = self.pattern.pat3.copy()
+        connected = self._place_stone(pos, color, delta.captured)
+        prisoner = sum(len(stones) for stones in delta.captured)
+
+        if prisoner == 1 and not connected:
+            liberties = self._get_liberty_bits(pos)
+            if count_bits(liberties) == 1:
+                self.ko_move = self.moves
+                self.ko_pos = liberties.bit_length() - 1
+
+        self._mark_dirty(pos, delta.captured)
+
+        # 着手した時に記録
+        self.record.save(self.moves, color, pos, self.positional_hash)
+        self.moves += 1
+
+    def put_handicap_stone(self, pos: int, color: Stone) -> NoReturn:
+        """指定された座標に指定された色の置き石を置く。
+
+        Args:
+            pos (int): 石を置く座標。
+            color (Stone): 置く石の色。
+        """
+        captured = []
+        connected = self._place_stone(pos, color, captured)
+
+        if sum(len(stones) for stones in captured) == 1 and not connected:
+            liberties = self._get_liberty_bits(pos)
+            if count_bits(liberties) == 1:
+                self.ko_move = self.moves
+                self.ko_pos = liberties.bit_length() - 1
+
+        self._mark_dirty(pos, captured)
+
+        # 着手した時に記録
+        self.record.save_handicap(pos)
+
+    def _place_stone(self, pos: int, color: Stone, captured: List[List[int]]) -> bool:
+        """石を置いて、呼吸点がなくなった相手の連を打ち上げる。
+
+        Args:
+            pos (int): 石を置く座標。
+            color (Stone): 置く石の色。
+            captured (List[List[int]]): 打ち上げた連ごとの石の座標列の格納先。
+
+        Returns:
+            bool: 自分の石と連結した場合はTrue、そうでなければFalse。
+        """
+        opponent_color = Stone.get_opponent_color(color)
+        stone_bit = 1 << pos
+        own_stones = self.bitboard[color]
+        connected = (self._expand(stone_bit) & own_stones) != 0
+
+        self.board[pos] = color
+        self._set_stone_planes(pos, color)
+        self.pattern.put_stone(pos, color)
+        self.positional_hash = affect_stone_hash(self.positional_hash, pos, color)
+        self.bitboard[color] = own_stones | stone_bit
+
+        opponent_stones = self.bitboard[opponent_color]
+        empty = self.onboard_bits & ~(own_stones | stone_bit | opponent_stones)
+        checked = 0
+        prisoner = 0
+
+        for neighbor in self.neighbor4[pos]:
+            neighbor_bit = 1 << neighbor
+            if not opponent_stones & neighbor_bit or checked & neighbor_bit:
+                continue
+            string = self._get_string_bits(neighbor, opponent_stones)
+            checked |= string
+            if self._expand(string) & empty:
+                continue
+            opponent_stones &= ~string
+            empty |= string
+            removed_stones = get_positions(string)
+            self._set_stone_planes(removed_stones, Stone.EMPTY)
+            for removed_pos in removed_stones:
+                self.board[removed_pos] = Stone.EMPTY
+                self.pattern.remove_stone(removed_pos)
+            self.positional_hash = affect_string_hash(self.positional_hash, \
+                removed_stones, opponent_color)
+            captured.append(removed_stones)
+            prisoner += len(removed_stones)
+
+        self.bitboard[opponent_color] = opponent_stones
+
+        if color == Stone.BLACK:
+            self.prisoner[0] += prisoner
+        elif color == Stone.WHITE:
+            self.prisoner[1] += prisoner
+
+        return connected
+
+    def undo_move(self) -> NoReturn:
+        """直前の着手を取り消して、着手前の局面に戻す。
+        """
+        if not self.undo_stack:
+            return
+
+        delta = self.undo_stack.pop()
+        self.moves -= 1
+        self.record.remove(self.moves)
+
+        if delta.pos != PASS:
+            opponent_color = Stone.get_opponent_color(delta.color)
+
+            self.board[delta.pos] = Stone.EMPTY
+            self._set_stone_planes(delta.pos, Stone.EMPTY)
+            self.bitboard[delta.color] &= ~(1 << delta.pos)
+            opponent_stones = self.bitboard[opponent_color]
+            for stones in delta.captured:
+                for pos in stones:
+                    self.board[pos] = opponent_color
+                    opponent_stones |= 1 << pos
+                self._set_stone_planes(stones, opponent_color)
+            self.bitboard[opponent_color] = opponent_stones
+
+            self.pattern.pat3 = delta.pat3
+
+            self._mark_dirty(delta.pos, delta.captured)
+
+        self.ko_move = delta.ko_move
+        self.ko_pos = delta.ko_pos
+        self.prisoner = list(delta.prisoner)
+        self.positional_hash = delta.positional_hash
+
+    def _mark_dirty(self, pos: int, captured: List[List[int]]) -> NoReturn:
+        """着手によって着手候補の判定結果が変わりうる座標を再計算対象に追加する。
+        石が変化した座標の周囲5x5の範囲と、隣接する連の呼吸点が対象になる。
+
+        Args:
+            pos (int): 着手した座標。
+            captured (List[List[int]]): 打ち上げた連ごとの石の座標列。
+        """
+        changed = 1 << pos
+        self.dirty_pos.update(self.around24[pos])
+        for stones in captured:
+            for coordinate in stones:
+                changed |= 1 << coordinate
+                self.dirty_pos.update(self.around24[coordinate])
+
+        adjacent = self._expand(changed)
+        strings = 0
+        for color in (Stone.BLACK, Stone.WHITE):
+            stones = self.bitboard[color]
+            region = adjacent & stones
+            # 隣接する石から同じ色の石を辿って連全体に広げる
+            while True:
+                expanded = self._expand(region) & stones
+                if expanded == region:
+                    break
+                region = expanded
+            strings |= region
+
+        self.dirty_pos.update(get_positions(self._expand(strings) & self._get_empty_bits()))
+
+    def _is_suicide(self, pos: int, color: Stone) -> bool:
+        """自殺手か否かを判定する。
+        自殺手ならTrue、そうでなければFalseを返す。
+
+        Args:
+            pos (int): 確認する座標。
+            color (Stone): 着手する石の色。
+
+        Returns:
+            bool: 自殺手の判定結果。自殺手ならTrue、そうでなければFalse。
+        """
+        other = Stone.get_opponent_color(color)
+
+        for neighbor in self.neighbor4[pos]:
+            if self.board[neighbor] is other and self.get_num_liberties(neighbor) == 1:
+                return False
+            if self.board[neighbor] is color and self.get_num_liberties(neighbor) > 1:
+                return False
+
+        return True
+
+    def _is_superko(self, pos: int, color: Stone) -> bool:
+        """着手後の局面が過去の局面と一致するか否かを判定する。
+
+        Args:
+            pos (int): 確認する座標。
+            color (Stone): 着手する石の色。
+
+        Returns:
+            bool: 過去の局面と一致すればTrue、そうでなければFalse。
+        """
+        opponent = Stone.get_opponent_color(color)
+        opponent_stones = self.bitboard[opponent]
+        empty = self._get_empty_bits()
+        current_hash = self.positional_hash
+        checked = 0
+
+        # 打ち上げる相手の石があれば打ち上げたと仮定
+        for neighbor in self.neighbor4[pos]:
+            neighbor_bit = 1 << neighbor
+            if not opponent_stones & neighbor_bit or checked & neighbor_bit:
+                continue
+            string = self._get_string_bits(neighbor, opponent_stones)
+            checked |= string
+            if self._expand(string) & empty == 1 << pos:
+                current_hash = affect_string_hash(current_hash, get_positions(string), opponent)
+        # 石を置く
+        current_hash = affect_stone_hash(current_hash, pos=pos, color=color)
+
+        return self.record.has_same_hash(current_hash)
+
+    def is_legal_not_eye(self, pos: int, color: Stone) -> bool:
+        """合法手かつ眼でないか否かを確認する。
+        合法手かつ眼でなければTrue、そうでなければFalseを返す。
+
+        Args:
+            pos (int): 確認する座標。
+            color (Stone): 手番の色。
+
+        Returns:
+            bool: 判定結果。合法手かつ眼でなければTrue、そうでなければFalse。
+        """
+        if self.pattern.get_eye_color(pos) is not color or \
+            any(self.get_num_liberties(neighbor) == 1 for neighbor in self.neighbor4[pos]):
+            return self.is_legal(pos, color)
+
+        return False
+
+    def check_self_atari_stone(self, pos: int, color: Stone) -> int:
+        """アタリに突っ込んで取られる石の数を返す。取られない場合は0を返す。
+
+        Args:
+            pos (int): 評価する座標。
+            color (Stone): 着手する手番の色。
+
+        Returns:
+            int: 取られる石の数
+        """
+        empty = self._get_empty_bits()
+        stone_bit = 1 << pos
+        liberties = self._expand(stone_bit) & empty & ~stone_bit
+
+        if count_bits(liberties) > 1:
+            return 0
+
+        other = Stone.get_opponent_color(color)
+        for neighbor in self.neighbor4[pos]:
+            if self.board[neighbor] is other and self.get_num_liberties(neighbor) == 1:
+                return 0
+
+        # 着手する石と隣接する自分の連をまとめた連
+        string = self._get_string_bits(pos, self.bitboard[color] | stone_bit)
+        if string != stone_bit:
+            liberties |= self._expand(string & ~stone_bit) & empty
+        if count_bits(liberties) >= 3:
+            return 0
+
+        return count_bits(string)
+
+    def get_liberty_data(self, sym: int) -> np.ndarray:
+        """ニューラルネットワークの入力用の呼吸点数の情報を取得する。
+
+        Args:
+            sym (int): 対称形の番号。
+
+        Returns:
+            np.ndarray: 各交点の石を含む連の呼吸点数。空点は0。
+        """
+        base_data = [0] * (self.board_size_with_ob ** 2)
+        empty = self._get_empty_bits()
+        for stones in self.bitboard.values():
+            remain = stones
+            while remain:
+                string = self._get_string_bits((remain & -remain).bit_length() - 1, stones)
+                num_liberties = count_bits(self._expand(string) & empty)
+                for coordinate in get_positions(string):
+                    base_data[coordinate] = num_liberties
+                remain &= ~string
+        return np.array(base_data)[self.sym_index[sym]]
@@ -6,18 +6,10 @@ BOARD_SIZE = 9
 OB_SIZE = 1
 # 連の最大数
 STRING_MAX = int(0.8 * BOARD_SIZE * (BOARD_SIZE - 1) + 5)
-# 隣接する連の最大数
-NEIGHBOR_MAX = STRING_MAX
 # 連を構成する石の最大数
 STRING_POS_MAX = (BOARD_SIZE + OB_SIZE * 2) ** 2
-# 呼吸点の最大数
-STRING_LIB_MAX = (BOARD_SIZE + OB_SIZE * 2) ** 2
 # 連を構成する石の座標の番兵
 STRING_END = STRING_POS_MAX - 1
-# 呼吸点の番兵
-LIBERTY_END = STRING_LIB_MAX - 1
-# 隣接する敵連の番兵
-NEIGHBOR_END = NEIGHBOR_MAX - 1
 
 # 着手に関する定数
 # パスに対応する座標
@@ -29,3 +21,6 @@ GTP_X_COORDINATE = 'IABCDEFGHJKLMNOPQRSTUVWXYZ'
 
 # 着手履歴の最大数
 MAX_RECORDS = (BOARD_SIZE ** 2) * 3
+
+# 探索の着手候補から除外する、アタリに突っ込んで取られる石の数の下限
+SELF_ATARI_LIMIT = 7
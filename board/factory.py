@@ -0,0 +1,26 @@
+"""碁盤の実装の選択と生成処理。
+"""
+from board.bit_board import BitGoBoard
+from board.go_board import GoBoard
+
+# 碁盤の実装の名前と対応するクラス
+BOARD_BACKENDS = {
+    "list": GoBoard,
+    "bitboard": BitGoBoard,
+}
+
+
+def create_go_board(board_size: int, komi: float=7.0, check_superko: bool=False, \
+    backend: str="list") -> GoBoard:
+    """指定した実装の碁盤を生成する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+        komi (float, optional): コミの値。デフォルト値は7.0。
+        check_superko (bool, optional): 超劫の判定有効化。デフォルト値はFalse。
+        backend (str, optional): 碁盤の実装の名前。"list"または"bitboard"。デフォルト値は"list"。
+
+    Returns:
+        GoBoard: 生成した碁盤。
+    """
+    return BOARD_BACKENDS[backend](board_size=board_size, komi=komi, check_superko=check_superko)
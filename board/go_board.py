@@ -1,18 +1,26 @@
 """碁盤のデータ定義と操作処理。
 """
-from typing import List, Tuple, NoReturn
-from collections import deque
+from typing import List, Tuple, NoReturn, Union
+from itertools import compress
+
 import numpy as np
 
-from board.constant import PASS, OB_SIZE, GTP_X_COORDINATE
+from board.constant import PASS, OB_SIZE, GTP_X_COORDINATE, SELF_ATARI_LIMIT
 from board.coordinate import Coordinate
+from board.move_delta import MoveDelta
+from board.neighbor import get_neighbor4_table, get_cross4_table, get_around24_table
 from board.pattern import Pattern, copy_pattern
 from board.record import Record, copy_record
+from board.scoring import count_area_score
 from board.stone import Stone
 from board.string import StringData, copy_strings
+from board.symmetry import get_symmetry_map, get_symmetry_index
 from board.zobrist_hash import affect_stone_hash, affect_string_hash
 from common.print_console import print_err
 
+# 交点の状態(空点、黒石、白石、盤外)ごとの石の入力面(空点、黒石、白石)の値。盤外は全て0
+_STONE_PLANE_VALUES = np.eye(4, 3, dtype=np.uint8)
+
 
 class GoBoard: # pylint: disable=R0902
     """碁盤クラス
@@ -41,66 +49,35 @@ class GoBoard: # pylint: disable=R0902
             """
             return x_coord + y_coord * self.board_size_with_ob
 
-        def get_neighbor4(pos: int) -> List[int]:
-            """指定した座標の上下左右の座標を取得する。
-
-            Args:
-                pos (int): 基準となる座標。
-
-            Returns:
-                List[int]: 上下左右の座標列。
-            """
-            return [pos - self.board_size_with_ob, pos - 1, pos + 1, pos + self.board_size_with_ob]
-
-        def get_cross4(pos: int) -> List[int]:
-            """指定した座標の斜め方向の座標を取得する。
-            """
-            return [pos - self.board_size_with_ob - 1, pos - self.board_size_with_ob + 1, \
-                pos + self.board_size_with_ob - 1, pos + self.board_size_with_ob + 1]
-
         self.board = [Stone.EMPTY] * (self.board_size_with_ob ** 2)
         self.pattern = Pattern(board_size, pos)
-        self.strings = StringData(board_size, pos, get_neighbor4)
+        self.neighbor4 = get_neighbor4_table(board_size)
+        self.cross4 = get_cross4_table(board_size)
+        self.around24 = get_around24_table(board_size)
         self.record = Record()
         self.onboard_pos = [0] * (self.board_size ** 2)
         self.coordinate = Coordinate(board_size=board_size)
         self.ko_move = 0
         self.ko_pos = PASS
         self.prisoner = [0] * 2
-        self.positional_hash = np.zeros(1, dtype=np.uint64)
+        self.positional_hash = 0
         self.check_superko = check_superko
         self.board_start = OB_SIZE
         self.board_end = board_size + OB_SIZE - 1
-        self.sym_map = [[0 for i in range(self.board_size_with_ob ** 2)] for j in range(8)]
+        self.sym_map = get_symmetry_map(board_size)
+        self.sym_index = get_symmetry_index(board_size)
+        self.candidate_mask = {}
+        self.dirty_pos = set()
 
         self.POS = pos # pylint: disable=C0103
-        self.get_neighbor4 = get_neighbor4
-        self.get_cross4 = get_cross4
+        self.get_neighbor4 = self.neighbor4.__getitem__
+        self.get_cross4 = self.cross4.__getitem__
+        self._init_strings()
 
         idx = 0
         for y_coord in range(self.board_start, self.board_end + 1):
             for x_coord in range(self.board_start, self.board_end + 1):
-                coord = pos(x_coord, y_coord)
-                self.onboard_pos[idx] = coord
-
-                # そのまま
-                self.sym_map[0][coord] = coord
-                # 左右対称
-                self.sym_map[1][coord] = pos(self.board_size_with_ob - (x_coord + 1), y_coord)
-                # 上下対称
-                self.sym_map[2][coord] = pos(x_coord, self.board_size_with_ob - (y_coord + 1))
-                # 上下左右対称
-                self.sym_map[3][coord] = pos(self.board_size_with_ob - (x_coord + 1),\
-                    self.board_size_with_ob - (y_coord + 1))
-                # 左上から右下方向の軸に対称
-                self.sym_map[4][coord] = pos(x_coord=y_coord, y_coord=x_coord)
-                # 90度反時計回りに回転
-                self.sym_map[5][coord] = pos(y_coord, self.board_size_with_ob - (x_coord + 1))
-                # 90度時計回りに回転
-                self.sym_map[6][coord] = pos(self.board_size_with_ob - (y_coord + 1), x_coord)
-                # 左下から右上方向の軸に対称
-                self.sym_map[7][coord] = pos(self.board_size_with_ob - (y_coord + 1),\
-                    self.board_size_with_ob - (x_coord + 1))
+                self.onboard_pos[idx] = pos(x_coord, y_coord)
                 idx += 1
 
         self.clear()
@@ -114,7 +91,8 @@ class GoBoard: # pylint: disable=R0902
         self.ko_move = 0
         self.ko_pos = 0
         self.prisoner = [0] * 2
-        self.positional_hash.fill(0)
+        self.positional_hash = 0
+        self.undo_stack = []
 
         for i, _ in enumerate(self.board):
             self.board[i] = Stone.OUT_OF_BOARD
@@ -124,10 +102,46 @@ class GoBoard: # pylint: disable=R0902
                 pos = self.POS(x_coord, y_coord)
                 self.board[pos] = Stone.EMPTY
 
+        # ニューラルネットワークの入力用に、着手と打ち上げのたびに更新する交点ごとの空点、黒石、白石の値
+        # 形状は(盤外を含む交点数, 3)
+        self.stone_planes = _STONE_PLANE_VALUES[self.get_board_array()]
         self.pattern.clear()
-        self.strings.clear()
+        self._clear_strings()
         self.record.clear()
 
+        self.candidate_mask = {
+            Stone.BLACK: [False] * len(self.board),
+            Stone.WHITE: [False] * len(self.board),
+        }
+        self.dirty_pos = set(self.onboard_pos)
+
+    def _init_strings(self) -> NoReturn:
+        """連の管理データを生成する。
+        """
+        self.strings = StringData(self.board_size, self.POS, self.neighbor4)
+
+    def _clear_strings(self) -> NoReturn:
+        """全ての連を削除する。
+        """
+        self.strings.clear()
+
+    def _copy_strings(self, src: "GoBoard") -> NoReturn:
+        """連の管理データをコピーする。
+
+        Args:
+            src (GoBoard): コピー元の盤面情報のデータ。
+        """
+        copy_strings(self.strings, src.strings)
+
+    def _set_stone_planes(self, positions: Union[int, List[int]], color: Stone) -> NoReturn:
+        """石の入力面の指定した座標の状態を更新する。
+
+        Args:
+            positions (Union[int, List[int]]): 更新する座標または座標列。
+            color (Stone): 更新後の交点の状態。
+        """
+        self.stone_planes[positions] = _STONE_PLANE_VALUES[color.value]
+
     def put_stone(self, pos: int, color: Stone) -> NoReturn:
         """指定された座標に指定された色の石を石を置く。
 
@@ -135,6 +149,10 @@ class GoBoard: # pylint: disable=R0902
             pos (int): 石を置く座標。
             color (Stone): 置く石の色。
         """
+        delta = MoveDelta(pos, color, self.ko_move, self.ko_pos, \
+            tuple(self.prisoner), self.positional_hash)
+        self.undo_stack.append(delta)
+
         if pos == PASS:
             self.record.save(self.moves, color, pos, self.positional_hash)
             self.moves += 1
@@ -142,11 +160,15 @@ class GoBoard: # pylint: disable=R0902
 
         opponent_color = Stone.get_opponent_color(color)
 
+        self._save_string_state(delta, pos, color)
+        delta.pat3 = self.pattern.pat3.copy()
+
         self.board[pos] = color
+        self._set_stone_planes(pos, color)
         self.pattern.put_stone(pos, color)
         self.positional_hash = affect_stone_hash(self.positional_hash, pos, color)
 
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
 
         connection = []
         prisoner = 0
@@ -159,11 +181,13 @@ class GoBoard: # pylint: disable=R0902
                 self.strings.remove_liberty(neighbor, pos)
                 if self.strings.get_num_liberties(neighbor) == 0:
                     removed_stones = self.strings.remove_string(self.board, neighbor)
+                    self._set_stone_planes(removed_stones, Stone.EMPTY)
                     prisoner += len(removed_stones)
                     for removed_pos in removed_stones:
                         self.pattern.remove_stone(removed_pos)
                     self.positional_hash = affect_string_hash(self.positional_hash, \
                         removed_stones, opponent_color)
+                    delta.add_captured_stones(removed_stones)
 
         if color == Stone.BLACK:
             self.prisoner[0] += prisoner
@@ -172,18 +196,87 @@ class GoBoard: # pylint: disable=R0902
 
         if len(connection) == 0:
             self.strings.make_string(self.board, pos, color)
+            delta.new_string_id = self.strings.get_id(pos)
             if prisoner == 1 and self.strings.get_num_liberties(pos) == 1:
                 self.ko_move = self.moves
-                self.ko_pos = self.strings.string[self.strings.get_id(pos)].lib[0]
+                self.ko_pos = self.strings.string[self.strings.get_id(pos)].get_liberties()[0]
         elif len(connection) == 1:
             self.strings.add_stone(self.board, pos, color, connection[0])
         else:
             self.strings.connect_string(self.board, pos, color, connection)
 
+        self._mark_dirty(pos, delta.captured)
+
         # 着手した時に記録
         self.record.save(self.moves, color, pos, self.positional_hash)
         self.moves += 1
 
+    def _save_string_state(self, delta: MoveDelta, pos: int, color: Stone) -> NoReturn:
+        """着手によって変化する連の状態を差分情報に保存する。
+
+        Args:
+            delta (MoveDelta): 保存先の差分情報。
+            pos (int): 石を置く座標。
+            color (Stone): 置く石の色。
+        """
+        string_ids = set()
+        checked = set()
+        stones = [pos]
+
+        for neighbor in self.neighbor4[pos]:
+            string_id = self.strings.get_id(neighbor)
+            if string_id == 0 or string_id in checked:
+                continue
+            checked.add(string_id)
+            string_ids.add(string_id)
+            # 連結と打ち上げでは隣接する敵連の情報も更新される
+            string_ids.update(self.strings.string[string_id].get_neighbors())
+            if self.board[neighbor] is color:
+                stones.extend(self.strings.get_stone_coordinates(string_id))
+            elif self.strings.get_num_liberties(neighbor) == 1:
+                coordinates = self.strings.get_stone_coordinates(string_id)
+                stones.extend(coordinates)
+                # 打ち上げた石に隣接する連は呼吸点が増える
+                for coordinate in coordinates:
+                    for around in self.neighbor4[coordinate]:
+                        string_ids.add(self.strings.get_id(around))
+
+        string_ids.discard(0)
+        delta.set_string_state(*self.strings.save_state(string_ids, stones))
+
+    def undo_move(self) -> NoReturn:
+        """直前の着手を取り消して、着手前の局面に戻す。
+        """
+        if not self.undo_stack:
+            return
+
+        delta = self.undo_stack.pop()
+        self.moves -= 1
+        self.record.remove(self.moves)
+
+        if delta.pos != PASS:
+            opponent_color = Stone.get_opponent_color(delta.color)
+
+            self.board[delta.pos] = Stone.EMPTY
+            self._set_stone_planes(delta.pos, Stone.EMPTY)
+            for stones in delta.captured:
+                for pos in stones:
+                    self.board[pos] = opponent_color
+                self._set_stone_planes(stones, opponent_color)
+
+            self.pattern.pat3 = delta.pat3
+
+            if delta.new_string_id > 0:
+                self.strings.string[delta.new_string_id].remove()
+            self.strings.restore_state(delta.string_state, delta.link_state)
+
+            self._mark_dirty(delta.pos, delta.captured)
+
+        self.ko_move = delta.ko_move
+        self.ko_pos = delta.ko_pos
+        self.prisoner = list(delta.prisoner)
+        self.positional_hash = delta.positional_hash
+
     def put_handicap_stone(self, pos: int, color: Stone) -> NoReturn:
         """指定された座標に指定された色の置き石を置く。
 
@@ -194,12 +287,14 @@ class GoBoard: # pylint: disable=R0902
         opponent_color = Stone.get_opponent_color(color)
 
         self.board[pos] = color
+        self._set_stone_planes(pos, color)
         self.pattern.put_stone(pos, color)
         self.positional_hash = affect_stone_hash(self.positional_hash, pos, color)
 
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
 
         connection = []
+        captured = []
         prisoner = 0
 
         for neighbor in neighbor4:
@@ -210,11 +305,13 @@ class GoBoard: # pylint: disable=R0902
                 self.strings.remove_liberty(neighbor, pos)
                 if self.strings.get_num_liberties(neighbor) == 0:
                     removed_stones = self.strings.remove_string(self.board, neighbor)
+                    self._set_stone_planes(removed_stones, Stone.EMPTY)
                     prisoner += len(removed_stones)
                     for removed_pos in removed_stones:
                         self.pattern.remove_stone(removed_pos)
                     self.positional_hash = affect_string_hash(self.positional_hash, \
                         removed_stones, opponent_color)
+                    captured.append(removed_stones)
 
         if color == Stone.BLACK:
             self.prisoner[0] += prisoner
@@ -225,15 +322,41 @@ class GoBoard: # pylint: disable=R0902
             self.strings.make_string(self.board, pos, color)
             if prisoner == 1 and self.strings.get_num_liberties(pos) == 1:
                 self.ko_move = self.moves
-                self.ko_pos = self.strings.string[self.strings.get_id(pos)].lib[0]
+                self.ko_pos = self.strings.string[self.strings.get_id(pos)].get_liberties()[0]
         elif len(connection) == 1:
             self.strings.add_stone(self.board, pos, color, connection[0])
         else:
             self.strings.connect_string(self.board, pos, color, connection)
 
+        self._mark_dirty(pos, captured)
+
         # 着手した時に記録
         self.record.save_handicap(pos)
 
+    def _mark_dirty(self, pos: int, captured: List[List[int]]) -> NoReturn:
+        """着手によって着手候補の判定結果が変わりうる座標を再計算対象に追加する。
+        石が変化した座標の周囲5x5の範囲と、隣接する連の呼吸点が対象になる。
+
+        Args:
+            pos (int): 着手した座標。
+            captured (List[List[int]]): 打ち上げた連ごとの石の座標列。
+        """
+        changed = [pos]
+        for stones in captured:
+            changed.extend(stones)
+
+        checked_ids = set()
+        for coordinate in changed:
+            self.dirty_pos.update(self.around24[coordinate])
+            for neighbor in self.neighbor4[coordinate]:
+                if self.board[neighbor] is not Stone.BLACK and self.board[neighbor] is not Stone.WHITE:
+                    continue
+                string_id = self.strings.get_id(neighbor)
+                if string_id in checked_ids:
+                    continue
+                checked_ids.add(string_id)
+                self.dirty_pos.update(self.strings.string[string_id].lib)
+
     def _is_suicide(self, pos: int, color: Stone) -> bool:
         """自殺手か否かを判定する。
         自殺手ならTrue、そうでなければFalseを返す。
@@ -247,7 +370,7 @@ class GoBoard: # pylint: disable=R0902
         """
         other = Stone.get_opponent_color(color)
 
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
 
         for neighbor in neighbor4:
             if self.board[neighbor] is other and self.strings.get_num_liberties(neighbor) == 1:
@@ -282,27 +405,41 @@ class GoBoard: # pylint: disable=R0902
             return False
 
         # 超劫の確認
-        if self.check_superko and pos != PASS:
-            opponent = Stone.get_opponent_color(color)
-            neighbor4 = self.get_neighbor4(pos)
-            neighbor_ids = [self.strings.get_id(neighbor) for neighbor in neighbor4]
-            unique_ids = list(set(neighbor_ids))
-            current_hash = self.positional_hash.copy()
-
-            # 打ち上げる石があれば打ち上げたと仮定
-            for string_id in unique_ids:
-                if self.strings.get_num_liberties(self.strings.string[string_id].get_origin()) == 1:
-                    stones = self.strings.get_stone_coordinates(string_id)
-                    current_hash = affect_string_hash(current_hash, stones, opponent)
-            # 石を置く
-            current_hash = affect_stone_hash(current_hash, pos=pos, color=color)
-
-            if self.record.has_same_hash(current_hash):
-                return False
-
+        if self.check_superko and pos != PASS and self._is_superko(pos, color):
+            return False
 
         return True
 
+    def _is_superko(self, pos: int, color: Stone) -> bool:
+        """着手後の局面が過去の局面と一致するか否かを判定する。
+
+        Args:
+            pos (int): 確認する座標。
+            color (Stone): 着手する石の色。
+
+        Returns:
+            bool: 過去の局面と一致すればTrue、そうでなければFalse。
+        """
+        opponent = Stone.get_opponent_color(color)
+        current_hash = self.positional_hash
+        checked_ids = set()
+
+        # 打ち上げる相手の石があれば打ち上げたと仮定
+        for neighbor in self.neighbor4[pos]:
+            if self.board[neighbor] is not opponent:
+                continue
+            string_id = self.strings.get_id(neighbor)
+            if string_id in checked_ids:
+                continue
+            checked_ids.add(string_id)
+            if self.strings.get_num_liberties(neighbor) == 1:
+                stones = self.strings.get_stone_coordinates(string_id)
+                current_hash = affect_string_hash(current_hash, stones, opponent)
+        # 石を置く
+        current_hash = affect_stone_hash(current_hash, pos=pos, color=color)
+
+        return self.record.has_same_hash(current_hash)
+
     def is_legal_not_eye(self, pos: int, color: Stone) -> bool:
         """合法手かつ眼でないか否かを確認する。
         合法手かつ眼でなければTrue、そうでなければFalseを返す。
@@ -314,7 +451,7 @@ class GoBoard: # pylint: disable=R0902
         Returns:
             bool: 判定結果。合法手かつ眼でなければTrue、そうでなければFalse。
         """
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
         if self.pattern.get_eye_color(pos) is not color or \
            self.strings.get_num_liberties(neighbor4[0]) == 1 or \
            self.strings.get_num_liberties(neighbor4[1]) == 1 or \
@@ -334,7 +471,7 @@ class GoBoard: # pylint: disable=R0902
         Returns:
             int: 取られる石の数
         """
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
 
         lib_candidate = []
         for neighbor in neighbor4:
@@ -408,6 +545,45 @@ class GoBoard: # pylint: disable=R0902
         """
         return [pos for pos in self.onboard_pos if self.is_legal(pos, color)]
 
+    def get_candidate_pos(self, color: Stone) -> List[int]:
+        """探索で展開する着手候補の座標を取得する。
+        合法手のうち、SELF_ATARI_LIMIT個以上の石を取られるアタリへの突入と完全な眼を除く。
+        判定結果は着手の影響を受けた座標だけを再計算して保持する。
+
+        Args:
+            color (Stone): 手番の色。
+
+        Returns:
+            List[int]: 着手候補の座標列。
+        """
+        if self.dirty_pos:
+            self._update_candidate_mask()
+
+        candidates = list(compress(range(len(self.board)), self.candidate_mask[color]))
+
+        # 劫と超劫は盤面全体の状態に依存するので取得時に確認する
+        if self.ko_move == (self.moves - 1) and self.ko_pos in candidates:
+            candidates.remove(self.ko_pos)
+        if self.check_superko:
+            candidates = [pos for pos in candidates if not self._is_superko(pos, color)]
+
+        return candidates
+
+    def _update_candidate_mask(self) -> NoReturn:
+        """再計算対象の座標について着手候補か否かを判定し直す。
+        """
+        for pos in self.dirty_pos:
+            if self.board[pos] is not Stone.EMPTY:
+                for mask in self.candidate_mask.values():
+                    mask[pos] = False
+                continue
+            no_empty_neighbor = self.pattern.get_n_neighbors_empty(pos) == 0
+            for color, mask in self.candidate_mask.items():
+                mask[pos] = not (no_empty_neighbor and self._is_suicide(pos, color)) \
+                    and self.check_self_atari_stone(pos, color) < SELF_ATARI_LIMIT \
+                    and not self.is_complete_eye(pos, color)
+        self.dirty_pos.clear()
+
     def display(self, sym: int=0) -> NoReturn:
         """盤面を表示する。
         """
@@ -465,26 +641,33 @@ class GoBoard: # pylint: disable=R0902
         """
         return self.board_size
 
-    def get_board_data(self, sym: int) -> List[int]:
+    def get_board_array(self) -> np.ndarray:
+        """盤外を含む碁盤の各交点の状態を配列で取得する。
+
+        Returns:
+            np.ndarray: 空点は0, 黒石は1, 白石は2, 盤外は3の1次元配列。
+        """
+        return np.array([stone.value for stone in self.board], dtype=np.int8)
+
+    def get_board_data(self, sym: int) -> np.ndarray:
         """ニューラルネットワークの入力用の碁盤情報を取得する。
 
         Args:
             sym (int): 対称形の番号。
 
         Returns:
-            list[int]: 空点は0, 黒石は1, 白石は2のリスト。
+            np.ndarray: 空点は0, 黒石は1, 白石は2の配列。
         """
-        return [self.board[self.get_symmetrical_coordinate(pos, sym)].value \
-            for pos in self.onboard_pos]
+        return self.get_board_array()[self.sym_index[sym]]
 
-    def get_liberty_data(self, sym: int) -> List[int]:
+    def get_liberty_data(self, sym: int) -> np.ndarray:
         """ニューラルネットワークの入力用の呼吸点数の情報を取得する。
 
         Args:
             sym (int): 対称形の番号。
 
         Returns:
-            List[int]: _description_
+            np.ndarray: 各交点の石を含む連の呼吸点数。空点は0。
         """
         base_data = [0] * (self.board_size_with_ob ** 2)
         for index, string in enumerate(self.strings.string):
@@ -493,8 +676,18 @@ class GoBoard: # pylint: disable=R0902
                 coordinates = self.strings.get_stone_coordinates(index)
                 for coordinate in coordinates:
                     base_data[coordinate] = num_liberties
-        return [base_data[self.get_symmetrical_coordinate(pos, sym)] \
-            for pos in self.onboard_pos]
+        return np.array(base_data)[self.sym_index[sym]]
+
+    def get_num_liberties(self, pos: int) -> int:
+        """指定した座標の石を含む連の呼吸点数を取得する。
+
+        Args:
+            pos (int): 石の座標。
+
+        Returns:
+            int: 呼吸点数。石がない場合は0。
+        """
+        return self.strings.get_num_liberties(pos)
 
     def get_symmetrical_coordinate(self, pos: int, sym: int) -> int:
         """8対称のいずれかの座標を取得する。
@@ -535,11 +728,11 @@ class GoBoard: # pylint: disable=R0902
         last_move_color, _, _ = self.record.get(self.moves - 1)
         return Stone.get_opponent_color(last_move_color)
 
-    def get_move_history(self) -> List[Tuple[Stone, int, np.array]]:
+    def get_move_history(self) -> List[Tuple[Stone, int, int]]:
         """着手の履歴を取得する。
 
         Returns:
-            [(Stone, int, np.array), ...]: (着手の色、座標、ハッシュ値) のリスト。
+            [(Stone, int, int), ...]: (着手の色、座標、ハッシュ値) のリスト。
         """
         return [self.record.get(m) for m in range(1, self.moves)]
 
@@ -554,73 +747,37 @@ class GoBoard: # pylint: disable=R0902
     def set_history(self, move_history, handicap_history):
         self.clear()
         for handicap in handicap_history:
-            self.board.put_handicap_stone(handicap, Stone.BLACK)
+            self.put_handicap_stone(handicap, Stone.BLACK)
         for (color, pos, _) in move_history:
             self.put_stone(pos, color)
 
-    def count_score(self) -> int: # pylint: disable=R0912
-        """領地を簡易的にカウントする。
+    def count_score(self) -> int:
+        """領地をカウントする。無条件に活きている石に囲まれた地の中の石は死石として扱い、
+        それ以外はTromp-Taylorルールで数える。
 
         Returns:
             int: 黒から見た領地の数（コミは考慮しない)。
         """
-        board = self.board[:]
-
-        # 明らかに死んでいる石は打ち上げたとみなす
-        for pos in self.onboard_pos:
-            if self.board[pos] in [Stone.BLACK, Stone.WHITE]:
-                if self.strings.get_num_liberties(pos) == 1:
-                    board[pos] = Stone.EMPTY
-
-        already_check = [False] * len(self.board)
-
-        # 同じ色の石に囲まれている空点をその色の領地とする。
-        # 違う色が混じった場合は領地として認識しないようにする。
-        for pos in self.onboard_pos: # pylint: disable=R1702
-            if board[pos] is Stone.EMPTY:
-                pos_list = []
-                pos_queue = deque()
-                pos_queue.append(pos)
-                color = Stone.EMPTY
-                while pos_queue:
-                    coord = pos_queue.popleft()
-                    if board[coord] is Stone.OUT_OF_BOARD or already_check[coord]:
-                        continue
-                    neighbor4 = self.get_neighbor4(coord)
-                    for neighbor in neighbor4:
-                        if board[neighbor] is Stone.EMPTY:
-                            pos_queue.append(coord)
-                        elif board[neighbor] in [Stone.BLACK, Stone.WHITE]:
-                            if color is Stone.EMPTY:
-                                color = board[neighbor]
-                            elif color != board[neighbor]:
-                                color = Stone.OUT_OF_BOARD
-                    already_check[coord] = True
-                    pos_list.append(coord)
-                for coord in pos_list:
-                    board[pos] = color
-            else:
-                already_check[pos] = True
-
-        black = board.count(Stone.BLACK)
-        white = board.count(Stone.WHITE)
-
-        return black - white
+        return count_area_score(self.board, self.board_size)
 
 
 def copy_board(dst: GoBoard, src: GoBoard):
-    """盤面の情報をコピーする。
+    """盤面の情報をコピーする。着手を戻すための履歴はコピーしない。
 
     Args:
         dst (GoBoard): コピー先の盤面情報のデータ。
         src (GoBoard): コピー元の盤面情報のデータ。
     """
     dst.board = src.board[:]
+    np.copyto(dst.stone_planes, src.stone_planes)
     copy_pattern(dst.pattern, src.pattern)
-    copy_strings(dst.strings, src.strings)
+    dst._copy_strings(src) # pylint: disable=W0212
     copy_record(dst.record, src.record)
     dst.ko_move = src.ko_move
     dst.ko_pos = src.ko_pos
     dst.prisoner = src.prisoner[:]
-    dst.positional_hash = src.positional_hash.copy()
+    dst.positional_hash = src.positional_hash
     dst.moves = src.moves
+    dst.undo_stack = []
+    dst.candidate_mask = {color: mask[:] for color, mask in src.candidate_mask.items()}
+    dst.dirty_pos = src.dirty_pos.copy()
@@ -0,0 +1,52 @@
+"""着手を戻すための差分情報の定義。
+"""
+from typing import Any, List, NoReturn, Tuple
+
+from board.stone import Stone
+
+
+class MoveDelta: # pylint: disable=R0902,R0903
+    """1手分の着手で変化した盤面情報を保持するクラス。
+    """
+    def __init__(self, pos: int, color: Stone, ko_move: int, ko_pos: int, \
+        prisoner: Tuple[int, int], positional_hash: int): # pylint: disable=R0913
+        """MoveDeltaクラスのコンストラクタ。
+
+        Args:
+            pos (int): 着手した座標。
+            color (Stone): 着手した石の色。
+            ko_move (int): 着手前の劫が発生した手数。
+            ko_pos (int): 着手前の劫の座標。
+            prisoner (Tuple[int, int]): 着手前のアゲハマの数。
+            positional_hash (int): 着手前の局面のハッシュ値。
+        """
+        self.pos = pos
+        self.color = color
+        self.ko_move = ko_move
+        self.ko_pos = ko_pos
+        self.prisoner = prisoner
+        self.positional_hash = positional_hash
+        self.pat3 = None
+        self.captured = []
+        self.new_string_id = 0
+        self.string_state = []
+        self.link_state = []
+
+    def set_string_state(self, string_state: List[Tuple[int, Tuple[Any, ...]]], \
+        link_state: List[Tuple[int, int, int]]) -> NoReturn:
+        """着手前の連の状態を設定する。
+
+        Args:
+            string_state (List[Tuple[int, Tuple[Any, ...]]]): 着手で変化する連の状態。
+            link_state (List[Tuple[int, int, int]]): 着手で変化する座標の連IDと連結情報。
+        """
+        self.string_state = string_state
+        self.link_state = link_state
+
+    def add_captured_stones(self, stones: List[int]) -> NoReturn:
+        """着手で打ち上げた連の石の座標を追加する。
+
+        Args:
+            stones (List[int]): 打ち上げた連を構成していた石の座標列。
+        """
+        self.captured.append(stones)
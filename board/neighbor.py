@@ -0,0 +1,60 @@
+"""近傍座標のテーブル。
+"""
+from functools import lru_cache
+from typing import Tuple
+
+from board.constant import OB_SIZE
+
+
+@lru_cache(maxsize=None)
+def get_neighbor4_table(board_size: int) -> Tuple[Tuple[int, int, int, int], ...]:
+    """各座標の上下左右の座標のテーブルを取得する。同じ碁盤サイズでは同じテーブルを共有する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[Tuple[int, int, int, int], ...]: 座標をインデックスとした上下左右の座標列のテーブル。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    return tuple((pos - board_size_with_ob, pos - 1, pos + 1, pos + board_size_with_ob) \
+        for pos in range(board_size_with_ob ** 2))
+
+
+@lru_cache(maxsize=None)
+def get_cross4_table(board_size: int) -> Tuple[Tuple[int, int, int, int], ...]:
+    """各座標の斜め方向の座標のテーブルを取得する。同じ碁盤サイズでは同じテーブルを共有する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[Tuple[int, int, int, int], ...]: 座標をインデックスとした斜め方向の座標列のテーブル。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    return tuple((pos - board_size_with_ob - 1, pos - board_size_with_ob + 1, \
+        pos + board_size_with_ob - 1, pos + board_size_with_ob + 1) \
+        for pos in range(board_size_with_ob ** 2))
+
+
+@lru_cache(maxsize=None)
+def get_around24_table(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """各座標を中心とした5x5の範囲にある盤上の座標のテーブルを取得する。
+    同じ碁盤サイズでは同じテーブルを共有する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[Tuple[int, ...], ...]: 座標をインデックスとした周囲の盤上の座標列のテーブル。中心の座標も含む。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    board_start = OB_SIZE
+    board_end = board_size + OB_SIZE - 1
+    table = []
+    for pos in range(board_size_with_ob ** 2):
+        x_coord, y_coord = pos % board_size_with_ob, pos // board_size_with_ob
+        table.append(tuple(x + y * board_size_with_ob \
+            for y in range(max(y_coord - 2, board_start), min(y_coord + 2, board_end) + 1) \
+            for x in range(max(x_coord - 2, board_start), min(x_coord + 2, board_end) + 1)))
+    return tuple(table)
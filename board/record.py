@@ -1,7 +1,6 @@
 """着手の履歴の保持。
 """
-from typing import NoReturn, Tuple
-import numpy as np
+from typing import List, NoReturn, Tuple
 
 from board.constant import PASS, MAX_RECORDS
 from board.stone import Stone
@@ -16,7 +15,8 @@ class Record:
         """
         self.color = [Stone.EMPTY] * MAX_RECORDS
         self.pos = [PASS] * MAX_RECORDS
-        self.hash_value = np.zeros(shape=MAX_RECORDS, dtype=np.uint64)
+        self.hash_value = [0] * MAX_RECORDS
+        self.hash_count = {}
         self.handicap_pos = []
 
     def clear(self) -> NoReturn:
@@ -24,25 +24,54 @@ class Record:
         """
         self.color = [Stone.EMPTY] * MAX_RECORDS
         self.pos = [PASS] * MAX_RECORDS
-        self.hash_value.fill(0)
+        self.hash_value = [0] * MAX_RECORDS
+        self.hash_count = {}
         self.handicap_pos = []
 
-    def save(self, moves: int, color: Stone, pos: int, hash_value: np.array) -> NoReturn:
+    def save(self, moves: int, color: Stone, pos: int, hash_value: int) -> NoReturn:
         """着手の履歴の記録する。
 
         Args:
             moves (int): 着手数。
             color (Stone): 着手する石の色。
             pos (int): 着手する座標。
-            hash_value (np.array): 局面のハッシュ値。
+            hash_value (int): 局面のハッシュ値。
         """
         if moves < MAX_RECORDS:
+            if self.color[moves] is not Stone.EMPTY:
+                self._discard_hash(self.hash_value[moves])
             self.color[moves] = color
             self.pos[moves] = pos
             self.hash_value[moves] = hash_value
+            # パスでは同じ局面が続くので出現回数を数えておく
+            self.hash_count[hash_value] = self.hash_count.get(hash_value, 0) + 1
         else:
             print_err("Cannot save move record.")
 
+    def remove(self, moves: int) -> NoReturn:
+        """指定した着手の履歴を消去する。
+
+        Args:
+            moves (int): 着手数。
+        """
+        if moves < MAX_RECORDS and self.color[moves] is not Stone.EMPTY:
+            self._discard_hash(self.hash_value[moves])
+            self.color[moves] = Stone.EMPTY
+            self.pos[moves] = PASS
+            self.hash_value[moves] = 0
+
+    def _discard_hash(self, hash_value: int) -> NoReturn:
+        """記録済みのハッシュ値の出現回数を1つ減らす。
+
+        Args:
+            hash_value (int): ハッシュ値。
+        """
+        count = self.hash_count[hash_value] - 1
+        if count == 0:
+            del self.hash_count[hash_value]
+        else:
+            self.hash_count[hash_value] = count
+
     def save_handicap(self, pos: int) -> NoReturn:
         """置き石の座標を記録する。
 
@@ -51,33 +80,33 @@ class Record:
         """
         self.handicap_pos.append(pos)
 
-    def has_same_hash(self, hash_value: np.array) -> bool:
+    def has_same_hash(self, hash_value: int) -> bool:
         """同じハッシュ値があるかを確認する。
 
         Args:
-            hash_value (np.array): ハッシュ値。
+            hash_value (int): ハッシュ値。
 
         Returns:
             bool: 同じハッシュ値がある場合はTrue、なければFalse。
         """
-        return np.any(self.hash_value == hash_value)
+        return hash_value in self.hash_count
 
-    def get(self, moves: int) -> Tuple[Stone, int, np.array]:
+    def get(self, moves: int) -> Tuple[Stone, int, int]:
         """指定した着手を取得する。
 
         Args:
             moves (int): 着手数。
 
         Returns:
-            (Stone, int, np.array): 着手の色、座標、ハッシュ値。
+            (Stone, int, int): 着手の色、座標、ハッシュ値。
         """
         return (self.color[moves], self.pos[moves], self.hash_value[moves])
 
-    def get_hash_history(self) -> np.array:
+    def get_hash_history(self) -> List[int]:
         """ハッシュ値の履歴を取得する。
 
         Returns:
-            np.array: ハッシュ値の履歴。
+            List[int]: ハッシュ値の履歴。
         """
         return self.hash_value
 
@@ -91,4 +120,5 @@ def copy_record(dst: Record, src: Record) -> NoReturn:
     """
     dst.color = src.color[:]
     dst.pos = src.pos[:]
-    dst.hash_value = src.hash_value.copy()
+    dst.hash_value = src.hash_value[:]
+    dst.hash_count = src.hash_count.copy()
@@ -0,0 +1,227 @@
+"""終局した盤面の地の計算。
+
+Union-Findで連と空点の領域をラベリングし、Bensonのアルゴリズムで無条件に活きている
+(パスし続けても取られない)連と、その連だけに囲まれた地を求める。それ以外の部分は
+Tromp-Taylorルールと同様に、石と片方の色の石だけに接する空点をその色の地として数える。
+"""
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
+
+from board.constant import OB_SIZE
+from board.neighbor import get_neighbor4_table
+from board.stone import Stone
+
+
+@lru_cache(maxsize=None)
+def _get_onboard_pos(board_size: int) -> Tuple[int, ...]:
+    """盤上の座標列を取得する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[int, ...]: 盤上の座標列。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    return tuple(x_coord + y_coord * board_size_with_ob \
+        for y_coord in range(OB_SIZE, board_size + OB_SIZE) \
+        for x_coord in range(OB_SIZE, board_size + OB_SIZE))
+
+
+def _find(parent: List[int], index: int) -> int:
+    """Union-Findの根を探索する。
+
+    Args:
+        parent (List[int]): 親のインデックスのリスト。
+        index (int): 探索を開始するインデックス。
+
+    Returns:
+        int: 根のインデックス。
+    """
+    while parent[index] != index:
+        parent[index] = parent[parent[index]]
+        index = parent[index]
+    return index
+
+
+def _label_components(board: List[Stone], board_size: int) -> \
+    Tuple[List[int], Dict[int, List[int]], Set[Tuple[int, int]]]:
+    """同じ状態の交点が上下左右に繋がった領域(連、または空点の領域)をラベリングする。
+
+    Args:
+        board (List[Stone]): 碁盤の各交点の状態。
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[List[int], Dict[int, List[int]], Set[Tuple[int, int]]]: 座標ごとのラベル、
+            ラベルごとの座標列、隣接するラベルの組の集合。
+    """
+    width = board_size + OB_SIZE * 2
+    onboard_pos = _get_onboard_pos(board_size)
+    parent = list(range(len(board)))
+
+    for pos in onboard_pos:
+        state = board[pos]
+        for adjacent in (pos + 1, pos + width):
+            if board[adjacent] is state:
+                root_a = _find(parent, pos)
+                root_b = _find(parent, adjacent)
+                if root_a != root_b:
+                    if root_a < root_b:
+                        parent[root_b] = root_a
+                    else:
+                        parent[root_a] = root_b
+
+    label = [-1] * len(board)
+    members = {}
+    for pos in onboard_pos:
+        root = _find(parent, pos)
+        label[pos] = root
+        members.setdefault(root, []).append(pos)
+
+    adjacency = set()
+    for pos in onboard_pos:
+        for adjacent in (pos + 1, pos + width):
+            other = label[adjacent]
+            if other >= 0 and other != label[pos]:
+                adjacency.add((label[pos], other) if label[pos] < other else (other, label[pos]))
+
+    return label, members, adjacency
+
+
+def _get_pass_alive_territory(board: List[Stone], color: Stone, \
+    label: List[int], members: Dict[int, List[int]], \
+    neighbors: Dict[int, Set[int]], adjacent_chains: Dict[int, Set[int]]) -> List[int]:
+    """Bensonのアルゴリズムで、指定した色の無条件に活きている連だけに囲まれた地を求める。
+
+    Args:
+        board (List[Stone]): 碁盤の各交点の状態。
+        color (Stone): 地を求める色。
+        label (List[int]): 座標ごとのラベル。
+        members (Dict[int, List[int]]): ラベルごとの座標列。
+        neighbors (Dict[int, Set[int]]): ラベルごとの隣接するラベルの集合。
+        adjacent_chains (Dict[int, Set[int]]): 空点ごとの隣接する連のラベルの集合。
+
+    Returns:
+        List[int]: 地となる座標列。囲まれている相手の石の座標も含む。
+    """
+    chains = {root for root in members if board[root] is color}
+    if not chains:
+        return []
+
+    # 指定した色以外の交点が繋がった領域を、連と空点の領域のラベル単位でまとめる
+    others = [root for root in members if board[root] is not color]
+    parent = {root: root for root in others}
+    for root in others:
+        for other in neighbors[root]:
+            if other in parent:
+                root_a = _find(parent, root)
+                root_b = _find(parent, other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+
+    regions = {}
+    for root in others:
+        regions.setdefault(_find(parent, root), []).append(root)
+
+    border = {}
+    vital = {}
+    small = {}
+    for region, roots in regions.items():
+        border[region] = {other for root in roots for other in neighbors[root] if other in chains}
+        # 領域内の全ての空点に接している連にとって、その領域は生きるために必要な領域(眼)になる
+        vital_chains = set(border[region])
+        is_small = True
+        for root in roots:
+            if board[root] is not Stone.EMPTY:
+                continue
+            for pos in members[root]:
+                touching = adjacent_chains[pos]
+                vital_chains &= touching
+                if not touching & chains:
+                    is_small = False
+        vital[region] = vital_chains
+        small[region] = is_small
+
+    alive = set(chains)
+    live_regions = set(regions)
+    while True:
+        vital_count = dict.fromkeys(alive, 0)
+        for region in live_regions:
+            for chain in vital[region]:
+                if chain in vital_count:
+                    vital_count[chain] += 1
+        dead = {chain for chain, count in vital_count.items() if count < 2}
+        if not dead:
+            break
+        alive -= dead
+        live_regions = {region for region in live_regions if border[region] <= alive}
+
+    territory = []
+    for region in live_regions:
+        if small[region] and border[region]:
+            for root in regions[region]:
+                territory.extend(members[root])
+    return territory
+
+
+def get_area_owner(board: List[Stone], board_size: int) -> List[Stone]:
+    """終局した盤面の各交点がどちらの地かを判定する。
+
+    Args:
+        board (List[Stone]): 碁盤の各交点の状態。盤外を含む1次元配列。
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        List[Stone]: 座標ごとの地の色。どちらの地でもない交点と盤外はStone.EMPTY。
+    """
+    label, members, adjacency = _label_components(board, board_size)
+    neighbor4 = get_neighbor4_table(board_size)
+
+    neighbors = {root: set() for root in members}
+    for label_a, label_b in adjacency:
+        neighbors[label_a].add(label_b)
+        neighbors[label_b].add(label_a)
+
+    adjacent_chains = {}
+    for root, positions in members.items():
+        if board[root] is Stone.EMPTY:
+            for pos in positions:
+                adjacent_chains[pos] = {label[neighbor] for neighbor in neighbor4[pos] \
+                    if board[neighbor] is Stone.BLACK or board[neighbor] is Stone.WHITE}
+
+    owner = [Stone.EMPTY] * len(board)
+
+    # 石と、片方の色の石だけに接する空点の領域
+    for root, positions in members.items():
+        state = board[root]
+        if state is Stone.EMPTY:
+            colors = {board[other] for other in neighbors[root]}
+            if len(colors) == 1:
+                state = colors.pop()
+            else:
+                continue
+        for pos in positions:
+            owner[pos] = state
+
+    # 無条件に活きている連だけに囲まれた地は、中の相手の石も含めて地とする
+    for color in (Stone.BLACK, Stone.WHITE):
+        for pos in _get_pass_alive_territory(board, color, label, members, \
+            neighbors, adjacent_chains):
+            owner[pos] = color
+
+    return owner
+
+
+def count_area_score(board: List[Stone], board_size: int) -> int:
+    """終局した盤面の地を数える。
+
+    Args:
+        board (List[Stone]): 碁盤の各交点の状態。盤外を含む1次元配列。
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        int: 黒から見た地の差(コミは考慮しない)。
+    """
+    owner = get_area_owner(board, board_size)
+    return owner.count(Stone.BLACK) - owner.count(Stone.WHITE)
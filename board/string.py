@@ -1,7 +1,7 @@
 """連の定義と処理の実装。
 """
-from typing import Callable, List, NoReturn
-from board.constant import STRING_END, LIBERTY_END, NEIGHBOR_END, OB_SIZE
+from typing import Any, Callable, List, NoReturn, Tuple
+from board.constant import STRING_END, OB_SIZE
 from board.coordinate import Coordinate
 from board.stone import Stone
 from common.print_console import print_err
@@ -9,17 +9,12 @@ from common.print_console import print_err
 class String: # pylint: disable=R0902
     """連の実装クラス。
     """
-    def __init__(self, board_size: int):
+    def __init__(self):
         """連クラスのコンストラクタ。
-
-        Args:
-            board_size (int): 碁盤のサイズ。
         """
-        self.color = 0
-        self.libs = 0
-        self.lib = [0] * ((board_size + 2) ** 2)
-        self.neighbors = 0
-        self.neighbor = [0] * int(0.8 * board_size * (board_size - 1) + 5)
+        self.color = Stone.EMPTY
+        self.lib = set()
+        self.neighbor = set()
         self.origin = 0
         self.size = 0
         self.flag = False
@@ -31,19 +26,11 @@ class String: # pylint: disable=R0902
             pos (int): 連を構成する石の座標。
             color (Stone): 連を構成する石の色。
         """
-        for i, _ in enumerate(self.lib):
-            self.lib[i] = 0
-
-        for i, _ in enumerate(self.neighbor):
-            self.neighbor[i] = 0
-
         self.color = color
-        self.lib[0] = LIBERTY_END
-        self.neighbor[0] = NEIGHBOR_END
-        self.libs = 0
+        self.lib = set()
+        self.neighbor = set()
         self.origin = pos
         self.size = 1
-        self.neighbors = 0
         self.flag = True
 
     def has_liberty(self, pos: int) -> bool:
@@ -55,7 +42,7 @@ class String: # pylint: disable=R0902
         Returns:
             bool: 指定した座標を呼吸点として持つ場合はTrue、そうでなければFalse。
         """
-        return self.lib[pos] > 0
+        return pos in self.lib
 
     def has_neighbor(self, neighbor: int) -> bool:
         """指定した連IDと隣接する敵連として持っているかを確認する。
@@ -66,7 +53,7 @@ class String: # pylint: disable=R0902
         Returns:
             _bool: 指定した連IDを敵連として持つ場合はTrue、そうでなければFalse。
         """
-        return self.neighbor[neighbor] != 0
+        return neighbor in self.neighbor
 
     def remove(self) -> NoReturn:
         """連を削除する。
@@ -108,7 +95,7 @@ class String: # pylint: disable=R0902
         Returns:
             int: 連が持つ呼吸点の個数。
         """
-        return self.libs
+        return len(self.lib)
 
     def get_origin(self) -> int:
         """連を構成する石の始点を取得する。
@@ -118,14 +105,6 @@ class String: # pylint: disable=R0902
         """
         return self.origin
 
-    def get_neighbor_origin(self) -> int:
-        """隣接する敵連IDの最小値を取得する。
-
-        Returns:
-            int: 隣接する敵連IDの最小値。
-        """
-        return self.neighbor[0]
-
     def set_origin(self, pos: int):
         """連を構成する石の始点を設定する。
 
@@ -134,29 +113,13 @@ class String: # pylint: disable=R0902
         """
         self.origin = pos
 
-    def add_liberty(self, pos: int, head: int) -> int:
+    def add_liberty(self, pos: int) -> NoReturn:
         """呼吸点を1つ追加する。
 
         Args:
             pos (int): 追加する呼吸点の座標。
-            head (int): 探索開始点
-
-        Returns:
-            int: 追加した呼吸点の座標。
         """
-        # 追加済みなので何もしない
-        if self.has_liberty(pos):
-            return pos
-
-        lib = head
-        while self.lib[lib] < pos:
-            lib = self.lib[lib]
-
-        self.lib[pos] = self.lib[lib]
-        self.lib[lib] = pos
-        self.libs += 1
-
-        return pos
+        self.lib.add(pos)
 
     def remove_liberty(self, pos: int) -> NoReturn:
         """指定した座標の呼吸点を取り除く。
@@ -164,16 +127,7 @@ class String: # pylint: disable=R0902
         Args:
             pos (int): 取り除く座標。
         """
-        if not self.has_liberty(pos):
-            return
-
-        lib = 0
-        while self.lib[lib] != pos:
-            lib = self.lib[lib]
-
-        self.lib[lib] = self.lib[self.lib[lib]]
-        self.lib[pos] = 0
-        self.libs -= 1
+        self.lib.discard(pos)
 
     def add_neighbor(self, string_id: int) -> NoReturn:
         """隣接する敵連IDを追加する。
@@ -181,19 +135,7 @@ class String: # pylint: disable=R0902
         Args:
             string_id (int): 追加する敵連ID
         """
-        # 追加済みなので何もしない
-        if self.neighbor[string_id] != 0:
-            return
-
-        # 追加場所を見つける
-        neighbor = 0
-        while self.neighbor[neighbor] < string_id:
-            neighbor = self.neighbor[neighbor]
-
-        # 隣接する連IDを挿入する追加
-        self.neighbor[string_id] = self.neighbor[neighbor]
-        self.neighbor[neighbor] = string_id
-        self.neighbors += 1
+        self.neighbor.add(string_id)
 
     def remove_neighbor(self, remove_id: int) -> NoReturn:
         """指定した隣接する敵連IDを除去する。
@@ -201,16 +143,7 @@ class String: # pylint: disable=R0902
         Args:
             remove_id (int): 除去する隣接する敵連ID
         """
-        if self.neighbor[remove_id] == 0:
-            return
-
-        neighbor = 0
-        while self.neighbor[neighbor] != remove_id:
-            neighbor = self.neighbor[neighbor]
-
-        self.neighbor[neighbor] = self.neighbor[self.neighbor[neighbor]]
-        self.neighbor[remove_id] = 0
-        self.neighbors -= 1
+        self.neighbor.discard(remove_id)
 
     def get_color(self) -> Stone:
         """連を構成する石の色を取得する。
@@ -224,47 +157,60 @@ class String: # pylint: disable=R0902
         """連が持つ呼吸点の座標を全て取得する。
 
         Returns:
-            list[int]: 連が持つ呼吸の点の座標列。
+            list[int]: 連が持つ呼吸の点の座標列。座標の昇順に並ぶ。
         """
-        liberties = []
-        lib = self.lib[0]
-        while lib != LIBERTY_END:
-            liberties.append(lib)
-            lib = self.lib[lib]
-        return liberties
+        return sorted(self.lib)
 
     def get_neighbors(self) -> List[int]:
         """隣接する敵連IDを全て取得する。
 
         Returns:
-            list[int]: 隣接する敵連ID列。
+            list[int]: 隣接する敵連ID列。連IDの昇順に並ぶ。
+        """
+        return sorted(self.neighbor)
+
+    def get_state(self) -> Tuple[Any, ...]:
+        """着手を戻すために連の状態を取得する。
+
+        Returns:
+            Tuple[Any, ...]: 連の状態。連が存在しない場合は存在フラグのみ。
         """
-        neighbors = []
-        neighbor = self.neighbor[0]
-        while neighbor != NEIGHBOR_END:
-            neighbors.append(neighbor)
-            neighbor = self.neighbor[neighbor]
-        return neighbors
+        if not self.flag:
+            return (False,)
+        return (True, self.color, self.lib.copy(), self.neighbor.copy(), self.origin, self.size)
+
+    def set_state(self, state: Tuple[Any, ...]) -> NoReturn:
+        """get_stateで取得した連の状態に戻す。
+
+        Args:
+            state (Tuple[Any, ...]): 連の状態。
+        """
+        if not state[0]:
+            self.flag = False
+            return
+        self.flag, self.color, self.lib, self.neighbor, self.origin, self.size = state
 
 
 class StringData:
     """碁盤上の全ての連を管理するクラス
     """
     def __init__(self, board_size: int, pos_func: Callable[[int, int], int], \
-        get_neighbor4: Callable[[int], List[int]]):
+        neighbor4: Tuple[Tuple[int, int, int, int], ...]):
         """コンストラクタ。
 
         Args:
             board_size (int): 碁盤のサイズ。
+            pos_func (Callable[[int, int], int]): (x, y)座標を1次元配列のインデックスに変換する関数。
+            neighbor4 (Tuple[Tuple[int, int, int, int], ...]): 上下左右の座標のテーブル。
         """
         board_max = (board_size + OB_SIZE * 2) ** 2
-        self.string = [String(board_size=board_size) \
+        self.string = [String() \
             for i in range(int(0.8 * board_size * (board_size - 1) + 5))]
         self.string_id = [0] * board_max
         self.string_next = [0] * board_max
         self.board_size = board_size
         self.POS = pos_func # pylint: disable=C0103
-        self.get_neighbor4 = get_neighbor4
+        self.neighbor4 = neighbor4
 
     def clear(self) -> NoReturn:
         """全ての連を削除する。
@@ -281,7 +227,7 @@ class StringData:
             pos (int): 処理する連の座標。
             lib (int): 除去する呼吸点の座標。
         """
-        self.string[self.get_id(pos)].remove_liberty(lib)
+        self.string[self.get_id(pos)].lib.discard(lib)
 
     def remove_string(self, board: List[Stone], remove_pos: int) -> NoReturn:
         """連を盤上から除去する。
@@ -303,22 +249,20 @@ class StringData:
             board[pos] = Stone.EMPTY
             removed_stone.append(pos)
 
-            neighbor4 = self.get_neighbor4(pos)
+            neighbor4 = self.neighbor4[pos]
 
             for neighbor_pos in neighbor4:
                 neighbor_id = self.get_id(neighbor_pos)
                 if self.string[neighbor_id].exist():
-                    self.string[neighbor_id].add_liberty(pos, 0)
+                    self.string[neighbor_id].lib.add(pos)
 
             next_pos = self.string_next[pos]
             self.string_next[pos] = 0
             self.string_id[pos] = 0
             pos = next_pos
 
-        neighbor_id = self.string[remove_id].neighbor[0]
-        while neighbor_id != NEIGHBOR_END:
-            self._remove_neighbor_string(neighbor_id, remove_id)
-            neighbor_id = self.string[remove_id].neighbor[neighbor_id]
+        for neighbor_id in self.string[remove_id].neighbor:
+            self.string[neighbor_id].neighbor.discard(remove_id)
 
         self.string[remove_id].remove()
 
@@ -373,7 +317,6 @@ class StringData:
             color (Stone): 作成する連の色。
         """
         opponent_color = Stone.get_opponent_color(color)
-        lib_add = 0
 
         string_id = 1
 
@@ -384,15 +327,15 @@ class StringData:
         self.string_id[pos] = string_id
         self.string_next[pos] = STRING_END
 
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
 
         for neighbor in neighbor4:
-            if board[neighbor] == Stone.EMPTY:
-                lib_add = self.string[string_id].add_liberty(neighbor, lib_add)
-            elif board[pos] == opponent_color:
+            if board[neighbor] is Stone.EMPTY:
+                self.string[string_id].lib.add(neighbor)
+            elif board[neighbor] is opponent_color:
                 neighbor_id = self.string_id[neighbor]
-                self.string[string_id].add_neighbor(neighbor_id)
-                self.string[neighbor_id].add_neighbor(string_id)
+                self.string[string_id].neighbor.add(neighbor_id)
+                self.string[neighbor_id].neighbor.add(string_id)
 
     def _add_stone_to_string(self, string_id: int, pos: int) -> NoReturn:
         """指定した座標を連に追加する。
@@ -430,15 +373,15 @@ class StringData:
 
         self._add_stone_to_string(string_id, pos)
 
-        neighbor4 = self.get_neighbor4(pos)
+        neighbor4 = self.neighbor4[pos]
 
         for neighbor in neighbor4:
-            if board[neighbor] == Stone.EMPTY:
-                self.string[string_id].add_liberty(neighbor, 0)
-            elif board[neighbor] == opponent_color:
+            if board[neighbor] is Stone.EMPTY:
+                self.string[string_id].lib.add(neighbor)
+            elif board[neighbor] is opponent_color:
                 neighbor_id = self.string_id[neighbor]
-                self.string[string_id].add_neighbor(neighbor_id)
-                self.string[neighbor_id].add_neighbor(string_id)
+                self.string[string_id].neighbor.add(neighbor_id)
+                self.string[neighbor_id].neighbor.add(string_id)
 
     def connect_string(self, board: List[Stone], pos: int, \
         color: Stone, ids: List[int]) -> NoReturn:
@@ -507,17 +450,7 @@ class StringData:
             dst_id (int): 接続先の連ID
             src_id (int): 接続元の連ID
         """
-        dst_lib = 0
-        src_lib = 0
-
-        while src_lib != LIBERTY_END:
-            if not self.string[dst_id].has_liberty(src_lib):
-                while self.string[dst_id].lib[dst_lib] < src_lib:
-                    dst_lib = self.string[dst_id].lib[dst_lib]
-                self.string[dst_id].lib[src_lib] = self.string[dst_id].lib[dst_lib]
-                self.string[dst_id].lib[dst_lib] = src_lib
-                self.string[dst_id].libs += 1
-            src_lib = self.string[src_id].lib[src_lib]
+        self.string[dst_id].lib |= self.string[src_id].lib
 
     def _merge_neighbor(self, dst_id: int, src_id: int) -> NoReturn:
         """隣接する敵連IDを連結する。
@@ -526,42 +459,41 @@ class StringData:
             dst_id (int): 接続先の連ID
             src_id (int): 接続元の連ID
         """
-        src_neighbor = 0
-        dst_neighbor = 0
-
-        while src_neighbor != NEIGHBOR_END:
-            if not self.string[dst_id].has_neighbor(src_neighbor):
-                while self.string[dst_id].neighbor[dst_neighbor] < src_neighbor:
-                    dst_neighbor = self.string[dst_id].neighbor[dst_neighbor]
-                self.string[dst_id].neighbor[src_neighbor] = \
-                    self.string[dst_id].neighbor[dst_neighbor]
-                self.string[dst_id].neighbor[dst_neighbor] = src_neighbor
-            src_neighbor = self.string[src_id].neighbor[src_neighbor]
+        self.string[dst_id].neighbor |= self.string[src_id].neighbor
 
-        neighbor = self.string[src_id].get_neighbor_origin()
-        while neighbor != NEIGHBOR_END:
-            self._remove_neighbor_string(neighbor, src_id)
-            self._add_neighbor(neighbor, dst_id)
-            neighbor = self.string[src_id].neighbor[neighbor]
+        for neighbor_id in self.string[src_id].neighbor:
+            self.string[neighbor_id].neighbor.discard(src_id)
+            self.string[neighbor_id].neighbor.add(dst_id)
 
-
-    def _remove_neighbor_string(self, neighbor_id: int, remove_id: int) -> NoReturn:
-        """指定した敵連IDを削除する。
+    def save_state(self, string_ids: List[int], stones: List[int]) \
+        -> Tuple[List[Tuple[int, Tuple[Any, ...]]], List[Tuple[int, int, int]]]:
+        """着手を戻すために、指定した連と石の座標の状態を保存する。
 
         Args:
-            neighbor_id (int): 処理する連ID。
-            remove_id (int): 削除する連ID。
+            string_ids (List[int]): 保存する連ID列。
+            stones (List[int]): 連IDと連結情報を保存する座標列。
+
+        Returns:
+            Tuple[List[Tuple[int, Tuple[Any, ...]]], List[Tuple[int, int, int]]]: 連の状態と座標ごとの連結情報。
         """
-        self.string[neighbor_id].remove_neighbor(remove_id)
+        string_state = [(string_id, self.string[string_id].get_state()) \
+            for string_id in string_ids]
+        link_state = [(pos, self.string_id[pos], self.string_next[pos]) for pos in stones]
+        return string_state, link_state
 
-    def _add_neighbor(self, neighbor_id: int, add_id: int) -> NoReturn:
-        """隣接する敵連IDを追加する。
+    def restore_state(self, string_state: List[Tuple[int, Tuple[Any, ...]]], \
+        link_state: List[Tuple[int, int, int]]) -> NoReturn:
+        """save_stateで保存した状態に戻す。
 
         Args:
-            neighbor_id (int): 処理する連ID。
-            add_id (int): 追加する連ID。
+            string_state (List[Tuple[int, Tuple[Any, ...]]]): 連の状態。
+            link_state (List[Tuple[int, int, int]]): 座標ごとの連IDと連結情報。
         """
-        self.string[neighbor_id].add_neighbor(add_id)
+        for pos, string_id, next_pos in link_state:
+            self.string_id[pos] = string_id
+            self.string_next[pos] = next_pos
+        for string_id, state in string_state:
+            self.string[string_id].set_state(state)
 
     def display(self) -> NoReturn:
         """盤上に存在する全ての連の情報を表示する。（デバッグ用）
@@ -605,10 +537,8 @@ def copy_string(dst: String, src: String) -> NoReturn:
         src (String): コピー元の連のデータ。
     """
     dst.color = src.color
-    dst.libs = src.libs
-    dst.lib = src.lib[:]
-    dst.neighbors = src.neighbors
-    dst.neighbor = src.neighbor[:]
+    dst.lib = src.lib.copy()
+    dst.neighbor = src.neighbor.copy()
     dst.origin = src.origin
     dst.size = src.size
     dst.flag = src.flag
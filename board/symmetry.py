@@ -0,0 +1,88 @@
+"""盤面の8対称形の座標変換テーブル。
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from board.constant import OB_SIZE, PASS
+
+
+@lru_cache(maxsize=None)
+def get_symmetry_map(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """8対称形の座標変換テーブルを取得する。同じ碁盤サイズでは同じテーブルを共有する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[Tuple[int, ...], ...]: 対称形の番号と座標をインデックスとした対称形の座標のテーブル。
+            盤外の座標は0。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    sym_map = [[0] * (board_size_with_ob ** 2) for _ in range(8)]
+
+    def pos(x_coord: int, y_coord: int) -> int:
+        return x_coord + y_coord * board_size_with_ob
+
+    for y_coord in range(OB_SIZE, board_size + OB_SIZE):
+        for x_coord in range(OB_SIZE, board_size + OB_SIZE):
+            coord = pos(x_coord, y_coord)
+            # そのまま
+            sym_map[0][coord] = coord
+            # 左右対称
+            sym_map[1][coord] = pos(board_size_with_ob - (x_coord + 1), y_coord)
+            # 上下対称
+            sym_map[2][coord] = pos(x_coord, board_size_with_ob - (y_coord + 1))
+            # 上下左右対称
+            sym_map[3][coord] = pos(board_size_with_ob - (x_coord + 1), \
+                board_size_with_ob - (y_coord + 1))
+            # 左上から右下方向の軸に対称
+            sym_map[4][coord] = pos(y_coord, x_coord)
+            # 90度反時計回りに回転
+            sym_map[5][coord] = pos(y_coord, board_size_with_ob - (x_coord + 1))
+            # 90度時計回りに回転
+            sym_map[6][coord] = pos(board_size_with_ob - (y_coord + 1), x_coord)
+            # 左下から右上方向の軸に対称
+            sym_map[7][coord] = pos(board_size_with_ob - (y_coord + 1), \
+                board_size_with_ob - (x_coord + 1))
+
+    return tuple(tuple(table) for table in sym_map)
+
+
+@lru_cache(maxsize=None)
+def get_symmetry_index(board_size: int) -> np.ndarray:
+    """盤上の各交点に対応する対称形の座標の配列を取得する。盤外を含む1次元配列の盤面の
+    データをこの配列でインデックス参照すると、対称形の盤上のデータが一度に得られる。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        np.ndarray: 対称形の番号と盤上の交点の番号をインデックスとした座標の配列。形状は(8, board_size ** 2)。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    sym_map = get_symmetry_map(board_size)
+    onboard_pos = [x_coord + y_coord * board_size_with_ob \
+        for y_coord in range(OB_SIZE, board_size + OB_SIZE) \
+        for x_coord in range(OB_SIZE, board_size + OB_SIZE)]
+    index = np.array([[table[pos] for pos in onboard_pos] for table in sym_map], dtype=np.int32)
+    index.setflags(write=False)
+    return index
+
+
+@lru_cache(maxsize=None)
+def get_symmetry_index_with_pass(board_size: int) -> np.ndarray:
+    """get_symmetry_indexの末尾にパスの座標を追加した配列を取得する。Policyのように
+    パスを末尾に持つデータの対称形を得るときに使用する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        np.ndarray: 対称形の番号と盤上の交点の番号をインデックスとした座標の配列。形状は(8, board_size ** 2 + 1)。
+    """
+    onboard_index = get_symmetry_index(board_size)
+    index = np.concatenate([onboard_index, np.full((8, 1), PASS, dtype=np.int32)], axis=1)
+    index.setflags(write=False)
+    return index
@@ -6,36 +6,38 @@ import numpy as np
 from board.constant import BOARD_SIZE, OB_SIZE
 from board.stone import Stone
 
+# ハッシュ値はnp.uint64の配列ではなくPythonのintで保持する。
 hash_bit_mask = np.random.randint(low=0, high=np.iinfo(np.uint64).max, \
-    size=[4, (BOARD_SIZE + OB_SIZE * 2) ** 2], dtype=np.uint64)
+    size=[4, (BOARD_SIZE + OB_SIZE * 2) ** 2], dtype=np.uint64).tolist()
 
 
-def affect_stone_hash(hash_value: np.array, pos: int, color: Stone) -> np.array:
+def affect_stone_hash(hash_value: int, pos: int, color: Stone) -> int:
     """1つの石のハッシュ値を作用させる。
 
     Args:
-        hash_value (np.array): 現局面のハッシュ値。
+        hash_value (int): 現局面のハッシュ値。
         pos (int): 座標。
         color (Stone): 石の色。
 
     Returns:
-        np.array : 作用後のハッシュ値。
+        int : 作用後のハッシュ値。
     """
     return hash_value ^ hash_bit_mask[color.value][pos]
 
 
-def affect_string_hash(hash_value: np.array, pos_list: List[int], color: Stone) -> np.array:
+def affect_string_hash(hash_value: int, pos_list: List[int], color: Stone) -> int:
     """複数の石のハッシュ値を作用させる。
 
     Args:
-        hash_value (np.array): 現局面のハッシュ値。
+        hash_value (int): 現局面のハッシュ値。
         pos_list (list[int]): 座標列。
         color (Stone): 石の色。
 
     Returns:
-        np.array: 作用後のハッシュ値。
+        int: 作用後のハッシュ値。
     """
+    color_mask = hash_bit_mask[color.value]
     for pos in pos_list:
-        hash_value ^= hash_bit_mask[color.value][pos]
+        hash_value ^= color_mask[pos]
 
     return hash_value
@@ -0,0 +1,79 @@
+"""ニューラルネットワークの推論バックエンドの一致確認と速度計測のエントリーポイント。
+"""
+import json
+import os
+import sys
+from typing import Tuple
+
+import click
+import torch
+
+from benchmark.evaluator_benchmark import BENCHMARK_BACKENDS, BENCHMARK_BATCH_SIZES, \
+    PARITY_TOLERANCE, run_evaluator_benchmark
+from common.print_console import print_err, print_out
+from nn.evaluator import FLOAT_EVALUATOR_BACKENDS
+from nn.network.dual_net import DualNet
+from nn.utility import load_network
+
+
+@click.command()
+@click.option('--model', type=click.STRING, default="", \
+    help="計測するニューラルネットワークのモデルファイルパス。指定しない場合は乱数で初期化したモデルを使う。")
+@click.option('--backend', type=click.Choice(FLOAT_EVALUATOR_BACKENDS), multiple=True, \
+    default=BENCHMARK_BACKENDS, \
+    help="計測する推論バックエンド。複数回指定できる。デフォルトはtorch, torchscript。\
+    onnxは実験的なバックエンドなので、指定した時だけ計測する。")
+@click.option('--batch-size', type=click.IntRange(min=1), multiple=True, \
+    default=BENCHMARK_BATCH_SIZES, \
+    help="計測するミニバッチサイズ。複数回指定できる。デフォルトは1, 8, 32, 128。")
+@click.option('--iterations', type=click.IntRange(min=1), default=20, \
+    help="ミニバッチサイズごとに計測する推論の回数。デフォルトは20。")
+@click.option('--seed', type=click.INT, default=0, help="乱数のシード値。デフォルトは0。")
+@click.option('--json', 'json_output', type=click.BOOL, default=False, \
+    help="計測結果をJSON形式で出力するフラグ。デフォルトはFalse。")
+def evaluator_benchmark_main(model: str, backend: Tuple[str, ...], batch_size: Tuple[int, ...], \
+    iterations: int, seed: int, json_output: bool): # pylint: disable=R0913
+    """推論バックエンドごとに、CPUでの推論結果がPyTorchと一致するかを確認し、ミニバッチサイズごとの
+    スループットを計測して表示する。推論結果がPARITY_TOLERANCEより大きくずれたバックエンドか、
+    使えないバックエンドがあれば終了コード1で終了する。
+
+    Args:
+        model (str): モデルファイルパス。
+        backend (Tuple[str, ...]): 推論バックエンドの名前のリスト。
+        batch_size (Tuple[int, ...]): ミニバッチサイズのリスト。
+        iterations (int): 計測する推論の回数。
+        seed (int): 乱数のシード値。
+        json_output (bool): 計測結果をJSON形式で出力するフラグ。
+    """
+    torch.manual_seed(seed)
+    if model:
+        network = load_network(os.path.join(os.path.dirname(__file__), model), False)
+    else:
+        network = DualNet(torch.device("cpu"))
+        network.eval()
+
+    results = run_evaluator_benchmark(network, list(backend), list(batch_size), iterations, seed)
+
+    if json_output:
+        print_out(json.dumps({"seed": seed, "tolerance": PARITY_TOLERANCE, "results": results}, \
+            indent=2))
+    else:
+        for result in results:
+            if "error" in result:
+                print_out(f"{result['backend']:11s} : {result['error']}")
+                continue
+            print_out(f"{result['backend']:11s} : matches torch : {result['matches']} " \
+                f"(policy max error {result['policy_max_error']:.2e}, " \
+                f"value max error {result['value_max_error']:.2e})")
+            for size, positions_per_sec in result["positions_per_sec"].items():
+                print_out(f"    batch size {size:4d} : {positions_per_sec:.1f} positions/sec")
+
+    failed_backends = [result["backend"] for result in results if not result.get("matches", False)]
+    if failed_backends:
+        print_err(f"Parity check failed (tolerance {PARITY_TOLERANCE:.0e}) : " \
+            f"{', '.join(failed_backends)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    evaluator_benchmark_main() # pylint: disable=E1120
@@ -1,84 +1,75 @@
 """対局結果の補正処理。
 """
 # -*- coding:utf-8 -*-
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
 import glob
-import os
 import math
-import subprocess
-from typing import NoReturn
+import os
+from typing import List, NoReturn
 import click
+from board.constant import BOARD_SIZE
+from board.go_board import GoBoard
+from common.print_console import print_out
+from sgf.reader import SGFReader
 
-WORKER_THREAD = 4
+WORKER_PROCESS = 4
 
 
-def get_gnugo_judgment(filename: str, is_japanese_rule: bool) -> str:
-    """GNUGoの判定結果の文字列を取得する。
+def get_final_score(filename: str) -> float:
+    """棋譜の最終局面を地を数えて判定する。
 
     Args:
         filename (str): 読み込むSGFファイルパス。
-        is_japanese_rule (bool): 日本ルール化否かのフラグ。
 
     Returns:
-        str: GNUGoの判定結果の文字列。
+        float: 黒から見たコミを考慮した地の差。
     """
-    exec_commands = [
-        f"loadsgf {filename}",
-        "final_score",
-    ]
-
-    gnugo_command = [
-        "gnugo",
-        "--mode",
-        "gtp",
-        "--level",
-        "10"
-    ]
+    sgf = SGFReader(filename, BOARD_SIZE)
+    board = GoBoard(board_size=sgf.board_size, komi=sgf.komi)
 
-    if is_japanese_rule:
-        gnugo_command.append("--japanese-rule")
-    else:
-        gnugo_command.append("--chinese-rule")
+    for i in range(sgf.get_n_moves()):
+        board.put_stone(sgf.get_move_data(i), sgf.get_color(i))
 
-    with subprocess.Popen(gnugo_command, stdin=subprocess.PIPE, \
-        stdout=subprocess.PIPE, encoding='utf-8') as process:
+    return board.count_score() - board.get_komi()
 
-        process.stdin.write("\n".join(exec_commands))
-        process.stdin.flush()
-        process.stdout.flush()
-        process.stdin.close()
 
-        response = []
-        for line in process.stdout.readlines():
-            text = line.rstrip('\n')
-            if text:
-                response.append(text)
+def get_result_string(score: float) -> str:
+    """地の差から対局結果の文字列を生成する。
 
-    result = ' '.join(response)
-
-    # 0 : empty line
-    # 1 : color
-    # 2 : final score
-    responses = result.split('= ')
+    Args:
+        score (float): 黒から見たコミを考慮した地の差。
 
-    return responses[2]
+    Returns:
+        str: 対局結果の文字列。
+    """
+    if score > 0.1:
+        return f"B+{score:.1f}"
+    if score < -0.1:
+        return f"W+{-score:.1f}"
+    return "0"
 
 
-def adjust_by_gnugo_judgment(filename: str) -> NoReturn:
-    """_summary_
+def adjust_by_final_score(filename: str) -> bool:
+    """棋譜の対局結果を最終局面の判定結果で書き換える。中押し勝ちの棋譜は書き換えない。
 
     Args:
-        filename (str): _description_
+        filename (str): 読み込むSGFファイルパス。
+
+    Returns:
+        bool: 対局結果を書き換えたらTrue、そうでなければFalse。
     """
     with open(filename, encoding="utf-8") as in_file:
         sgf = in_file.read()
 
-    if "+R" in sgf:
-        return
+    if "+R" in sgf or "RE[" not in sgf:
+        return False
 
     current_result = sgf.split('RE[')[1].split(']')[0]
 
-    result = get_gnugo_judgment(filename, False)
+    result = get_result_string(get_final_score(filename))
+
+    if result == current_result:
+        return False
 
     current_result_string = "RE[" + current_result + "]"
     adjust_result_string = "RE[" + result + "]"
@@ -88,42 +79,54 @@ def adjust_by_gnugo_judgment(filename: str) -> NoReturn:
     with open(filename, encoding="utf-8", mode="w") as out_file:
         out_file.write(adjusted_sgf)
 
-def judgment_worker(kifu_list: str) -> NoReturn:
-    """_summary_
+    return True
+
+
+def judgment_worker(kifu_list: List[str]) -> int:
+    """棋譜ファイルの対局結果をまとめて補正する。
 
     Args:
-        kifu_list (str): _description_
+        kifu_list (List[str]): 補正するSGFファイルパスのリスト。
+
+    Returns:
+        int: 対局結果を書き換えた棋譜の数。
     """
-    for filename in kifu_list:
-        adjust_by_gnugo_judgment(filename)
+    return sum(adjust_by_final_score(filename) for filename in kifu_list)
 
 
 @click.command()
-@click.option('--kifu-dir', type=click.STRING, default='archive', help='')
-def adjust_result(kifu_dir: str) -> NoReturn:
-    """_summary_
+@click.option('--kifu-dir', type=click.STRING, default='archive', \
+    help="棋譜ファイルを保存したディレクトリ。デフォルトはarchive。")
+@click.option('--index', type=click.IntRange(min=0), default=None, \
+    help="補正する棋譜のサブディレクトリの番号。指定がない場合は最も大きい番号。")
+@click.option('--process', type=click.IntRange(min=1), default=WORKER_PROCESS, \
+    help=f"補正を実行するプロセス数。デフォルトは{WORKER_PROCESS}。")
+def adjust_result(kifu_dir: str, index: int, process: int) -> NoReturn:
+    """棋譜ディレクトリ内の全ての棋譜の対局結果を、最終局面の地を数えた結果で補正する。
 
     Args:
-        kifu_dir (str): _description_
+        kifu_dir (str): 棋譜ファイルを保存したディレクトリ。
+        index (int): 補正する棋譜のサブディレクトリの番号。
+        process (int): 補正を実行するプロセス数。
     """
-    kifu_dir_index_list = [int(os.path.split(dir_path)[-1]) \
-                           for dir_path in glob.glob(os.path.join(kifu_dir, '*'))]
-    newest_index = max(kifu_dir_index_list)
-
-    sgf_file_list = sorted(glob.glob(os.path.join(kifu_dir, str(newest_index), '*')))
+    if index is None:
+        kifu_dir_index_list = [int(os.path.split(dir_path)[-1]) \
+                               for dir_path in glob.glob(os.path.join(kifu_dir, '*')) \
+                               if os.path.split(dir_path)[-1].isdigit()]
+        index = max(kifu_dir_index_list)
+
+    sgf_file_list = sorted(glob.glob(os.path.join(kifu_dir, str(index), '*')))
+    if not sgf_file_list:
+        return
 
-    split_size = math.ceil(len(sgf_file_list) / WORKER_THREAD)
+    split_size = math.ceil(len(sgf_file_list) / process)
     split_file_lists = [sgf_file_list[idx:idx+split_size] \
         for idx in range(0, len(sgf_file_list), split_size)]
 
-    executor = ThreadPoolExecutor(max_workers=WORKER_THREAD)
-    futures = []
-    for file_list in split_file_lists:
-        future = executor.submit(judgment_worker, file_list)
-        futures.append(future)
+    with ProcessPoolExecutor(max_workers=process) as executor:
+        adjusted = sum(executor.map(judgment_worker, split_file_lists))
 
-    for future in futures:
-        future.result()
+    print_out(f"Adjusted {adjusted} / {len(sgf_file_list)} results in {os.path.join(kifu_dir, str(index))}")
 
 
 if __name__ == "__main__":
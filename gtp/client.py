@@ -1,5 +1,6 @@
 """Go Text Protocolクライアントの実装。
 """
+import json
 import os
 import random
 import sys
@@ -8,16 +9,18 @@ from typing import List, NoReturn
 from program import PROGRAM_NAME, VERSION, PROTOCOL_VERSION
 from board.constant import PASS, RESIGN
 from board.coordinate import Coordinate
-from board.go_board import GoBoard
+from board.factory import create_go_board
 from board.handicap import get_handicap_coordinates
 from board.stone import Stone
 from common.print_console import print_err, print_out
 from gtp.gogui import GoguiAnalyzeCommand, display_policy_distribution, \
     display_policy_score
+from mcts.root_parallel import RootParallelSearch
+from mcts.search_stats import SearchStatistics
 from mcts.time_manager import TimeControl, TimeManager
 from mcts.tree import MCTSTree
 from nn.policy_player import generate_move_from_policy
-from nn.utility import load_network
+from nn.evaluator import load_evaluator
 from sgf.reader import SGFReader
 from animation.animation import animate_mcts
 
@@ -32,7 +35,9 @@ class GtpClient: # pylint: disable=R0902,R0903
         use_gpu: bool, policy_move: bool, use_sequential_halving: bool, \
         komi: float, mode: TimeControl, visits: int, const_time: float, \
         time: float, batch_size: int, tree_size: int, cgos_mode: bool, \
-        animation_pv_wait: float, animation_move_wait:float): # pylint: disable=R0913
+        animation_pv_wait: float, animation_move_wait:float, board_backend: str, \
+        nn_cache_size: int, search_threads: int, search_processes: int, \
+        backend: str="torch"): # pylint: disable=R0913
         """Go Text Protocolクライアントの初期化をする。
 
         Args:
@@ -50,6 +55,14 @@ class GtpClient: # pylint: disable=R0902,R0903
             batch_size (int): 探索時のニューラルネットワークのミニバッチサイズ。
             tree_size (int): 探索木を構成するノードの最大数。
             cgos_mode (bool): 全ての石を打ち上げるまでパスしない設定フラグ。
+            board_backend (str): 碁盤の実装の名前。
+            nn_cache_size (int): ニューラルネットワークの評価結果のキャッシュサイズ(MB)。
+            search_threads (int): 探索スレッド数。
+            search_processes (int): ルート並列探索のプロセス数。
+            backend (str, optional): ニューラルネットワークの推論バックエンドの名前。デフォルトは"torch"。
+
+        Raises:
+            RuntimeError: モデルファイルはあるが、ニューラルネットワークの読み込みか探索の準備に失敗した。
         """
         self.gtp_commands = [
             "version",
@@ -77,9 +90,17 @@ class GtpClient: # pylint: disable=R0902,R0903
             "cgos-analyze",
             "cgos-genmove_analyze",
             "tamago-dump_tree",
+            "tamago-goto",
+            "tamago-inherited_visits",
+            "tamago-nn_cache_stats",
+            "tamago-search_stats",
         ]
         self.superko = superko
-        self.board = GoBoard(board_size=board_size, komi=komi, check_superko=superko)
+        self.board_backend = board_backend
+        self.board = create_go_board(board_size=board_size, komi=komi, check_superko=superko, \
+            backend=board_backend)
+        # 現局面より先の着手も含む、undoやtamago-gotoで辿る着手の系列
+        self.move_line = []
         self.coordinate = Coordinate(board_size=board_size)
         self.gogui_analyze_command = [
             GoguiAnalyzeCommand("cboard", "Display policy distribution (Black)", \
@@ -96,6 +117,7 @@ class GtpClient: # pylint: disable=R0902,R0903
         self.use_network = False
         self.animation_pv_wait = animation_pv_wait
         self.animation_move_wait = animation_move_wait
+        self.root_parallel = None
 
         if mode is TimeControl.CONSTANT_PLAYOUT or mode is TimeControl.STRICT_PLAYOUT:
             self.time_manager = TimeManager(mode=mode, constant_visits=visits)
@@ -105,14 +127,36 @@ class GtpClient: # pylint: disable=R0902,R0903
             self.time_manager = TimeManager(mode=mode, remaining_time=time)
 
         try:
-            self.network = load_network(model_file_path, use_gpu)
-            self.use_network = True
+            self.network = load_evaluator(model_file_path, use_gpu, backend)
             self.mcts = MCTSTree(network=self.network, batch_size=batch_size, \
-                tree_size=tree_size, cgos_mode=cgos_mode)
+                tree_size=tree_size, cgos_mode=cgos_mode, cache_size=nn_cache_size, \
+                search_threads=search_threads)
+            # Sequential Halvingの着手生成は常にself.mctsで探索するので、ワーカープロセスを起動しない
+            if search_processes > 1 and not use_sequential_halving:
+                self.root_parallel = RootParallelSearch(search_processes, {
+                    "model_file_path": model_file_path,
+                    "use_gpu": use_gpu,
+                    "tree_size": tree_size,
+                    "batch_size": batch_size,
+                    "cgos_mode": cgos_mode,
+                    "cache_size": nn_cache_size,
+                    "search_threads": search_threads,
+                    "backend": backend,
+                })
+            # 探索に必要なインスタンスが全て揃ってからニューラルネットワークを使う
+            self.use_network = True
         except FileNotFoundError:
             print_err(f"Model file {model_file_path} is not found")
-        except RuntimeError:
-            print_err(f"Failed to load {model_file_path}")
+
+
+    def _get_searcher(self):
+        """PUCTによる探索を実行するインスタンスを取得する。
+
+        Returns:
+            MCTSTree | RootParallelSearch: ルート並列探索が有効ならRootParallelSearch、
+                そうでなければMCTSTreeのインスタンス。
+        """
+        return self.mcts if self.root_parallel is None else self.root_parallel
 
 
     def _known_command(self, command: str) -> NoReturn:
@@ -169,24 +213,62 @@ class GtpClient: # pylint: disable=R0902,R0903
             print(f"illigal {color} {pos}")
 
         if pos.upper != "RESIGN":
-            self.board.put_stone(coord, play_color)
+            self._put_stone(coord, play_color)
 
         respond_success("")
 
+    def _put_stone(self, pos: int, color: Stone) -> NoReturn:
+        """石を置き、着手の系列を更新する。
+
+        Args:
+            pos (int): 着手する座標。
+            color (Stone): 着手する石の色。
+        """
+        del self.move_line[self.board.moves - 1:]
+        self.move_line.append((color, pos))
+        self.board.put_stone(pos, color)
+
     def _undo(self) -> NoReturn:
         """undoコマンドを処理する。
         """
-        history = self.board.get_move_history()
-        if not history:
+        if self.board.moves == 1:
             respond_failure("cannot undo")
             return
 
-        handicap_history = self.board.get_handicap_history()
+        self.board.undo_move()
+
+        respond_success("")
 
-        self.board.set_history(history[:-1], handicap_history)
+    def _goto(self, arg_list: List[str]) -> NoReturn:
+        """tamago-gotoコマンドを処理する。
+        着手の系列の指定した手数の局面にする。現局面から差分の着手だけを進めるか戻す。
+
+        Args:
+            arg_list (List[str]): コマンドの引数リスト（手数）。
+        """
+        if len(arg_list) < 1 or not arg_list[0].isdigit():
+            respond_failure("tamago-goto move_number")
+            return
+
+        self._move_to(int(arg_list[0]))
 
         respond_success("")
 
+    def _move_to(self, moves: int) -> NoReturn:
+        """着手の系列の指定した手数の局面にする。
+
+        Args:
+            moves (int): 手数（着手の系列の手数を超える値を指定した場合は最終局面となる）
+        """
+        moves = min(moves, len(self.move_line))
+
+        while self.board.moves - 1 > moves:
+            self.board.undo_move()
+
+        while self.board.moves - 1 < moves:
+            color, pos = self.move_line[self.board.moves - 1]
+            self.board.put_stone(pos, color)
+
     def _genmove(self, color: str) -> NoReturn:
         """genmoveコマンドを処理する。
         入力された手番で思考し、着手を生成する。
@@ -214,9 +296,14 @@ class GtpClient: # pylint: disable=R0902,R0903
                 if self.use_sequential_halving:
                     pos = self.mcts.generate_move_with_sequential_halving(self.board, \
                         genmove_color, self.time_manager, False)
+                    print_err(self.mcts.search_stats.get_summary())
                 else:
-                    pos = self.mcts.search_best_move(self.board, \
-                        genmove_color, self.time_manager, {})
+                    try:
+                        pos = self._get_searcher().search_best_move(self.board, \
+                            genmove_color, self.time_manager, {})
+                    except RuntimeError as error:
+                        respond_failure(f"genmove failed : {error}")
+                        return
         else:
             # ランダムに着手生成
             legal_pos = [pos for pos in self.board.onboard_pos \
@@ -227,7 +314,7 @@ class GtpClient: # pylint: disable=R0902,R0903
                 pos = PASS
 
         if pos != RESIGN:
-            self.board.put_stone(pos, genmove_color)
+            self._put_stone(pos, genmove_color)
 
         respond_success(self.coordinate.convert_to_gtp_format(pos))
 
@@ -239,7 +326,9 @@ class GtpClient: # pylint: disable=R0902,R0903
             size (str): 設定する碁盤のサイズ。
         """
         board_size = int(size)
-        self.board = GoBoard(board_size=board_size, check_superko=self.superko)
+        self.board = create_go_board(board_size=board_size, check_superko=self.superko, \
+            backend=self.board_backend)
+        self.move_line = []
         self.coordinate = Coordinate(board_size=board_size)
         self.time_manager.initialize()
         respond_success("")
@@ -249,6 +338,7 @@ class GtpClient: # pylint: disable=R0902,R0903
         盤面を初期化する。
         """
         self.board.clear()
+        self.move_line = []
         self.time_manager.initialize()
         respond_success("")
 
@@ -324,18 +414,16 @@ class GtpClient: # pylint: disable=R0902,R0903
 
     def _load_sgf_data(self, sgf_data: SGFReader, moves: int=9999) -> NoReturn:
         """SGFデータを読み込み、指定手番まで進めた局面にする。
+        指定手番より先の着手も着手の系列として保持し、tamago-gotoで辿れるようにする。
 
         Args:
             sgf_data (SGFReader): SGFデータ
             moves (int): 手数（SGFデータの手数を超える値を指定した場合は最終局面となる）
         """
-        moves = min(moves, sgf_data.get_n_moves())
         self.board.clear()
-
-        for i in range(moves):
-            pos = sgf_data.get_move_data(i)
-            color = sgf_data.get_color(i)
-            self.board.put_stone(pos, color)
+        self.move_line = [(sgf_data.get_color(i), sgf_data.get_move_data(i)) \
+            for i in range(sgf_data.get_n_moves())]
+        self._move_to(moves)
 
         respond_success("")
 
@@ -435,7 +523,10 @@ class GtpClient: # pylint: disable=R0902,R0903
             "interval" : interval,
             "ponder" : True
         }
-        self.mcts.ponder(self.board, to_move, analysis_query)
+        try:
+            self._get_searcher().ponder(self.board, to_move, analysis_query)
+        except RuntimeError as error:
+            print_err(f"{mode}-analyze failed : {error}")
 
     def _genmove_analyze(self, mode: str, arg_list: List[str]) -> NoReturn:
         """genmove_analyzeコマンド（lz-genmove_analyze, cgos-genmove_analyze）を実行する。
@@ -458,8 +549,12 @@ class GtpClient: # pylint: disable=R0902,R0903
                 "interval" : interval,
                 "ponder" : False
             }
-            pos = self.mcts.search_best_move(self.board, genmove_color, \
-                self.time_manager, analysis_query)
+            try:
+                pos = self._get_searcher().search_best_move(self.board, genmove_color, \
+                    self.time_manager, analysis_query)
+            except RuntimeError as error:
+                print_err(f"{mode}-genmove_analyze failed : {error}")
+                return
         else:
             # ランダムに着手生成
             legal_pos = [pos for pos in self.board.onboard_pos \
@@ -470,7 +565,7 @@ class GtpClient: # pylint: disable=R0902,R0903
                 pos = PASS
 
         if pos != RESIGN:
-            self.board.put_stone(pos, genmove_color)
+            self._put_stone(pos, genmove_color)
 
         print_out(f"play {self.coordinate.convert_to_gtp_format(pos)}\n")
 
@@ -513,6 +608,8 @@ class GtpClient: # pylint: disable=R0902,R0903
             elif input_gtp_command == "name":
                 _name()
             elif input_gtp_command == "quit":
+                if self.root_parallel is not None:
+                    self.root_parallel.close()
                 _quit()
             elif input_gtp_command == "known_command":
                 self._known_command(command_list[1])
@@ -547,7 +644,8 @@ class GtpClient: # pylint: disable=R0902,R0903
             elif input_gtp_command == "final_score":
                 respond_success("?")
             elif input_gtp_command == "showstring":
-                self.board.strings.display()
+                if self.board.strings is not None:
+                    self.board.strings.display()
                 respond_success("")
             elif input_gtp_command == "showpattern":
                 coordinate = Coordinate(self.board.get_board_size())
@@ -592,6 +690,23 @@ class GtpClient: # pylint: disable=R0902,R0903
                 self._genmove_analyze("cgos", command_list[1:])
             elif input_gtp_command == "tamago-dump_tree":
                 self._dump_tree()
+            elif input_gtp_command == "tamago-goto":
+                self._goto(command_list[1:])
+            elif input_gtp_command == "tamago-inherited_visits":
+                if self.use_network:
+                    respond_success(str(self._get_searcher().inherited_visits))
+                else:
+                    respond_success("0")
+            elif input_gtp_command == "tamago-nn_cache_stats":
+                if self.use_network:
+                    respond_success(self._get_searcher().get_cache_statistics())
+                else:
+                    respond_success("hits 0 misses 0 hit_rate 0.0000 entries 0 bytes 0")
+            elif input_gtp_command == "tamago-search_stats":
+                if self.use_network:
+                    respond_success(json.dumps(self._get_searcher().search_stats.get_statistics()))
+                else:
+                    respond_success(json.dumps(SearchStatistics().get_statistics()))
             elif input_gtp_command == "hash_record":
                 print_err(self.board.record.get_hash_history())
                 respond_success("")
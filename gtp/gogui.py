@@ -6,8 +6,8 @@ import torch
 
 from board.go_board import GoBoard
 from board.stone import Stone
+from nn.evaluator import Evaluator
 from nn.feature import generate_input_planes
-from nn.network.dual_net import DualNet
 
 class GoguiAnalyzeCommand: # pylint: disable=R0903
     """Gogui解析コマンドの基本情報クラス。
@@ -33,11 +33,11 @@ class GoguiAnalyzeCommand: # pylint: disable=R0903
         return self.type + "/" + self.label + "/" + self.command
 
 
-def display_policy_distribution(model: DualNet, board: GoBoard, color: Stone) -> str: # pylint: disable=R0914
+def display_policy_distribution(model: Evaluator, board: GoBoard, color: Stone) -> str: # pylint: disable=R0914
     """Policyを色付けして表示するための文字列を生成する。（GoGui解析コマンド）
 
     Args:
-        model (DualNet): Policyを出力するニューラルネットワーク。
+        model (Evaluator): Policyを出力するニューラルネットワークの推論バックエンド。
         board (GoBoard): 評価する局面情報。
         color (Stone): 評価する手番の色。
 
@@ -74,11 +74,11 @@ def display_policy_distribution(model: DualNet, board: GoBoard, color: Stone) ->
     return response
 
 
-def display_policy_score(model: DualNet, board: GoBoard, color: Stone) -> str:
+def display_policy_score(model: Evaluator, board: GoBoard, color: Stone) -> str:
     """Policyを数値で表示するための文字列を生成する。（GoGui解析コマンド）
 
     Args:
-        model (DualNet): Policyを出力するニューラルネットワーク。
+        model (Evaluator): Policyを出力するニューラルネットワークの推論バックエンド。
         board (GoBoard): 評価する局面情報。
         color (Stone): 評価する手番の色。
 
@@ -18,6 +18,12 @@ WEIGHT_DECAY = 1e-4
 
 EPOCHS = 15
 
+# 学習するニューラルネットワークの共通ブロック部の畳み込み層のフィルタ数
+NETWORK_FILTERS = 64
+
+# 学習するニューラルネットワークの残差ブロック数
+NETWORK_BLOCKS = 6
+
 # 学習率を変更するエポック数と変更後の学習率
 LEARNING_SCHEDULE = {
     "learning_rate": {
@@ -2,12 +2,16 @@
 """GTPクライアントのエントリーポイント。
 """
 import os
+import sys
 import click
 
 from gtp.client import GtpClient
 from board.constant import BOARD_SIZE
-from mcts.constant import NN_BATCH_SIZE, MCTS_TREE_SIZE
+from board.factory import BOARD_BACKENDS
+from common.print_console import print_err
+from mcts.constant import NN_BATCH_SIZE, MCTS_TREE_SIZE, NN_CACHE_SIZE
 from mcts.time_manager import TimeControl
+from nn.evaluator import EVALUATOR_BACKENDS
 
 default_model_path = os.path.join("model", "model.bin")
 
@@ -39,19 +43,40 @@ default_model_path = os.path.join("model", "model.bin")
 @click.option('--time', type=click.FLOAT, \
     help="持ち時間の指定。")
 @click.option('--batch-size', type=click.IntRange(min=1), default=NN_BATCH_SIZE, \
-    help=f"探索時のミニバッチサイズ。デフォルトはNN_BATCH_SIZE = {NN_BATCH_SIZE}。")
-@click.option('--tree-size', type=click.IntRange(min=1), default=MCTS_TREE_SIZE, \
-    help=f"探索木を構成するノードの最大数。デフォルトはMCTS_TREE_SIZE = {MCTS_TREE_SIZE}。")
+    help=f"探索時のミニバッチサイズ。--search-threadsが2以上の時は無視し、探索スレッド数を" \
+    f"ミニバッチサイズの上限にする。デフォルトはNN_BATCH_SIZE = {NN_BATCH_SIZE}。")
+@click.option('--tree-size', type=click.IntRange(min=2), default=MCTS_TREE_SIZE, \
+    help=f"探索木を構成するノードの最大数。上限に達すると探索回数の少ないノードを再利用する。" \
+    f"Sequential Halvingの探索は着手ごとに探索回数分のノードを使うので、上限を適用しない。" \
+    f"デフォルトはMCTS_TREE_SIZE = {MCTS_TREE_SIZE}。")
 @click.option('--cgos-mode', type=click.BOOL, default=False, \
     help="全ての石を打ち上げるまでパスしないモード設定。デフォルトはFalse。")
 @click.option('--animation-pv-wait', type=click.FLOAT, default=-1.0, \
     help="lz-analyzeの出力をMCTSアニメーションに差しかえて、系列ごとに指定秒停止。")
 @click.option('--animation-move-wait', type=click.FLOAT, default=-1.0, \
     help="lz-analyzeの出力をMCTSアニメーションに差しかえて、一手ごとに指定秒停止。")
+@click.option('--board-backend', type=click.Choice(list(BOARD_BACKENDS.keys())), default="list", \
+    help="碁盤の実装の指定。listは連を配列で管理する実装、bitboardは石の配置をビットボードで扱う実装。\
+    デフォルトはlist。")
+@click.option('--nn-cache-size', type=click.IntRange(min=0), default=NN_CACHE_SIZE, \
+    help=f"ニューラルネットワークの評価結果のキャッシュサイズ(MB)。0を指定するとキャッシュしない。\
+    デフォルトはNN_CACHE_SIZE = {NN_CACHE_SIZE}。")
+@click.option('--search-threads', type=click.IntRange(min=1), default=1, \
+    help="探索スレッド数。2以上を指定すると探索木を共有して並列に探索し、末端の局面は推論スレッドが\
+    まとめて評価する。Sequential Halvingの探索には適用しない。デフォルトは1。")
+@click.option('--search-processes', type=click.IntRange(min=1), default=1, \
+    help="ルート並列探索のプロセス数。2以上を指定すると各プロセスが独立した探索木で同じ局面を探索し、\
+    ルートの探索結果を合算して着手を決める。Sequential Halvingの探索には適用せず、\
+    --sequential-halvingがTrueの時はワーカープロセスを起動しない。デフォルトは1。")
+@click.option('--backend', type=click.Choice(EVALUATOR_BACKENDS), default="torch", \
+    help="ニューラルネットワークの推論バックエンド。torchはPyTorchのモジュールをそのまま実行し、\
+    torchscriptはTorchScriptにトレースして実行し、onnxはONNX RuntimeのCPU実行プロバイダで実行する(実験的)。\
+    int8はquantize_main.pyで量子化したモデルファイルをCPUで実行する。デフォルトはtorch。")
 def gtp_main(size: int, superko: bool, model:str, use_gpu: bool, sequential_halving: bool, \
     policy_move: bool, komi: float, visits: int, strict_visits: int, const_time: float, time: float, \
     batch_size: int, tree_size: int, cgos_mode: bool, \
-    animation_pv_wait: float, animation_move_wait: float):
+    animation_pv_wait: float, animation_move_wait: float, board_backend: str, nn_cache_size: int, \
+    search_threads: int, search_processes: int, backend: str):
     """GTPクライアントの起動。
 
     Args:
@@ -71,6 +96,11 @@ def gtp_main(size: int, superko: bool, model:str, use_gpu: bool, sequential_halv
         cgos_mode (bool): 全ての石を打ち上げるまでパスしないモード設定。デフォルトはFalse。
         animation_pv_wait (float): lz-analyzeの出力をMCTSアニメーションに差しかえて、系列ごとに指定秒停止。
         animation_move_wait (float): lz-analyzeの出力をMCTSアニメーションに差しかえて、一手ごとに指定秒停止。
+        board_backend (str): 碁盤の実装の名前。
+        nn_cache_size (int): ニューラルネットワークの評価結果のキャッシュサイズ(MB)。デフォルトはNN_CACHE_SIZE。
+        search_threads (int): 探索スレッド数。デフォルトは1。
+        search_processes (int): ルート並列探索のプロセス数。デフォルトは1。
+        backend (str): ニューラルネットワークの推論バックエンドの名前。デフォルトはtorch。
     """
     mode = TimeControl.CONSTANT_PLAYOUT
 
@@ -83,9 +113,16 @@ def gtp_main(size: int, superko: bool, model:str, use_gpu: bool, sequential_halv
         mode = TimeControl.TIME_CONTROL
 
     program_dir = os.path.dirname(__file__)
-    client = GtpClient(size, superko, os.path.join(program_dir, model), use_gpu, policy_move, \
-        sequential_halving, komi, mode, visits, const_time, time, batch_size, tree_size, \
-        cgos_mode, animation_pv_wait, animation_move_wait)
+    model_file_path = os.path.join(program_dir, model)
+    try:
+        client = GtpClient(size, superko, model_file_path, use_gpu, policy_move, \
+            sequential_halving, komi, mode, visits, const_time, time, batch_size, tree_size, \
+            cgos_mode, animation_pv_wait, animation_move_wait, board_backend, nn_cache_size, \
+            search_threads, search_processes, backend)
+    except RuntimeError as error:
+        # 指定したモデルを使えないままランダムな着手で対局しないように終了する
+        print_err(f"Failed to load {model_file_path} : {error}")
+        sys.exit(1)
     client.run()
 
 
@@ -1,34 +1,68 @@
 """ニューラルネットワーク計算用のキュー。
 """
-from typing import List, Tuple
+from typing import Hashable, List, Tuple
 import numpy as np
 
 
 class BatchQueue:
     """ミニバッチデータを保持するキュー。
+    入力データは確保済みの配列に直接書き込み、局面ごとに配列を生成しない。
     """
-    def __init__(self):
+    def __init__(self, capacity: int=1):
         """BatchQueueクラスのコンストラクタ。
+
+        Args:
+            capacity (int, optional): 入力データの配列に最初に確保する局面数。デフォルトは1。
         """
-        self.input_plane = []
+        self.capacity = max(capacity, 1)
+        self.input_plane = np.empty((0,), dtype=np.float32)
         self.path = []
         self.node_index = []
+        self.cache_key = []
+
+    def get_next_input_plane(self, input_shape: Tuple[int, ...]) -> np.ndarray:
+        """次にプッシュするデータの入力データの書き込み先を取得する。
+        確保済みの配列が足りなければ、積んだデータを保ったまま倍の大きさに拡張する。
+
+        Args:
+            input_shape (Tuple[int, ...]): 1局面分の入力データの形状。
 
-    def push(self, input_plane: np.array, path: List[Tuple[int, int]], node_index: int):
-        """キューにデータをプッシュする。
+        Returns:
+            np.ndarray: 入力データの書き込み先。確保済みの配列のビュー。
+        """
+        size = len(self.node_index)
+        if self.input_plane.shape[1:] != input_shape:
+            self.input_plane = np.empty((max(self.capacity, size + 1),) + input_shape, \
+                dtype=np.float32)
+        elif size == len(self.input_plane):
+            input_plane = np.empty((size * 2,) + input_shape, dtype=np.float32)
+            input_plane[:size] = self.input_plane
+            self.input_plane = input_plane
+        return self.input_plane[size]
+
+    def push(self, path: List[Tuple[int, int]], node_index: int, cache_key: Hashable=None):
+        """キューにデータをプッシュする。入力データは事前にget_next_input_planeの書き込み先に書き込んでおく。
 
         Args:
-            input_plane (np.array): ニューラルネットワークへの入力データ。
             path (List[Tuple[int, int]]): ルートから評価ノードへまでの経路。
             node_index (int): ニューラルネットワークが評価する局面に対応するノードのインデックス。
+            cache_key (Hashable, optional): 評価結果をキャッシュする時のキー。デフォルトはNone。
         """
-        self.input_plane.append(input_plane)
         self.path.append(path)
         self.node_index.append(node_index)
+        self.cache_key.append(cache_key)
+
+    def get_input_planes(self) -> np.ndarray:
+        """キューに積んだ入力データをまとめて取得する。
+
+        Returns:
+            np.ndarray: 入力データ。確保済みの配列のビューなので、次にclearするまでに使うこと。
+        """
+        return self.input_plane[:len(self.node_index)]
 
     def clear(self):
-        """キューのデータを全て削除する。
+        """キューのデータを全て削除する。確保済みの配列は再利用する。
         """
-        self.input_plane = []
         self.path = []
         self.node_index = []
+        self.cache_key = []
@@ -0,0 +1,130 @@
+"""複数の探索スレッドから受け付けた局面をまとめてニューラルネットワークで評価するスレッド。
+"""
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from typing import List, NoReturn, Tuple
+
+import numpy as np
+import torch
+
+from nn.evaluator import Evaluator
+from mcts.search_stats import SearchStatistics
+
+
+class BatchEvaluator:
+    """探索スレッドから評価要求を受け付け、ミニバッチにまとめて推論する推論スレッド。
+    ミニバッチが最大サイズに達するか、最初の要求から待ち時間の上限を過ぎたら推論する。
+    """
+    def __init__(self, network: Evaluator, max_batch_size: int, max_wait: float, \
+        search_stats: SearchStatistics=None):
+        """BatchEvaluatorクラスのコンストラクタ。
+
+        Args:
+            network (Evaluator): 使用するニューラルネットワークの推論バックエンド。
+            max_batch_size (int): ミニバッチの最大サイズ。
+            max_wait (float): 最初の要求からミニバッチを推論するまでの待ち時間の上限(秒)。
+            search_stats (SearchStatistics, optional): 推論の時間を記録する探索の統計情報。デフォルトはNone。
+        """
+        self.network = network
+        self.search_stats = search_stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.thread = None
+        self.num_batches = 0
+        self.num_evaluations = 0
+
+
+    def start(self) -> NoReturn:
+        """推論スレッドを開始する。
+        """
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+
+    def stop(self) -> NoReturn:
+        """受け付け済みの要求を全て推論してから推論スレッドを終了する。
+        """
+        if self.thread is None:
+            return
+        self.requests.put(None)
+        self.thread.join()
+        self.thread = None
+
+
+    def evaluate(self, input_plane: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """局面を評価する。推論スレッドが評価を終えるまで呼び出し元のスレッドを待たせる。
+
+        Args:
+            input_plane (np.ndarray): ニューラルネットワークへの入力データ。
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: PolicyとValueの評価結果。
+        """
+        future = Future()
+        self.requests.put((input_plane, future))
+        return future.result()
+
+
+    def get_average_batch_size(self) -> float:
+        """推論したミニバッチの平均サイズを取得する。
+
+        Returns:
+            float: ミニバッチの平均サイズ。推論していない場合は0.0。
+        """
+        return self.num_evaluations / self.num_batches if self.num_batches > 0 else 0.0
+
+
+    def _run(self) -> NoReturn:
+        """評価要求をミニバッチにまとめて推論する処理を、終了要求を受け取るまで繰り返す。
+        """
+        running = True
+        while running:
+            request = self.requests.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0.0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    running = False
+                    break
+                batch.append(request)
+            self._process_batch(batch)
+
+
+    def _process_batch(self, batch: List[Tuple[np.ndarray, Future]]) -> NoReturn:
+        """ミニバッチを推論して、それぞれの要求に評価結果を返す。
+
+        Args:
+            batch (List[Tuple[np.ndarray, Future]]): 入力データと評価結果の受け渡し先の組のリスト。
+        """
+        start_time = time.perf_counter()
+        try:
+            input_planes = torch.Tensor(np.array([input_plane for input_plane, _ in batch]))
+            # 勾配計算の有無の設定はスレッドごとなので、推論スレッドで改めて無効にする
+            with torch.no_grad():
+                raw_policy, value_data = self.network.inference(input_planes)
+            raw_policy = raw_policy.numpy()
+            value_data = value_data.numpy()
+        except Exception as exception: # pylint: disable=W0703
+            for _, future in batch:
+                future.set_exception(exception)
+            return
+
+        self.num_batches += 1
+        self.num_evaluations += len(batch)
+        if self.search_stats is not None:
+            self.search_stats.add_inference(time.perf_counter() - start_time, len(batch), \
+                self.max_batch_size)
+        for (_, future), policy, value_dist in zip(batch, raw_policy, value_data):
+            future.set_result((policy, value_dist))
@@ -39,3 +39,27 @@ RESIGN_THRESHOLD = 0.05
 
 # 探索木のサイズ
 MCTS_TREE_SIZE = 65536
+
+# 探索木のノードが上限に達した時に、探索回数の多い順に残すノードの割合
+TREE_RECYCLE_RATIO = 0.5
+
+# 探索木の子ノードの情報を格納する配列を確保する単位
+EDGE_CHUNK_SIZE = 65536
+
+# ニューラルネットワークの評価結果のキャッシュサイズ(MB)
+NN_CACHE_SIZE = 64
+
+# 並列探索時に推論スレッドが最初の評価要求からミニバッチを推論するまでの待ち時間の上限(秒)
+NN_BATCH_MAX_WAIT = 0.002
+
+# 並列探索時に解析情報の出力と探索の中断を確認する間隔(秒)
+SEARCH_POLL_INTERVAL = 0.01
+
+# ルート並列探索でルートのPolicyに混ぜるDirichletノイズの集中度パラメータ
+ROOT_DIRICHLET_ALPHA = 0.3
+
+# ルート並列探索でルートのPolicyに混ぜるDirichletノイズの割合
+ROOT_DIRICHLET_EPSILON = 0.25
+
+# ルート並列探索で解析情報の出力と探索の中断を確認する間隔(秒)
+ROOT_PARALLEL_ROUND_TIME = 0.1
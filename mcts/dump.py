@@ -159,7 +159,7 @@ def _get_updated_board_string(root_board: GoBoard, initial_move_color: Stone, gt
     coord = Coordinate(board_size=root_board.get_board_size())
     move_color = initial_move_color
     # 「board = copy.deepcopy(root_board)」は遅いので避ける。
-    board = GoBoard(board_size=root_board.get_board_size(), komi=root_board.get_komi(), check_superko=root_board.check_superko)
+    board = type(root_board)(board_size=root_board.get_board_size(), komi=root_board.get_komi(), check_superko=root_board.check_superko)
     copy_board(dst=board, src=root_board)
     for (k, move) in enumerate(gtp_moves_along_path):
         pos = coord.convert_from_gtp_format(move)
@@ -0,0 +1,110 @@
+"""探索木の子ノードの情報をまとめて格納する配列の管理。
+"""
+from typing import Dict, List, NoReturn, Tuple
+
+import numpy as np
+
+from board.constant import BOARD_SIZE
+from mcts.constant import EDGE_CHUNK_SIZE
+
+# 子ノードの情報ごとの配列の型
+EDGE_ARRAY_TYPES = {
+    "action": np.int32,
+    "children_index": np.int32,
+    "children_value": np.float64,
+    "children_visits": np.int32,
+    "children_policy": np.float64,
+    "children_virtual_loss": np.int32,
+    "children_value_sum": np.float64,
+    "noise": np.float64,
+    "policy_index": np.int32,
+}
+
+
+class EdgePool:
+    """探索木の全ての子ノードの情報を、情報ごとの大きな配列に格納するクラス。
+    各ノードは配列の連続した区間を割り当てられ、その区間のビューを通して子ノードの情報を読み書きする。
+    配列は必要になった時にEDGE_CHUNK_SIZE単位で確保する。
+    """
+    def __init__(self, chunk_size: int=EDGE_CHUNK_SIZE):
+        """EdgePoolクラスのコンストラクタ。
+
+        Args:
+            chunk_size (int, optional): 一度に確保する子ノードの数。デフォルトはEDGE_CHUNK_SIZE。
+        """
+        self.chunk_size = max(chunk_size, BOARD_SIZE ** 2 + 1)
+        self.chunks = []
+        self.chunk_index = 0
+        self.offset = 0
+
+
+    def _allocate_chunk(self) -> Dict[str, np.ndarray]:
+        """子ノードの情報を格納する配列を確保する。
+
+        Returns:
+            Dict[str, np.ndarray]: 子ノードの情報の名前と配列のマップ。
+        """
+        return {name: np.zeros(self.chunk_size, dtype=dtype) \
+            for name, dtype in EDGE_ARRAY_TYPES.items()}
+
+
+    def allocate(self, num_edges: int) -> Tuple[int, Dict[str, np.ndarray]]:
+        """指定した数の子ノードの情報を格納する区間を割り当てる。
+
+        Args:
+            num_edges (int): 子ノードの数。
+
+        Returns:
+            Tuple[int, Dict[str, np.ndarray]]: 割り当てた区間の先頭の通し番号と、
+                子ノードの情報の名前と割り当てた区間のビューのマップ。
+        """
+        if self.offset + num_edges > self.chunk_size:
+            self.chunk_index += 1
+            self.offset = 0
+        if self.chunk_index == len(self.chunks):
+            self.chunks.append(self._allocate_chunk())
+
+        chunk = self.chunks[self.chunk_index]
+        start, end = self.offset, self.offset + num_edges
+        self.offset = end
+        return self.chunk_index * self.chunk_size + start, \
+            {name: array[start:end] for name, array in chunk.items()}
+
+
+    def clear(self) -> NoReturn:
+        """全ての区間の割り当てを解除する。確保済みの配列は次の探索で再利用する。
+        """
+        self.chunk_index = 0
+        self.offset = 0
+
+
+    def get_chunk_arrays(self, name: str) -> List[np.ndarray]:
+        """確保済みの全てのチャンクの、指定した子ノードの情報の配列を取得する。
+        区間の先頭の通し番号をチャンクのサイズで割った商がチャンクの番号、余りがチャンク内の位置になる。
+
+        Args:
+            name (str): 子ノードの情報の名前。
+
+        Returns:
+            List[np.ndarray]: チャンクの番号順に並べた配列のリスト。
+        """
+        return [chunk[name] for chunk in self.chunks]
+
+
+    def get_num_edges(self) -> int:
+        """割り当て済みの子ノードの数を取得する。
+
+        Returns:
+            int: 割り当て済みの子ノードの数。チャンクの末尾の未使用の区間も含む。
+        """
+        return self.chunk_index * self.chunk_size + self.offset
+
+
+    def get_memory_size(self) -> int:
+        """確保済みの配列のメモリ使用量を取得する。
+
+        Returns:
+            int: メモリ使用量(バイト)。
+        """
+        return sum(array.nbytes for chunk in self.chunks for array in chunk.values())
+
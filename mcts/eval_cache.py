@@ -0,0 +1,161 @@
+"""ニューラルネットワークの評価結果のキャッシュ。
+"""
+from collections import OrderedDict
+import sys
+from typing import Dict, Hashable, NoReturn, Optional, Tuple
+
+import numpy as np
+
+from board.constant import PASS
+from board.go_board import GoBoard
+from board.stone import Stone
+
+# キャッシュのエントリごとのキー、タプル、辞書の要素などのメモリ使用量の見積もり(バイト)
+CACHE_ENTRY_OVERHEAD = 256
+
+
+def get_cache_key(board: GoBoard, color: Stone, use_logit: bool) -> Tuple[int, int, Stone, int, bool]:
+    """ニューラルネットワークの入力データを決める局面の情報からキャッシュのキーを生成する。
+
+    Args:
+        board (GoBoard): 局面情報。
+        color (Stone): 手番の色。
+        use_logit (bool): Policyの出力をlogitにするフラグ。
+
+    Returns:
+        Tuple[int, int, Stone, int, bool]: 碁盤の大きさ、石の配置のハッシュ値、手番の色、
+            直前の着手の座標(直前の着手がパスの時はPASS)、logitのフラグの組。
+    """
+    _, previous_move, _ = board.record.get(board.moves - 1)
+    if board.moves <= 1 and previous_move == PASS:
+        # 初手の局面は直前の着手の入力面が全て0になる
+        previous_move = -1
+    return (board.get_board_size(), board.positional_hash, color, previous_move, use_logit)
+
+
+class EvaluationCache:
+    """ニューラルネットワークの評価結果を、使用メモリの上限を超えたら最も長く参照されていない
+    ものから捨てるキャッシュ。
+    """
+    def __init__(self, max_bytes: int):
+        """EvaluationCacheクラスのコンストラクタ。
+
+        Args:
+            max_bytes (int): キャッシュのメモリ使用量の上限(バイト)。0以下の場合はキャッシュしない。
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key: Hashable) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """キャッシュから評価結果を取得する。
+
+        Args:
+            key (Hashable): キャッシュのキー。
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: PolicyとValueの評価結果。キャッシュにない場合はNone。
+        """
+        if self.max_bytes <= 0:
+            return None
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+
+    def put(self, key: Hashable, policy: np.ndarray, value: np.ndarray) -> NoReturn:
+        """評価結果をキャッシュに追加する。メモリ使用量が上限を超えた場合は古いものから捨てる。
+
+        Args:
+            key (Hashable): キャッシュのキー。
+            policy (np.ndarray): Policyの評価結果。
+            value (np.ndarray): Valueの評価結果。
+        """
+        if self.max_bytes <= 0 or key in self.entries:
+            return
+
+        entry = (policy.copy(), value.copy())
+        self.entries[key] = entry
+        self.used_bytes += _get_entry_size(entry)
+
+        while self.used_bytes > self.max_bytes:
+            _, old_entry = self.entries.popitem(last=False)
+            self.used_bytes -= _get_entry_size(old_entry)
+
+
+    def clear(self) -> NoReturn:
+        """キャッシュの評価結果と統計情報を全て破棄する。
+        """
+        self.entries.clear()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    def get_hit_rate(self) -> float:
+        """キャッシュのヒット率を取得する。
+
+        Returns:
+            float: ヒット率。参照がない場合は0.0。
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+    def get_counters(self) -> Dict[str, int]:
+        """キャッシュの統計情報の値を取得する。
+
+        Returns:
+            Dict[str, int]: ヒット数、ミス数、エントリ数、メモリ使用量の辞書。
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "bytes": self.used_bytes,
+        }
+
+
+    def get_statistics(self) -> str:
+        """キャッシュの統計情報の文字列を取得する。
+
+        Returns:
+            str: ヒット数、ミス数、ヒット率、エントリ数、メモリ使用量の文字列。
+        """
+        return format_cache_statistics(self.get_counters())
+
+
+def format_cache_statistics(counters: Dict[str, int]) -> str:
+    """キャッシュの統計情報の値を文字列にする。
+
+    Args:
+        counters (Dict[str, int]): EvaluationCache.get_countersで取得した統計情報の値。
+
+    Returns:
+        str: ヒット数、ミス数、ヒット率、エントリ数、メモリ使用量の文字列。
+    """
+    lookups = counters["hits"] + counters["misses"]
+    hit_rate = counters["hits"] / lookups if lookups > 0 else 0.0
+    return f"hits {counters['hits']} misses {counters['misses']} hit_rate {hit_rate:.4f} " \
+        f"entries {counters['entries']} bytes {counters['bytes']}"
+
+
+def _get_entry_size(entry: Tuple[np.ndarray, np.ndarray]) -> int:
+    """キャッシュのエントリのメモリ使用量を見積もる。
+
+    Args:
+        entry (Tuple[np.ndarray, np.ndarray]): PolicyとValueの評価結果。
+
+    Returns:
+        int: メモリ使用量の見積もり(バイト)。
+    """
+    return sum(sys.getsizeof(array) for array in entry) + CACHE_ENTRY_OVERHEAD
@@ -5,50 +5,66 @@ from typing import Any, Callable, Dict, List, NoReturn
 
 import numpy as np
 import torch
-from board.constant import BOARD_SIZE
 from board.go_board import GoBoard
 from common.print_console import print_err
 from mcts.constant import NOT_EXPANDED, C_VISIT, C_SCALE
-from mcts.pucb.pucb import calculate_pucb_value
+from mcts.edge_pool import EdgePool
+from mcts.pucb.pucb import select_max_pucb_index
 from nn.utility import apply_softmax
 
-MAX_ACTIONS = BOARD_SIZE ** 2 + 1
 PUCT_WEIGHT = 1.0
 
+# 未展開のノードが持つ子ノードの情報
+_EMPTY_INT_ARRAY = np.zeros(0, dtype=np.int32)
+_EMPTY_FLOAT_ARRAY = np.zeros(0, dtype=np.float64)
+
 class MCTSNode: # pylint: disable=R0902, R0904
     """モンテカルロ木探索で使うノード情報のクラス。
+    子ノードの情報はEdgePoolの配列のうち、展開時に割り当てられた区間のビューとして保持する。
+    edge_startはその区間の先頭の通し番号で、複数のノードの子ノードの情報をまとめて更新する時に使う。
     """
-    def __init__(self, num_actions: int=MAX_ACTIONS):
+    def __init__(self):
         """_MCTSNodeクラスのコンストラクタ
-
-        Args:
-            num_actions (int, optional): 候補手の最大数. Defaults to MAX_ACTIONS.
         """
         self.node_visits = 0
         self.virtual_loss = 0
         self.node_value_sum = 0.0
         self.raw_value = 0.0
-        self.action = [0] * num_actions
-        self.children_index = np.zeros(num_actions, dtype=np.int32)
-        self.children_value = np.zeros(num_actions, dtype=np.float64)
-        self.children_visits = np.zeros(num_actions, dtype=np.int32)
-        self.children_policy = np.zeros(num_actions, dtype=np.float64)
-        self.children_virtual_loss = np.zeros(num_actions, dtype=np.int32)
-        self.children_value_sum = np.zeros(num_actions, dtype=np.float64)
-        self.noise = np.zeros(num_actions, dtype=np.float64)
+        self.action = _EMPTY_INT_ARRAY
+        self.children_index = _EMPTY_INT_ARRAY
+        self.children_value = _EMPTY_FLOAT_ARRAY
+        self.children_visits = _EMPTY_INT_ARRAY
+        self.children_policy = _EMPTY_FLOAT_ARRAY
+        self.children_virtual_loss = _EMPTY_INT_ARRAY
+        self.children_value_sum = _EMPTY_FLOAT_ARRAY
+        self.noise = _EMPTY_FLOAT_ARRAY
+        self.policy_index = _EMPTY_INT_ARRAY
         self.num_children = 0
+        self.edge_start = 0
 
-    def expand(self, policy: Dict[int, float]) -> NoReturn:
+    def expand(self, policy: Dict[int, float], edge_pool: EdgePool) -> NoReturn:
         """ノードを展開し、初期化する。
 
         Args:
             policy (Dict[int, float]): 候補手に対応するPolicyのマップ。
+            edge_pool (EdgePool): 子ノードの情報を格納する配列。
         """
         self.node_visits = 0
         self.virtual_loss = 0
         self.node_value_sum = 0.0
         self.raw_value = 0.0
-        self.action = [0] * MAX_ACTIONS
+
+        self.edge_start, edges = edge_pool.allocate(len(policy))
+        self.action = edges["action"]
+        self.children_index = edges["children_index"]
+        self.children_value = edges["children_value"]
+        self.children_visits = edges["children_visits"]
+        self.children_policy = edges["children_policy"]
+        self.children_virtual_loss = edges["children_virtual_loss"]
+        self.children_value_sum = edges["children_value_sum"]
+        self.noise = edges["noise"]
+        self.policy_index = edges["policy_index"]
+
         self.children_index.fill(NOT_EXPANDED)
         self.children_value.fill(0.0)
         self.children_visits.fill(0)
@@ -59,18 +75,31 @@ class MCTSNode: # pylint: disable=R0902, R0904
         self.set_policy(policy)
 
 
+    def relocate(self, edge_pool: EdgePool, index_map: Dict[int, int]) -> NoReturn:
+        """子ノードの情報を別のEdgePoolにコピーし、遷移先のインデックスを付け替える。
+
+        Args:
+            edge_pool (EdgePool): コピー先の子ノードの情報を格納する配列。
+            index_map (Dict[int, int]): 移動前のノードのインデックスと移動後のインデックスのマップ。
+                マップにない子ノードは破棄して未展開に戻す。
+        """
+        self.edge_start, edges = edge_pool.allocate(self.num_children)
+        for name, array in edges.items():
+            array[:] = getattr(self, name)
+            setattr(self, name, array)
+        self.children_index[:] = [index_map.get(index, NOT_EXPANDED) \
+            for index in self.children_index.tolist()]
+
+
     def set_policy(self, policy_map: Dict[int, float]) -> NoReturn:
         """着手候補の座標とPolicyの値を設定する。
 
         Args:
             policy_map (Dict[int, float]): Keyが着手座標, Valueが着手のPolicy。
         """
-        index = 0
-        for pos, policy in policy_map.items():
-            self.action[index] = pos
-            self.children_policy[index] = policy
-            index += 1
-        self.num_children = index
+        self.action[:] = list(policy_map.keys())
+        self.children_policy[:] = list(policy_map.values())
+        self.num_children = len(policy_map)
 
 
     def add_virtual_loss(self, index) -> NoReturn:
@@ -83,14 +112,35 @@ class MCTSNode: # pylint: disable=R0902, R0904
         self.children_virtual_loss[index] += 1
 
 
-    def update_policy(self, policy: Dict[int, float]) -> NoReturn:
-        """Policyを更新する。
+    def remove_virtual_loss(self, index: int) -> NoReturn:
+        """評価できなかった探索で加算したVirtual Lossを取り除く。
 
         Args:
-            policy (Dict[int, float]): 候補手と対応するPolicyのマップ。
+            index (int): 取り除く対象の子ノードのインデックス。
         """
-        for i in range(self.num_children):
-            self.children_policy[i] = policy[self.action[i]]
+        self.virtual_loss -= 1
+        self.children_virtual_loss[index] -= 1
+
+
+    def set_policy_index(self, policy_index_map: np.ndarray) -> NoReturn:
+        """各子ノードの着手に対応する、ニューラルネットワークのPolicyの出力のインデックスを設定する。
+
+        Args:
+            policy_index_map (np.ndarray): 座標からPolicyの出力のインデックスへの変換テーブル。
+        """
+        np.take(policy_index_map, self.action, out=self.policy_index)
+
+
+    def update_policy(self, policy: np.ndarray, pass_offset: float=0.0) -> NoReturn:
+        """ニューラルネットワークのPolicyの出力から各子ノードのPolicyを取り出して更新する。
+
+        Args:
+            policy (np.ndarray): ニューラルネットワークのPolicyの出力。
+            pass_offset (float, optional): 末尾の子ノードであるパスのPolicyから引く値。デフォルトは0.0。
+        """
+        self.children_policy[:] = policy[self.policy_index]
+        if pass_offset != 0.0:
+            self.children_policy[self.num_children - 1] -= pass_offset
 
 
     def set_leaf_value(self, index: int, value: float) -> NoReturn:
@@ -138,6 +188,18 @@ class MCTSNode: # pylint: disable=R0902, R0904
         self.virtual_loss -= 1
 
 
+    def update_node_values(self, num_values: int, value_sum: float) -> NoReturn:
+        """ノードに複数のValueをまとめて加算し、その数だけVirtual Lossを元に戻す。
+
+        Args:
+            num_values (int): 加算するValueの個数。
+            value_sum (float): 加算するValueの合計値。
+        """
+        self.node_value_sum += value_sum
+        self.node_visits += num_values
+        self.virtual_loss -= num_values
+
+
     def select_next_action(self, cgos_mode: bool) -> int:
         """PUCB値に基づいて次の着手を選択する。
 
@@ -146,15 +208,10 @@ class MCTSNode: # pylint: disable=R0902, R0904
         Returns:
             int: 次の着手として選ぶ子ノードのインデックス。
         """
-        pucb_values = calculate_pucb_value(self.node_visits + self.virtual_loss, \
-            self.children_visits + self.children_virtual_loss, \
-            self.children_value_sum, self.children_policy + self.noise)
-
-        if cgos_mode:
-            # PASSのValueを0.1だけ引く
-            pucb_values[self.num_children - 1] -= 0.1
-
-        return np.argmax(pucb_values[:self.num_children])
+        # cgos_modeではPASSのValueを0.1だけ引く
+        return select_max_pucb_index(self.node_visits + self.virtual_loss, self.children_visits, \
+            self.children_virtual_loss, self.children_value_sum, self.children_policy, self.noise, \
+            0.1 if cgos_mode else 0.0)
 
 
     def get_num_children(self) -> int:
@@ -181,7 +238,7 @@ class MCTSNode: # pylint: disable=R0902, R0904
         Returns:
             int: 探索回数が最大の着手の座標。
         """
-        return self.action[self.get_best_move_index()]
+        return int(self.action[self.get_best_move_index()])
 
 
     def get_child_move(self, index: int) -> int:
@@ -193,7 +250,7 @@ class MCTSNode: # pylint: disable=R0902, R0904
         Returns:
             int: 着手の座標。
         """
-        return self.action[index]
+        return int(self.action[index])
 
 
     def get_child_index(self, index: int) -> int:
@@ -205,7 +262,7 @@ class MCTSNode: # pylint: disable=R0902, R0904
         Returns:
             int: 遷移先のインデックス。
         """
-        return self.children_index[index]
+        return int(self.children_index[index])
 
 
     def set_child_index(self, index: int, child_index: int) -> NoReturn:
@@ -275,7 +332,18 @@ class MCTSNode: # pylint: disable=R0902, R0904
     def set_gumbel_noise(self) -> NoReturn:
         """Gumbelノイズを設定する。
         """
-        self.noise = np.random.gumbel(loc=0.0, scale=1.0, size=self.noise.size)
+        self.noise[:] = np.random.gumbel(loc=0.0, scale=1.0, size=self.noise.size)
+
+
+    def set_dirichlet_noise(self, alpha: float, epsilon: float) -> NoReturn:
+        """PolicyにDirichletノイズを混ぜる補正値を設定する。
+
+        Args:
+            alpha (float): Dirichlet分布の集中度パラメータ。
+            epsilon (float): Policyに混ぜるノイズの割合。
+        """
+        noise = np.random.dirichlet([alpha] * self.num_children)
+        self.noise[:] = epsilon * (noise - self.children_policy)
 
 
     def calculate_completed_q_value(self, use_mixed_value :bool=True) -> np.array:
@@ -1,10 +1,17 @@
 """PUCB値の計算の実装。
 """
 import math
+from typing import Tuple
+
 import numpy as np
 
 from mcts.constant import PUCB_SECOND_TERM_WEIGHT
 
+# PUCB値の計算に使う作業用の配列。全てのノードで共有し、子ノードの数だけ先頭から使う。
+_visits_buffer = np.zeros(0, dtype=np.float64)
+_pucb_buffer = np.zeros(0, dtype=np.float64)
+
+
 def calculate_pucb_value(node_visits: int, children_visits: np.ndarray, \
     value_sum: np.ndarray, policy: np.ndarray) -> np.ndarray:
     """全ての手のPUCB値を計算する。
@@ -27,3 +34,59 @@ def calculate_pucb_value(node_visits: int, children_visits: np.ndarray, \
         * math.sqrt(node_visits + 1) / (children_visits + 1) \
 
     return exploration + exploitation
+
+
+def select_max_pucb_index(node_visits: int, children_visits: np.ndarray, \
+    children_virtual_loss: np.ndarray, value_sum: np.ndarray, policy: np.ndarray, \
+    noise: np.ndarray, pass_penalty: float=0.0) -> int: # pylint: disable=R0913
+    """PUCB値が最大の子ノードのインデックスを求める。calculate_pucb_valueと同じ値を、
+    作業用の配列を使い回して一時配列を確保せずに計算する。複数のスレッドから同時に呼び出してはいけない。
+
+    Args:
+        node_visits (int): Virtual Lossを含むノードの探索回数。
+        children_visits (np.ndarray): 子ノードの探索回数。
+        children_virtual_loss (np.ndarray): 子ノードのVirtual Loss。
+        value_sum (np.ndarray): 子ノードのValueの合計値。
+        policy (np.ndarray): 子ノードのPolicy。
+        noise (np.ndarray): 子ノードのPolicyに加えるノイズ。
+        pass_penalty (float, optional): 末尾のパスのPUCB値から引く値。デフォルトは0.0。
+
+    Returns:
+        int: PUCB値が最大の子ノードのインデックス。
+    """
+    visits, pucb = _get_buffers(children_visits.size)
+
+    np.add(children_visits, children_virtual_loss, out=visits)
+
+    # PUCTの第2項の算出
+    np.add(policy, noise, out=pucb)
+    pucb *= PUCB_SECOND_TERM_WEIGHT * math.sqrt(node_visits + 1)
+    visits += 1.0
+    pucb /= visits
+
+    # Valueの平均値の算出。未探索の子ノードはValueの合計値が0なので探索回数を1として割ってよい
+    visits -= 1.0
+    np.maximum(visits, 1.0, out=visits)
+    np.divide(value_sum, visits, out=visits)
+    pucb += visits
+
+    if pass_penalty != 0.0:
+        pucb[-1] -= pass_penalty
+
+    return int(pucb.argmax())
+
+
+def _get_buffers(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """作業用の配列を、足りなければ拡張して先頭から指定した長さだけ取得する。
+
+    Args:
+        size (int): 必要な長さ。
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 探索回数とPUCB値の作業用の配列。
+    """
+    global _visits_buffer, _pucb_buffer # pylint: disable=W0603
+    if _visits_buffer.size < size:
+        _visits_buffer = np.zeros(size, dtype=np.float64)
+        _pucb_buffer = np.zeros(size, dtype=np.float64)
+    return _visits_buffer[:size], _pucb_buffer[:size]
@@ -0,0 +1,344 @@
+"""複数のプロセスで独立した探索木を使って同じ局面を探索し、ルートの探索結果を合算するルート並列探索。
+"""
+import multiprocessing
+import multiprocessing.connection
+import os
+import select
+import sys
+from typing import Any, Dict, List, NoReturn, Tuple
+
+import numpy as np
+import torch
+
+from board.constant import PASS, RESIGN
+from board.coordinate import Coordinate
+from board.go_board import GoBoard
+from board.stone import Stone
+from common.print_console import print_err
+from nn.evaluator import load_evaluator
+from mcts.constant import RESIGN_THRESHOLD, ROOT_DIRICHLET_EPSILON, ROOT_PARALLEL_ROUND_TIME
+from mcts.edge_pool import EdgePool
+from mcts.eval_cache import format_cache_statistics
+from mcts.node import MCTSNode
+from mcts.search_stats import SearchStatistics
+from mcts.time_manager import TimeControl, TimeManager
+from mcts.tree import MCTSTree
+
+# 解析時に探索回数で探索を打ち切らないための探索回数
+PONDER_VISITS = 999999999
+
+# ワーカープロセスで局面を再現するための情報(碁盤の実装のクラス、碁盤の大きさ、コミ、超劫判定の有効化フラグ、
+# 着手履歴、置き石の座標)
+BoardState = Tuple[type, int, float, bool, List[Tuple[Stone, int, int]], List[int]]
+
+
+def _search_worker(connection: multiprocessing.connection.Connection, worker_id: int, seed: int, \
+    settings: Dict[str, Any]) -> NoReturn:
+    """ルート並列探索のワーカープロセスの処理。探索要求を受け取るたびに探索してルートの探索結果を返す。
+
+    Args:
+        connection (multiprocessing.connection.Connection): 親プロセスとの通信路。
+        worker_id (int): ワーカーの番号。0番のワーカーはルートにノイズを混ぜない。
+        seed (int): 乱数のシード値。
+        settings (Dict[str, Any]): ニューラルネットワークと探索木の設定。
+    """
+    np.random.seed(seed + worker_id)
+    torch.set_num_threads(settings["num_threads"])
+    network = load_evaluator(settings["model_file_path"], settings["use_gpu"], \
+        settings["backend"])
+    mcts = MCTSTree(network=network, tree_size=settings["tree_size"], \
+        batch_size=settings["batch_size"], cgos_mode=settings["cgos_mode"], \
+        cache_size=settings["cache_size"], search_threads=settings["search_threads"])
+    noise_epsilon = 0.0 if worker_id == 0 else ROOT_DIRICHLET_EPSILON
+    connection.send(True)
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            # 親プロセスが終了した
+            break
+        if request is None:
+            break
+        board_state, color, time_manager = request
+        board = _restore_board(board_state)
+        # 探索結果以外の出力は親プロセスがまとめて表示する
+        with open(os.devnull, mode="w", encoding="utf-8") as devnull:
+            stderr, sys.stderr = sys.stderr, devnull
+            try:
+                result = mcts.search_root(board, color, time_manager, noise_epsilon)
+            finally:
+                sys.stderr = stderr
+        connection.send(result)
+
+
+class RootParallelSearch:
+    """プロセスごとに独立した探索木で同じ局面を探索し、ルートの探索回数とValueの合計を
+    合算して着手を決めるクラス。
+    """
+    def __init__(self, num_processes: int, settings: Dict[str, Any]):
+        """RootParallelSearchクラスのコンストラクタ。ワーカープロセスを起動する。
+
+        Args:
+            num_processes (int): 探索プロセス数。
+            settings (Dict[str, Any]): ワーカープロセスのニューラルネットワークと探索木の設定。
+                model_file_path、use_gpu、tree_size、batch_size、cgos_mode、cache_size、search_threads、
+                backendを持つ辞書。
+
+        Raises:
+            RuntimeError: ニューラルネットワークを読み込む前にワーカープロセスが終了した。
+        """
+        context = multiprocessing.get_context("spawn")
+        settings = dict(settings, num_threads=max(1, (os.cpu_count() or 1) // num_processes))
+        seed = int(np.random.randint(0, 2 ** 31 - num_processes))
+        self.connections = []
+        self.workers = []
+        for worker_id in range(num_processes):
+            parent_connection, child_connection = context.Pipe()
+            worker = context.Process(target=_search_worker, \
+                args=(child_connection, worker_id, seed, settings), daemon=True)
+            worker.start()
+            # 子プロセス側の通信路を閉じておき、ワーカープロセスが終了した時にrecvがEOFErrorを送出するようにする
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.workers.append(worker)
+        # 全てのワーカープロセスがニューラルネットワークを読み込むまで待つ
+        for connection in self.connections:
+            _receive(connection)
+        self.edge_pool = EdgePool()
+        self.root = MCTSNode()
+        self.search_stats = SearchStatistics()
+        self.inherited_visits = 0
+        self.cache_counters = {"hits": 0, "misses": 0, "entries": 0, "bytes": 0}
+
+
+    def get_cache_statistics(self) -> str:
+        """全てのワーカープロセスの評価結果のキャッシュの統計情報を合算した文字列を取得する。
+
+        Returns:
+            str: ヒット数、ミス数、ヒット率、エントリ数、メモリ使用量の文字列。
+        """
+        return format_cache_statistics(self.cache_counters)
+
+
+    def close(self) -> NoReturn:
+        """ワーカープロセスを終了する。
+        """
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except OSError:
+                # 既に終了したワーカープロセスには送れない
+                pass
+            connection.close()
+        for worker in self.workers:
+            worker.join()
+        self.connections = []
+        self.workers = []
+
+
+    def search_best_move(self, board: GoBoard, color: Stone, time_manager: TimeManager, \
+        analysis_query: Dict[str, Any]) -> int:
+        """全てのワーカープロセスで探索を実行し、探索結果を合算して最善手を返す。
+
+        Args:
+            board (GoBoard): 評価する局面情報。
+            color (Stone): 評価する局面の手番の色。
+            time_manager (TimeManager): 思考時間管理インスタンス。
+            analysis_query (Dict[str, Any]): 解析情報。
+
+        Returns:
+            int: 着手する座標。
+        """
+        self.search_stats.reset()
+        time_manager.start_timer()
+        pv_lists, new_visits = self._search(board, color, time_manager)
+        self.search_stats.stop()
+        root = self.root
+
+        if root.get_num_children() == 1:
+            return PASS
+
+        next_move = root.get_best_move()
+        next_index = root.get_best_move_index()
+
+        if len(analysis_query) > 0:
+            sys.stdout.write(root.get_analysis(board, analysis_query.get("mode", "lz"), \
+                lambda node, coord: _convert_pv_lists(pv_lists, coord)))
+            sys.stdout.flush()
+
+        root.print_search_result(board, _convert_pv_lists(pv_lists, board.coordinate))
+        search_time = time_manager.calculate_consumption_time()
+
+        # 各プロセスは同じ探索回数の閾値で探索するので、1プロセスあたりの探索速度を記録する
+        time_manager.set_search_speed(new_visits // len(self.workers), search_time)
+        time_manager.substract_consumption_time(color, search_time)
+
+        print_err(f"{search_time:.2f} seconds, {new_visits / search_time:.2f} visits/s, " \
+            f"{len(self.workers)} search processes")
+        print_err(self.search_stats.get_summary())
+
+        if root.calculate_value_evaluation(next_index) < RESIGN_THRESHOLD:
+            return RESIGN
+
+        return next_move
+
+
+    def ponder(self, board: GoBoard, color: Stone, analysis_query: Dict[str, Any]) -> NoReturn:
+        """標準入力に次のコマンドが来るまで、全てのワーカープロセスで探索を繰り返して解析情報を出力する。
+
+        Args:
+            board (GoBoard): 局面情報。
+            color (Stone): 思考する手番の色。
+            analysis_query (Dict[str, Any]): 解析情報。
+        """
+        mode = analysis_query.get("mode", "lz")
+        interval = analysis_query.get("interval", 0)
+        round_time = interval if interval > 0 else ROOT_PARALLEL_ROUND_TIME
+
+        self.search_stats.reset()
+        inherited_visits = None
+        while True:
+            # 探索回数の閾値ではなく時間で区切って探索する
+            time_manager = TimeManager(mode=TimeControl.CONSTANT_TIME, constant_time=round_time)
+            time_manager.set_search_speed(PONDER_VISITS, round_time)
+            pv_lists, _ = self._search(board, color, time_manager)
+            # 2回目以降は直前の区切りの探索結果を引き継ぐので、最初の区切りで引き継いだ探索回数を残す
+            if inherited_visits is None:
+                inherited_visits = self.inherited_visits
+            self.inherited_visits = inherited_visits
+
+            if interval > 0 and self.root.node_visits > 0:
+                sys.stdout.write(self.root.get_analysis(board, mode, \
+                    lambda node, coord: _convert_pv_lists(pv_lists, coord)))
+                sys.stdout.flush()
+
+            rlist, _, _ = select.select([sys.stdin], [], [], 0)
+            if rlist or self.root.get_num_children() == 1:
+                break
+        self.search_stats.stop()
+
+        if interval == 0 and self.root.node_visits > 0:
+            sys.stdout.write(self.root.get_analysis(board, mode, \
+                lambda node, coord: _convert_pv_lists(pv_lists, coord)))
+            sys.stdout.flush()
+
+
+    def _search(self, board: GoBoard, color: Stone, time_manager: TimeManager) \
+        -> Tuple[Dict[int, List[int]], int]:
+        """全てのワーカープロセスに同じ局面を探索させ、ルートの探索結果を合算する。
+
+        Args:
+            board (GoBoard): 評価する局面情報。
+            color (Stone): 評価する局面の手番の色。
+            time_manager (TimeManager): 各ワーカープロセスに渡す思考時間管理インスタンス。
+
+        Returns:
+            Tuple[Dict[int, List[int]], int]: 着手ごとの最善応手系列と、今回の探索で実行した探索回数の合計。
+
+        Raises:
+            RuntimeError: 探索中にワーカープロセスが終了した。
+        """
+        request = (_get_board_state(board), color, time_manager)
+        for connection in self.connections:
+            try:
+                connection.send(request)
+            except OSError as error:
+                raise RuntimeError("Root parallel search worker is not running.") from error
+        results = [_receive(connection) for connection in self.connections]
+
+        base = results[0]
+        self.edge_pool.clear()
+        self.root.expand(dict(zip(base["action"].tolist(), base["children_policy"].tolist())), \
+            self.edge_pool)
+        root = self.root
+        root.children_value[:] = base["children_value"]
+        root.raw_value = base["raw_value"]
+
+        pv_lists = {}
+        pv_visits = {}
+        new_visits = 0
+        self.inherited_visits = 0
+        self.cache_counters = dict.fromkeys(self.cache_counters, 0)
+        for result in results:
+            order = {pos: i for i, pos in enumerate(result["action"].tolist())}
+            index = np.array([order[pos] for pos in root.action.tolist()], dtype=np.int32)
+            root.children_visits += result["children_visits"][index]
+            root.children_value_sum += result["children_value_sum"][index]
+            root.node_visits += result["node_visits"]
+            root.node_value_sum += result["node_value_sum"]
+            new_visits += result["new_visits"]
+            self.inherited_visits += result["inherited_visits"]
+            self.search_stats.merge(result["search_stats"])
+            # キャッシュの統計情報は各プロセスの累計値なので、最新の値を合算する
+            for key, value in result["cache_counters"].items():
+                self.cache_counters[key] += value
+            # 最善応手系列は、その着手を最も多く探索したプロセスのものを使う
+            for pos, pv_list in result["pv_lists"].items():
+                visits = result["children_visits"][order[pos]]
+                if visits > pv_visits.get(pos, 0):
+                    pv_visits[pos] = visits
+                    pv_lists[pos] = pv_list
+
+        return pv_lists, new_visits
+
+
+def _receive(connection: multiprocessing.connection.Connection) -> Any:
+    """ワーカープロセスからの応答を受け取る。
+
+    Args:
+        connection (multiprocessing.connection.Connection): ワーカープロセスとの通信路。
+
+    Returns:
+        Any: ワーカープロセスからの応答。
+
+    Raises:
+        RuntimeError: 応答を返す前にワーカープロセスが終了した。
+    """
+    try:
+        return connection.recv()
+    except EOFError as error:
+        raise RuntimeError("Root parallel search worker exited unexpectedly.") from error
+
+
+def _get_board_state(board: GoBoard) -> BoardState:
+    """ワーカープロセスに送るために、局面を再現するための情報を取得する。
+
+    Args:
+        board (GoBoard): 局面情報。
+
+    Returns:
+        BoardState: 局面を再現するための情報。
+    """
+    return type(board), board.get_board_size(), board.get_komi(), board.check_superko, \
+        board.get_move_history(), board.get_handicap_history()
+
+
+def _restore_board(board_state: BoardState) -> GoBoard:
+    """_get_board_stateで取得した情報から局面を再現する。
+
+    Args:
+        board_state (BoardState): 局面を再現するための情報。
+
+    Returns:
+        GoBoard: 再現した局面情報。
+    """
+    board_class, board_size, komi, check_superko, move_history, handicap_history = board_state
+    board = board_class(board_size=board_size, komi=komi, check_superko=check_superko)
+    board.set_history(move_history, handicap_history)
+    return board
+
+
+def _convert_pv_lists(pv_lists: Dict[int, List[int]], coordinate: Coordinate) \
+    -> Dict[str, List[str]]:
+    """着手ごとの最善応手系列の座標をGTP形式の文字列に変換する。
+
+    Args:
+        pv_lists (Dict[int, List[int]]): 着手の座標と最善応手系列の座標の辞書。
+        coordinate (Coordinate): 座標変換処理インスタンス。
+
+    Returns:
+        Dict[str, List[str]]: GTP形式の着手と最善応手系列の辞書。
+    """
+    return {coordinate.convert_to_gtp_format(pos): \
+        [coordinate.convert_to_gtp_format(pv) for pv in pv_list] for pos, pv_list in pv_lists.items()}
@@ -0,0 +1,127 @@
+"""探索の処理ごとの経過時間と実行回数の計測。
+"""
+import threading
+import time
+from typing import Any, Dict, NoReturn
+
+# 計測する探索の処理の名前
+# board_copy : 探索用の碁盤の複製
+# selection : PUCB値などによる着手の選択と木の降下(ノードの展開を除く)
+# expansion : ノードの展開(合法手の判定を含む)
+# input_planes : ニューラルネットワークの入力データの生成
+# inference : ニューラルネットワークの推論
+# backup : 評価結果のノードへの設定と探索結果の反映
+SEARCH_PHASES = ("board_copy", "selection", "expansion", "input_planes", "inference", "backup")
+
+
+class SearchStatistics:
+    """探索の処理ごとの経過時間と実行回数、ニューラルネットワークの推論回数とミニバッチの充填率を
+    集計するクラス。複数の探索スレッドから同時に記録できる。
+    """
+    def __init__(self):
+        """SearchStatisticsクラスのコンストラクタ。
+        """
+        self.lock = threading.Lock()
+        self.phase_time = {}
+        self.phase_count = {}
+        self.num_evaluations = 0
+        self.batch_capacity = 0
+        self.start_time = 0.0
+        self.search_time = 0.0
+        self.reset()
+
+
+    def reset(self) -> NoReturn:
+        """集計結果を破棄して計測を開始する。
+        """
+        with self.lock:
+            self.phase_time = {phase: 0.0 for phase in SEARCH_PHASES}
+            self.phase_count = {phase: 0 for phase in SEARCH_PHASES}
+            self.num_evaluations = 0
+            self.batch_capacity = 0
+            self.start_time = time.perf_counter()
+            self.search_time = 0.0
+
+
+    def stop(self) -> NoReturn:
+        """計測を終了して、計測開始からの経過時間を探索時間として記録する。
+        """
+        self.search_time = time.perf_counter() - self.start_time
+
+
+    def add_time(self, phase: str, elapsed: float) -> NoReturn:
+        """処理の経過時間を記録する。
+
+        Args:
+            phase (str): 処理の名前。
+            elapsed (float): 経過時間(秒)。
+        """
+        with self.lock:
+            self.phase_time[phase] += elapsed
+            self.phase_count[phase] += 1
+
+
+    def add_inference(self, elapsed: float, num_evaluations: int, batch_capacity: int) -> NoReturn:
+        """ニューラルネットワークの推論1回分の経過時間とミニバッチのサイズを記録する。
+
+        Args:
+            elapsed (float): 経過時間(秒)。
+            num_evaluations (int): 推論した局面数。
+            batch_capacity (int): ミニバッチの最大サイズ。
+        """
+        with self.lock:
+            self.phase_time["inference"] += elapsed
+            self.phase_count["inference"] += 1
+            self.num_evaluations += num_evaluations
+            self.batch_capacity += batch_capacity
+
+
+    def merge(self, statistics: Dict[str, Any]) -> NoReturn:
+        """別の探索の集計結果を加算する。探索時間は加算しない。
+
+        Args:
+            statistics (Dict[str, Any]): get_statisticsで取得した集計結果。
+        """
+        with self.lock:
+            for phase, result in statistics["phases"].items():
+                self.phase_time[phase] += result["time"]
+                self.phase_count[phase] += result["count"]
+            self.num_evaluations += statistics["nn_evaluations"]
+            self.batch_capacity += statistics["batch_capacity"]
+
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """集計結果を取得する。
+
+        Returns:
+            Dict[str, Any]: 探索時間、探索回数、処理ごとの経過時間と実行回数、推論回数、推論した局面数、
+                ミニバッチの充填率、1回の探索あたりの推論回数の辞書。
+        """
+        with self.lock:
+            num_visits = self.phase_count["selection"]
+            num_calls = self.phase_count["inference"]
+            return {
+                "search_time": self.search_time,
+                "visits": num_visits,
+                "phases": {phase: {"time": self.phase_time[phase], "count": self.phase_count[phase]} \
+                    for phase in SEARCH_PHASES},
+                "nn_calls": num_calls,
+                "nn_evaluations": self.num_evaluations,
+                "batch_capacity": self.batch_capacity,
+                "batch_fill_ratio": self.num_evaluations / self.batch_capacity \
+                    if self.batch_capacity > 0 else 0.0,
+                "nn_calls_per_visit": num_calls / num_visits if num_visits > 0 else 0.0,
+            }
+
+
+    def get_summary(self) -> str:
+        """集計結果を1行にまとめた文字列を取得する。
+
+        Returns:
+            str: 処理ごとの経過時間、ミニバッチの充填率、1回の探索あたりの推論回数の文字列。
+        """
+        statistics = self.get_statistics()
+        phases = ", ".join(f"{phase} {result['time']:.3f}s" \
+            for phase, result in statistics["phases"].items())
+        return f"{phases}, batch fill ratio {statistics['batch_fill_ratio']:.3f}, " \
+            f"{statistics['nn_calls_per_visit']:.3f} NN calls/visit"
@@ -1,9 +1,10 @@
 """モンテカルロ木探索の実装。
 """
 from typing import Any, Dict, List, NoReturn, Tuple, Callable
+import heapq
 import sys
 import select
-import copy
+import threading
 import time
 import numpy as np
 import torch
@@ -13,11 +14,17 @@ from board.coordinate import Coordinate
 from board.go_board import GoBoard, copy_board
 from board.stone import Stone
 from common.print_console import print_err
-from nn.feature import generate_input_planes
-from nn.network.dual_net import DualNet
+from nn.feature import generate_input_planes, get_input_plane_shape, get_policy_index_map, \
+    write_input_planes
+from nn.evaluator import Evaluator
 from mcts.batch_data import BatchQueue
+from mcts.batch_evaluator import BatchEvaluator
 from mcts.constant import NOT_EXPANDED, PLAYOUTS, NN_BATCH_SIZE, \
-    MAX_CONSIDERED_NODES, RESIGN_THRESHOLD, MCTS_TREE_SIZE
+    MAX_CONSIDERED_NODES, RESIGN_THRESHOLD, MCTS_TREE_SIZE, NN_CACHE_SIZE, NN_BATCH_MAX_WAIT, \
+    SEARCH_POLL_INTERVAL, ROOT_DIRICHLET_ALPHA, TREE_RECYCLE_RATIO
+from mcts.edge_pool import EdgePool
+from mcts.eval_cache import EvaluationCache, get_cache_key
+from mcts.search_stats import SearchStatistics
 from mcts.sequential_halving import get_candidates_and_visit_pairs
 from mcts.node import MCTSNode
 from mcts.time_manager import TimeControl, TimeManager
@@ -26,32 +33,167 @@ from mcts.dump import dump_mcts_to_json
 class MCTSTree: # pylint: disable=R0902
     """モンテカルロ木探索の実装クラス。
     """
-    def __init__(self, network: DualNet, tree_size: int=MCTS_TREE_SIZE, \
-        batch_size: int=NN_BATCH_SIZE, cgos_mode: bool=False):
+    def __init__(self, network: Evaluator, tree_size: int=MCTS_TREE_SIZE, \
+        batch_size: int=NN_BATCH_SIZE, cgos_mode: bool=False, cache_size: int=NN_CACHE_SIZE, \
+        search_threads: int=1): # pylint: disable=R0913
         """MCTSTreeクラスのコンストラクタ。
 
         Args:
-            network (DualNet): 使用するニューラルネットワーク。
-            tree_size (int, optional): 木を構成するノードの最大個数。デフォルトは65536。
+            network (Evaluator): 使用するニューラルネットワークの推論バックエンド。
+            tree_size (int, optional): 木を構成するノードの最大個数。上限に達すると探索回数の少ない
+                部分木を破棄してノードを再利用する。Sequential Halvingの探索には適用しない。デフォルトは65536。
             batch_size (int, optional): ニューラルネットワークの前向き伝搬処理のミニバッチサイズ。デフォルトはNN_BATCH_SIZE。
+            cache_size (int, optional): ニューラルネットワークの評価結果のキャッシュサイズ(MB)。デフォルトはNN_CACHE_SIZE。
+            search_threads (int, optional): 探索スレッド数。2以上の時は木を共有して並列に探索する。デフォルトは1。
         """
-        self.node = [MCTSNode() for i in range(tree_size)]
+        self.node = []
+        self.edge_pool = EdgePool()
+        self.spare_edge_pool = EdgePool()
+        self.tree_size = tree_size
         self.num_nodes = 0
         self.root = 0
         self.network = network
-        self.batch_queue = BatchQueue()
+        self.batch_queue = BatchQueue(batch_size)
         self.current_root = 0
         self.batch_size = batch_size
         self.cgos_mode = cgos_mode
         self.to_move = Stone.BLACK
+        self.root_position = None
+        self.inherited_visits = 0
+        self.eval_cache = EvaluationCache(cache_size * 1024 * 1024)
+        self.search_threads = search_threads
+        self.tree_lock = threading.Lock()
+        self.tree_condition = threading.Condition(self.tree_lock)
+        self.num_playouts = 0
+        self.active_playouts = 0
+        self.search_error = None
+        self.search_stats = SearchStatistics()
 
 
     def _initialize_search(self, board: GoBoard, color: Stone) -> NoReturn:
-        self.num_nodes = 0
-        self.current_root = self.expand_node(board, color)
-        input_plane = generate_input_planes(board, color, 0)
-        self.batch_queue.push(input_plane, [], self.current_root)
-        self.process_mini_batch(board)
+        """探索を開始する局面のノードをルートにする。前回の探索木にその局面のノードがあれば、
+        その部分木を再利用する。
+
+        Args:
+            board (GoBoard): 探索を開始する局面情報。
+            color (Stone): 探索を開始する局面の手番の色。
+        """
+        subtree_root = self._find_subtree_root(board, color)
+        if subtree_root == NOT_EXPANDED:
+            self.clear()
+            self.current_root = self.expand_node(board, color)
+            self._evaluate_or_push(board, color, [], self.current_root)
+            self.process_mini_batch(board)
+        else:
+            self._promote_subtree(subtree_root)
+        self.inherited_visits = self.node[self.current_root].node_visits
+        self.root_position = _get_position_key(board, color)
+
+
+    def _find_subtree_root(self, board: GoBoard, color: Stone) -> int:
+        """前回の探索のルートから指定した局面までの着手を辿り、対応するノードを探す。
+
+        Args:
+            board (GoBoard): 探索を開始する局面情報。
+            color (Stone): 探索を開始する局面の手番の色。
+
+        Returns:
+            int: 対応するノードのインデックス。見つからない場合はNOT_EXPANDED。
+        """
+        if self.root_position is None:
+            return NOT_EXPANDED
+
+        board_size, handicap, root_history, root_color = self.root_position
+        current_board_size, current_handicap, history, _ = _get_position_key(board, color)
+        if board_size != current_board_size or handicap != current_handicap \
+            or history[:len(root_history)] != root_history:
+            return NOT_EXPANDED
+
+        index = self.current_root
+        to_move = root_color
+        for move_color, pos in history[len(root_history):]:
+            if move_color != to_move:
+                return NOT_EXPANDED
+            node = self.node[index]
+            matched = np.flatnonzero(node.action == pos)
+            if matched.size == 0 or node.get_child_index(matched[0]) == NOT_EXPANDED:
+                return NOT_EXPANDED
+            index = node.get_child_index(matched[0])
+            to_move = Stone.get_opponent_color(to_move)
+
+        return index if to_move == color else NOT_EXPANDED
+
+
+    def _promote_subtree(self, index: int) -> NoReturn:
+        """指定したノードをルートとする部分木を残し、それ以外のノードを破棄する。
+        残したノードは幅優先順に木の先頭に詰め直す。
+
+        Args:
+            index (int): 新しいルートにするノードのインデックス。
+        """
+        if index == self.current_root:
+            # 木の全てのノードは現在のルートの部分木に含まれるので詰め直す必要はない
+            return
+
+        order = [index]
+        for node_index in order:
+            order.extend(child_index for child_index \
+                in self.node[node_index].children_index.tolist() if child_index != NOT_EXPANDED)
+
+        self._relocate_nodes(order)
+
+
+    def _recycle_nodes(self) -> NoReturn:
+        """探索木のノードが上限に達した時に、探索回数の多いノードから順にルートと繋がる部分木を残し、
+        残りの探索回数の少ない部分木を破棄してノードを再利用できるようにする。破棄した部分木への
+        子ノードの探索回数とValueの合計は親ノードに残り、再び辿った時に展開し直す。
+        """
+        num_kept = max(1, int(self.tree_size * TREE_RECYCLE_RATIO))
+        order = []
+        candidates = [(-self.node[self.current_root].node_visits, self.current_root)]
+        while candidates and len(order) < num_kept:
+            _, node_index = heapq.heappop(candidates)
+            order.append(node_index)
+            for child_index in self.node[node_index].children_index.tolist():
+                if child_index != NOT_EXPANDED:
+                    heapq.heappush(candidates, (-self.node[child_index].node_visits, child_index))
+
+        sys.stderr.write(f"Tree is full. Recycle {self.num_nodes - len(order)} nodes, " \
+            f"{len(order)} nodes kept\n")
+        self._relocate_nodes(order)
+
+
+    def _relocate_nodes(self, order: List[int]) -> NoReturn:
+        """指定したノードを残して木の先頭に詰め直し、それ以外のノードを破棄する。
+        先頭のノードを新しいルートにする。
+
+        Args:
+            order (List[int]): 残すノードのインデックスを詰め直す順に並べたリスト。
+        """
+        index_map = {node_index: i for i, node_index in enumerate(order)}
+
+        edge_pool = self.spare_edge_pool
+        edge_pool.clear()
+        for node_index in order:
+            self.node[node_index].relocate(edge_pool, index_map)
+
+        self.node = [self.node[node_index] for node_index in order] + \
+            [node for node_index, node in enumerate(self.node) if node_index not in index_map]
+        self.spare_edge_pool, self.edge_pool = self.edge_pool, edge_pool
+        self.num_nodes = len(order)
+        self.current_root = 0
+
+
+    def _ensure_tree_capacity(self, board: GoBoard) -> NoReturn:
+        """探索木のノードが上限に達していれば、キューに積んだ局面を評価してからノードを再利用する。
+        1回の探索で展開するノードは1つまでなので、探索ごとに呼び出せばノード数は上限を超えない。
+
+        Args:
+            board (GoBoard): ルートの局面情報。
+        """
+        if self.num_nodes >= self.tree_size:
+            self.process_mini_batch(board)
+            self._recycle_nodes()
 
 
     def search_best_move(self, board: GoBoard, color: Stone, time_manager: TimeManager, \
@@ -66,6 +208,7 @@ class MCTSTree: # pylint: disable=R0902
         Returns:
             int: 着手する座標。
         """
+        self.search_stats.reset()
         self._initialize_search(board, color)
 
         time_manager.start_timer()
@@ -81,6 +224,7 @@ class MCTSTree: # pylint: disable=R0902
 
         if len(self.batch_queue.node_index) > 0:
             self.process_mini_batch(board)
+        self.search_stats.stop()
 
         # 最善手を取得する
         next_move = root.get_best_move()
@@ -90,12 +234,16 @@ class MCTSTree: # pylint: disable=R0902
         pv_list = self.get_pv_lists(self.get_root(), board.coordinate)
         root.print_search_result(board, pv_list)
         search_time = time_manager.calculate_consumption_time()
-        po_per_sec = root.node_visits / search_time
+        new_visits = root.node_visits - self.inherited_visits
+        po_per_sec = new_visits / search_time
 
-        time_manager.set_search_speed(root.node_visits, search_time)
+        time_manager.set_search_speed(new_visits, search_time)
         time_manager.substract_consumption_time(color, search_time)
 
-        print_err(f"{search_time:.2f} seconds, {po_per_sec:.2f} visits/s")
+        print_err(f"{search_time:.2f} seconds, {po_per_sec:.2f} visits/s, " \
+            f"{self.inherited_visits} visits inherited, " \
+            f"NN cache hit rate {self.eval_cache.get_hit_rate():.3f}")
+        print_err(self.search_stats.get_summary())
 
         value = root.calculate_value_evaluation(next_index)
 
@@ -113,6 +261,7 @@ class MCTSTree: # pylint: disable=R0902
             color (Stone): 思考する手番の色。
             analysis_query (Dict): 解析情報。
         """
+        self.search_stats.reset()
         self._initialize_search(board, color)
 
         # 探索を実行する
@@ -125,6 +274,57 @@ class MCTSTree: # pylint: disable=R0902
 
         if len(self.batch_queue.node_index) > 0:
             self.process_mini_batch(board)
+        self.search_stats.stop()
+
+
+    def search_root(self, board: GoBoard, color: Stone, time_manager: TimeManager, \
+        noise_epsilon: float=0.0) -> Dict[str, Any]:
+        """ルート並列探索の1プロセス分の探索を実行して、ルートの探索結果を返す。
+
+        Args:
+            board (GoBoard): 評価する局面情報。
+            color (Stone): 評価する局面の手番の色。
+            time_manager (TimeManager): 思考時間管理インスタンス。
+            noise_epsilon (float, optional): 新しいルートのPolicyに混ぜるDirichletノイズの割合。デフォルトは0.0。
+
+        Returns:
+            Dict[str, Any]: ルートの子ノードの着手、探索回数、Valueの合計などの探索結果。
+        """
+        self.search_stats.reset()
+        new_root = self.root_position != _get_position_key(board, color)
+        self._initialize_search(board, color)
+        root = self.get_root()
+        if new_root and noise_epsilon > 0.0:
+            root.set_dirichlet_noise(ROOT_DIRICHLET_ALPHA, noise_epsilon)
+
+        time_manager.start_timer()
+        if root.get_num_children() > 1:
+            self.search(board, color, time_manager, {})
+            if len(self.batch_queue.node_index) > 0:
+                self.process_mini_batch(board)
+        self.search_stats.stop()
+
+        pv_lists = {}
+        for i in range(root.num_children):
+            if root.children_visits[i] > 0:
+                pv_lists[root.get_child_move(i)] = self.get_best_move_sequence( \
+                    [root.get_child_move(i)], root.get_child_index(i))
+
+        return {
+            "action": root.action.copy(),
+            "children_visits": root.children_visits.copy(),
+            "children_value_sum": root.children_value_sum.copy(),
+            "children_policy": root.children_policy.copy(),
+            "children_value": root.children_value.copy(),
+            "node_visits": root.node_visits,
+            "node_value_sum": root.node_value_sum,
+            "raw_value": root.raw_value,
+            "pv_lists": pv_lists,
+            "new_visits": root.node_visits - self.inherited_visits,
+            "inherited_visits": self.inherited_visits,
+            "search_stats": self.search_stats.get_statistics(),
+            "cache_counters": self.eval_cache.get_counters(),
+        }
 
 
     def search(self, board: GoBoard, color: Stone, time_manager: TimeManager, \
@@ -136,19 +336,27 @@ class MCTSTree: # pylint: disable=R0902
             time_manager (TimeManager): 思考時間管理インスタンス。
             analysis_query (Dict[str, Any]) : 解析情報。
         """
+        if self.search_threads > 1:
+            self._search_parallel(board, color, time_manager, analysis_query)
+            return
+
         self.to_move = color
         analysis_clock = time.time()
-        search_board = copy.deepcopy(board)
+        search_board = self._create_search_board(board)
 
         interval = analysis_query.get("interval", 0)
         threshold = time_manager.get_num_visits_threshold(color)
 
         for counter in range(threshold):
-            copy_board(dst=search_board,src=board)
+            self._ensure_tree_capacity(search_board)
             start_color = color
-            self.search_mcts(search_board, start_color, self.current_root, [])
+            path = []
+            self.search_mcts(search_board, start_color, self.current_root, path)
+            # 辿った経路の分だけ着手を戻してルートの局面に戻す
+            for _ in path:
+                search_board.undo_move()
             if time_manager.is_time_over() or \
-                time_manager.is_move_decided(self.get_root(), threshold):
+                time_manager.is_move_decided(self.get_root(), threshold + self.inherited_visits):
                 break
 
             if len(analysis_query) > 0:
@@ -174,6 +382,224 @@ class MCTSTree: # pylint: disable=R0902
             sys.stdout.flush()
 
 
+    def _search_parallel(self, board: GoBoard, color: Stone, time_manager: TimeManager, \
+        analysis_query: Dict[str, Any]) -> NoReturn: # pylint: disable=R0914
+        """複数の探索スレッドで1つの探索木を共有して探索を実行する。探索スレッドが末端に
+        到達した局面は推論スレッドがミニバッチにまとめて評価する。
+
+        Args:
+            board (GoBoard): 現在の局面情報。
+            color (Stone): 現局面の手番の色。
+            time_manager (TimeManager): 思考時間管理インスタンス。
+            analysis_query (Dict[str, Any]) : 解析情報。
+        """
+        self.to_move = color
+        analysis_clock = time.time()
+        interval = analysis_query.get("interval", 0)
+        threshold = time_manager.get_num_visits_threshold(color)
+
+        self.num_playouts = 0
+        self.active_playouts = 0
+        self.search_error = None
+        stop_event = threading.Event()
+        evaluator = BatchEvaluator(self.network, self.search_threads, NN_BATCH_MAX_WAIT, \
+            self.search_stats)
+        evaluator.start()
+        workers = [threading.Thread(target=self._search_worker, \
+            args=(self._create_search_board(board), color, evaluator, time_manager, threshold, stop_event), \
+            daemon=True) for _ in range(self.search_threads)]
+        for worker in workers:
+            worker.start()
+
+        while any(worker.is_alive() for worker in workers):
+            if stop_event.wait(SEARCH_POLL_INTERVAL):
+                break
+
+            if len(analysis_query) > 0:
+                elapsed = time.time() - analysis_clock
+                if interval > 0 and elapsed > interval:
+                    analysis_clock = time.time()
+                    mode = analysis_query.get("mode", "lz")
+                    with self.tree_lock:
+                        analysis = self.get_root().get_analysis(board, mode, self.get_pv_lists)
+                    sys.stdout.write(analysis)
+                    sys.stdout.flush()
+
+                if analysis_query.get("ponder", False):
+                    rlist, _, _ = select.select([sys.stdin], [], [], 0)
+                    if rlist:
+                        break
+
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+        evaluator.stop()
+        print_err(f"{self.search_threads} search threads, " \
+            f"average batch size {evaluator.get_average_batch_size():.2f}")
+        if self.search_error is not None:
+            raise RuntimeError(f"Search thread failed : {self.search_error}") \
+                from self.search_error
+
+        if len(analysis_query) > 0 and interval == 0:
+            mode = analysis_query.get("mode", "lz")
+            sys.stdout.write(self.get_root().get_analysis(board, mode, self.get_pv_lists))
+            sys.stdout.flush()
+
+
+    def _search_worker(self, board: GoBoard, color: Stone, evaluator: BatchEvaluator, \
+        time_manager: TimeManager, threshold: int, stop_event: threading.Event) -> NoReturn: # pylint: disable=R0913
+        """探索スレッドの処理。探索の終了条件を満たすまで、末端の局面の評価と探索結果の反映を繰り返す。
+
+        Args:
+            board (GoBoard): 探索スレッド専用のルートの局面情報。
+            color (Stone): ルートの局面の手番の色。
+            evaluator (BatchEvaluator): 局面を評価する推論スレッド。
+            time_manager (TimeManager): 思考時間管理インスタンス。
+            threshold (int): 探索回数の上限。
+            stop_event (threading.Event): 探索の終了を通知するイベント。
+        """
+        while not stop_event.is_set():
+            with self.tree_lock:
+                if not self._wait_for_tree_capacity(stop_event) \
+                    or self.num_playouts >= threshold:
+                    stop_event.set()
+                    break
+                self.num_playouts += 1
+                self.active_playouts += 1
+
+            path = []
+            backed_up = False
+            try:
+                node_index, leaf_color = self._select_leaf(board, color, self.current_root, path)
+
+                cache_key = get_cache_key(board, leaf_color, False)
+                with self.tree_lock:
+                    cached = self.eval_cache.get(cache_key)
+                if cached is None:
+                    start_time = time.perf_counter()
+                    input_plane = generate_input_planes(board, leaf_color, 0)
+                    self.search_stats.add_time("input_planes", time.perf_counter() - start_time)
+                    policy, value_dist = evaluator.evaluate(input_plane)
+                else:
+                    policy, value_dist = cached
+
+                with self.tree_lock:
+                    start_time = time.perf_counter()
+                    if cached is None:
+                        self.eval_cache.put(cache_key, policy, value_dist)
+                    self._set_evaluation(board, policy, value_dist, node_index, False)
+                    self._backup_path(path, get_value(value_dist))
+                    backed_up = True
+                    self.search_stats.add_time("backup", time.perf_counter() - start_time)
+                    if time_manager.is_time_over() or \
+                        time_manager.is_move_decided(self.get_root(), threshold + self.inherited_visits):
+                        stop_event.set()
+            except Exception as error: # pylint: disable=W0703
+                # 推論の失敗などは探索全体を止めて、メインスレッドで報告する
+                with self.tree_lock:
+                    if self.search_error is None:
+                        self.search_error = error
+                stop_event.set()
+            finally:
+                with self.tree_lock:
+                    # 探索結果に反映できなかった経路のVirtual Lossを取り除く
+                    if not backed_up:
+                        for index, child_index in path:
+                            self.node[index].remove_virtual_loss(child_index)
+                    self.active_playouts -= 1
+                    self.tree_condition.notify_all()
+
+                # 辿った経路の分だけ着手を戻してルートの局面に戻す
+                for _ in path:
+                    board.undo_move()
+
+
+    def _wait_for_tree_capacity(self, stop_event: threading.Event) -> bool:
+        """探索中の全てのスレッドがノードを1つずつ展開しても上限を超えなくなるまで待つ。
+        待っている間に探索中のスレッドがいなくなれば、ノードを再利用する。tree_lockを取得した状態で呼び出す。
+
+        Args:
+            stop_event (threading.Event): 探索の終了を通知するイベント。
+
+        Returns:
+            bool: 探索を続けられる場合はTrue、待っている間に探索の終了が通知された場合はFalse。
+        """
+        while self.num_nodes + self.active_playouts >= self.tree_size:
+            if stop_event.is_set():
+                return False
+            if self.active_playouts == 0:
+                self._recycle_nodes()
+            else:
+                self.tree_condition.wait(SEARCH_POLL_INTERVAL)
+        return True
+
+
+    def _select_leaf(self, board: GoBoard, color: Stone, current_index: int, \
+        path: List[Tuple[int, int]]) -> Tuple[int, Stone]:
+        """Virtual Lossを加えながらPUCB値最大の着手を選んで木を辿り、評価する末端のノードを求める。
+        木の参照と更新は他の探索スレッドと排他して実行する。
+
+        Args:
+            board (GoBoard): 探索を開始するノードの局面情報。末端の局面まで着手を進める。
+            color (Stone): 探索を開始するノードの局面の手番の色。
+            current_index (int): 探索を開始するノードのインデックス。
+            path (List[Tuple[int, int]]): 辿ったノードと子ノードのインデックスの組を追加するリスト。
+
+        Returns:
+            Tuple[int, Stone]: 末端のノードのインデックスと、末端の局面の手番の色。
+        """
+        selection_time = 0.0
+        while True:
+            start_time = time.perf_counter()
+            # 既に2回連続パスしている場合は新しいノードを展開しないようにする
+            _, previous_move, _ = board.record.get(board.moves - 1)
+            with self.tree_lock:
+                node = self.node[current_index]
+                next_index = node.select_next_action(self.cgos_mode)
+                next_move = node.get_child_move(next_index)
+                node.add_virtual_loss(next_index)
+                expand_threshold = 10000000 \
+                    if board.moves > 1 and previous_move == PASS and next_move == PASS else 1
+                is_leaf = node.children_visits[next_index] \
+                    + node.children_virtual_loss[next_index] < expand_threshold + 1
+
+            path.append((current_index, next_index))
+            board.put_stone(pos=next_move, color=color)
+            color = Stone.get_opponent_color(color)
+
+            with self.tree_lock:
+                child_index = node.get_child_index(next_index)
+                if child_index == NOT_EXPANDED:
+                    # ノードの展開はexpand_nodeで計測する
+                    selection_time += time.perf_counter() - start_time
+                    child_index = self.expand_node(board, color)
+                    start_time = time.perf_counter()
+                    node.set_child_index(next_index, child_index)
+                    # 再利用で破棄した部分木は展開し直したノードを評価する
+                    is_leaf = True
+
+            selection_time += time.perf_counter() - start_time
+            if is_leaf:
+                self.search_stats.add_time("selection", selection_time)
+                return child_index, color
+            current_index = child_index
+
+
+    def _create_search_board(self, board: GoBoard) -> GoBoard:
+        """探索用に碁盤を複製する。
+
+        Args:
+            board (GoBoard): 複製する局面情報。
+
+        Returns:
+            GoBoard: 複製した局面情報。
+        """
+        start_time = time.perf_counter()
+        search_board = create_search_board(board)
+        self.search_stats.add_time("board_copy", time.perf_counter() - start_time)
+        return search_board
+
+
     def search_with_callback(self, board: GoBoard, color: Stone, callback: Callable[[Tuple[int, int]], bool]) -> NoReturn:
         """探索を実行し、探索系列をコールバック関数へ渡す動作をくり返す。
 コールバック関数の戻り値が真になれば終了する。
@@ -185,11 +611,13 @@ class MCTSTree: # pylint: disable=R0902
         original_batch_size = self.batch_size
         self.batch_size = 1
         self._initialize_search(board, color)
-        search_board = copy.deepcopy(board)
+        search_board = self._create_search_board(board)
         while True:
+            self._ensure_tree_capacity(search_board)
             path = []
-            copy_board(dst=search_board, src=board)
             self.search_mcts(search_board, color, self.current_root, path)
+            for _ in path:
+                search_board.undo_move()
             finished = callback(path)
             if finished:
                 break
@@ -198,7 +626,7 @@ class MCTSTree: # pylint: disable=R0902
 
     def search_mcts(self, board: GoBoard, color: Stone, current_index: int, \
         path: List[Tuple[int, int]]) -> NoReturn:
-        """モンテカルロ木探索を実行する。
+        """モンテカルロ木探索を実行する。末端のノードまで辿り、その局面を評価するかミニバッチのキューに積む。
 
         Args:
             board (GoBoard): 現在の局面情報。
@@ -206,42 +634,19 @@ class MCTSTree: # pylint: disable=R0902
             current_index (int): 評価するノードのインデックス。
             path (List[Tuple[int, int]]): ルートからcurrent_indexに対応するノードに到達するまでの経路。
         """
+        child_index, color = self._select_leaf(board, color, current_index, path)
+        self._evaluate_or_push(board, color, path, child_index)
+        if len(self.batch_queue.node_index) >= self.batch_size:
+            self.process_mini_batch(board)
 
-        # UCB値最大の手を求める
-        next_index = self.node[current_index].select_next_action(self.cgos_mode)
-        next_move = self.node[current_index].get_child_move(next_index)
-
-        path.append((current_index, next_index))
-
-        # 1手進める
-        board.put_stone(pos=next_move, color=color)
-        color = Stone.get_opponent_color(color)
-
-        # Virtual Lossの加算
-        self.node[current_index].add_virtual_loss(next_index)
-
-        # 既に2回連続パスしている場合は新しいノードを展開しないようにする
-        expand_threshold = 1
-        if board.moves > 2:
-            _, pm1, _ = board.record.get(board.moves - 1)
-            _, pm2, _ = board.record.get(board.moves - 2)
-            if pm1 == PASS and pm2 == PASS:
-                expand_threshold = 10000000
 
-        if self.node[current_index].children_visits[next_index] \
-            + self.node[current_index].children_virtual_loss[next_index] < expand_threshold + 1:
-            if self.node[current_index].children_index[next_index] == NOT_EXPANDED:
-                child_index = self.expand_node(board, color)
-                self.node[current_index].set_child_index(next_index, child_index)
-            else:
-                child_index = self.node[current_index].get_child_index(next_index)
-            input_plane = generate_input_planes(board, color, 0)
-            self.batch_queue.push(input_plane, path, child_index)
-            if len(self.batch_queue.node_index) >= self.batch_size:
-                self.process_mini_batch(board)
-        else:
-            next_node_index = self.node[current_index].get_child_index(next_index)
-            self.search_mcts(board, color, next_node_index, path)
+    def clear(self) -> NoReturn:
+        """探索木の全てのノードを破棄する。ノードと子ノードの情報の配列は再利用する。
+        """
+        self.num_nodes = 0
+        self.edge_pool.clear()
+        self.root_position = None
+        self.inherited_visits = 0
 
 
     def expand_node(self, board: GoBoard, color: Stone) -> NoReturn:
@@ -251,68 +656,175 @@ class MCTSTree: # pylint: disable=R0902
             board (GoBoard): 現在の局面情報。
             color (Stone): 現在の手番の色。
         """
+        start_time = time.perf_counter()
         node_index = self.num_nodes
-        tree_size = len(self.node)
-        if node_index >= tree_size:
-            self.node.extend([MCTSNode() for i in range(tree_size)])
-            sys.stderr.write(f"Tree is full. Allocate new space {tree_size} -> {len(self.node)}\n")
-
-        candidates = board.get_all_legal_pos(color)
-        candidates = [candidate for candidate in candidates \
-            if (board.check_self_atari_stone(candidate, color) < 7) \
-                and not board.is_complete_eye(candidate, color)]
+        # PUCTの探索は探索ごとにノードを再利用するので、上限を超えるのは木を再利用しないSequential Halvingの探索のみ。
+        # Sequential Halvingの探索木は着手ごとに作り直し、1回の探索で展開するノードは1つまでなので、
+        # ノード数は探索回数で抑えられる。tree_sizeは変えずに、足りない分のノードだけ確保する
+        if node_index == len(self.node):
+            self.node.append(MCTSNode())
+
+        candidates = board.get_candidate_pos(color)
         candidates.append(PASS)
 
         policy = get_tentative_policy(candidates)
-        self.node[node_index].expand(policy)
+        self.node[node_index].expand(policy, self.edge_pool)
+        self.node[node_index].set_policy_index(get_policy_index_map(board.get_board_size()))
 
         self.num_nodes += 1
+        self.search_stats.add_time("expansion", time.perf_counter() - start_time)
         return node_index
 
 
-    def process_mini_batch(self, board: GoBoard, use_logit: bool=False): # pylint: disable=R0914
+    def _evaluate_or_push(self, board: GoBoard, color: Stone, path: List[Tuple[int, int]], \
+        node_index: int, use_logit: bool=False) -> NoReturn: # pylint: disable=R0913
+        """局面の評価結果がキャッシュにあれば探索結果に反映し、なければミニバッチのキューに積む。
+
+        Args:
+            board (GoBoard): 評価する局面情報。
+            color (Stone): 評価する局面の手番の色。
+            path (List[Tuple[int, int]]): ルートから評価するノードまでの経路。
+            node_index (int): 評価する局面に対応するノードのインデックス。
+            use_logit (bool): Policyの出力をlogitにするフラグ。
+        """
+        cache_key = get_cache_key(board, color, use_logit)
+        cached = self.eval_cache.get(cache_key)
+        start_time = time.perf_counter()
+        if cached is None:
+            input_plane = self.batch_queue.get_next_input_plane( \
+                get_input_plane_shape(board.get_board_size()))
+            write_input_planes(input_plane, board, color, 0)
+            self.batch_queue.push(path, node_index, cache_key)
+            self.search_stats.add_time("input_planes", time.perf_counter() - start_time)
+        else:
+            policy, value_dist = cached
+            self._set_evaluation(board, policy, value_dist, node_index, use_logit)
+            if path:
+                self._backup_path(path, get_value(value_dist))
+            self.search_stats.add_time("backup", time.perf_counter() - start_time)
+
+
+    def _set_evaluation(self, board: GoBoard, policy: np.ndarray, value_dist: np.ndarray, \
+        node_index: int, use_logit: bool) -> NoReturn: # pylint: disable=R0913
+        """ニューラルネットワークの評価結果をノードに設定する。
+
+        Args:
+            board (GoBoard): 碁盤の情報。
+            policy (np.ndarray): Policyの評価結果。
+            value_dist (np.ndarray): Valueの評価結果。
+            node_index (int): 評価した局面に対応するノードのインデックス。
+            use_logit (bool): Policyの出力をlogitにするフラグ。
+        """
+        # Sequential Halvingの探索では未展開のノードを評価することがある
+        if node_index == NOT_EXPANDED:
+            return
+        # 候補手の最後がパス
+        self.node[node_index].update_policy(policy, 0.5 if use_logit else 0.0)
+        self.node[node_index].set_raw_value(float(value_dist[1] * 0.5 + value_dist[2]))
+
+
+    def _backup_path(self, path: List[Tuple[int, int]], value: float) -> NoReturn:
+        """1つの経路の末端のValueを経路上のノードに反映してVirtual Lossを元に戻す。
+        経路が1つだけの時は_backupで配列を作るよりも速い。
+
+        Args:
+            path (List[Tuple[int, int]]): ルートから末端までの(ノード、子ノード)のインデックスの組の経路。
+            value (float): 末端の局面の直前に着手した手番から見たValue。
+        """
+        leaf_index, leaf_child_index = path[-1]
+        self.node[leaf_index].set_leaf_value(leaf_child_index, value)
+
+        for index, child_index in reversed(path):
+            self.node[index].update_child_value(child_index, value)
+            self.node[index].update_node_value(value)
+            value = 1.0 - value
+
+
+    def _backup(self, paths: List[List[Tuple[int, int]]], values: List[float]) -> NoReturn:
+        """複数の経路の末端のValueを、経路上の全てのノードにまとめて反映してVirtual Lossを元に戻す。
+        経路を1つの配列に平坦化して、子ノードの情報の配列をnp.add.atで更新する。
+
+        Args:
+            paths (List[List[Tuple[int, int]]]): ルートから末端までの(ノード、子ノード)のインデックスの組の経路のリスト。
+            values (List[float]): 各経路の末端の局面の直前に着手した手番から見たValue。
+        """
+        lengths = np.array([len(path) for path in paths], dtype=np.int64)
+        ends = np.cumsum(lengths)
+        num_steps = int(ends[-1])
+        node_index = np.array([index for path in paths for index, _ in path], dtype=np.int64)
+        edge_index = np.array([self.node[index].edge_start + child_index \
+            for path in paths for index, child_index in path], dtype=np.int64)
+
+        # 末端から数えて奇数手目の着手は相手の手番なのでValueを反転する
+        leaf_value = np.repeat(np.asarray(values, dtype=np.float64), lengths)
+        steps_from_leaf = np.repeat(ends, lengths) - 1 - np.arange(num_steps)
+        value = np.where(steps_from_leaf % 2 == 0, leaf_value, 1.0 - leaf_value)
+
+        chunk_size = self.edge_pool.chunk_size
+        chunk_index, offset = np.divmod(edge_index, chunk_size)
+        value_sums = self.edge_pool.get_chunk_arrays("children_value_sum")
+        visits = self.edge_pool.get_chunk_arrays("children_visits")
+        virtual_losses = self.edge_pool.get_chunk_arrays("children_virtual_loss")
+        leaf_values = self.edge_pool.get_chunk_arrays("children_value")
+        is_leaf = steps_from_leaf == 0
+        for chunk in np.unique(chunk_index).tolist():
+            in_chunk = chunk_index == chunk
+            chunk_offset = offset[in_chunk]
+            np.add.at(value_sums[chunk], chunk_offset, value[in_chunk])
+            np.add.at(visits[chunk], chunk_offset, 1)
+            np.add.at(virtual_losses[chunk], chunk_offset, -1)
+            leaf_in_chunk = in_chunk & is_leaf
+            leaf_values[chunk][offset[leaf_in_chunk]] = value[leaf_in_chunk]
+
+        unique_nodes, inverse = np.unique(node_index, return_inverse=True)
+        num_values = np.bincount(inverse)
+        node_value_sums = np.bincount(inverse, weights=value)
+        for index, count, value_sum in zip(unique_nodes.tolist(), num_values.tolist(), \
+            node_value_sums.tolist()):
+            self.node[index].update_node_values(count, value_sum)
+
+
+    def process_mini_batch(self, board: GoBoard, use_logit: bool=False):
         """ニューラルネットワークの入力をミニバッチ処理して、計算結果を探索結果に反映する。
 
         Args:
             board (GoBoard): 碁盤の情報。
             use_logit (bool): Policyの出力をlogitにするフラグ
         """
-        input_planes = torch.Tensor(np.array(self.batch_queue.input_plane))
+        if not self.batch_queue.node_index:
+            return
+
+        start_time = time.perf_counter()
+        input_planes = torch.from_numpy(self.batch_queue.get_input_planes())
 
         if use_logit:
             raw_policy, value_data = self.network.inference_with_policy_logits(input_planes)
         else:
             raw_policy, value_data = self.network.inference(input_planes)
 
-        policy_data = []
-        for policy in raw_policy:
-            policy_dict = {}
-            for i, pos in enumerate(board.onboard_pos):
-                policy_dict[pos] = policy[i]
-            policy_dict[PASS] = policy[board.get_board_size() ** 2]
-            if use_logit:
-                policy_dict[PASS] -= 0.5
-            policy_data.append(policy_dict)
-
-        for policy, value_dist, path, node_index in zip(policy_data, \
-            value_data, self.batch_queue.path, self.batch_queue.node_index):
-            self.node[node_index].update_policy(policy)
-            self.node[node_index].set_raw_value(value_dist[1] * 0.5 + value_dist[2])
-
+        raw_policy = raw_policy.detach().numpy()
+        value_data = value_data.detach().numpy()
+        self.search_stats.add_inference(time.perf_counter() - start_time, len(raw_policy), \
+            max(self.batch_size, len(raw_policy)))
+
+        start_time = time.perf_counter()
+        paths = []
+        values = []
+        for policy, value_dist, path, node_index, cache_key in zip(raw_policy, value_data, \
+            self.batch_queue.path, self.batch_queue.node_index, self.batch_queue.cache_key):
+            self.eval_cache.put(cache_key, policy, value_dist)
+            self._set_evaluation(board, policy, value_dist, node_index, use_logit)
             if path:
-                value = value_dist[0] + value_dist[1] * 0.5
-
-                reverse_path = list(reversed(path))
-                leaf = reverse_path[0]
-
-                self.node[leaf[0]].set_leaf_value(leaf[1], value)
+                paths.append(path)
+                values.append(get_value(value_dist))
 
-                for index, child_index in reverse_path:
-                    self.node[index].update_child_value(child_index, value)
-                    self.node[index].update_node_value(value)
-                    value = 1.0 - value
+        if len(paths) == 1:
+            self._backup_path(paths[0], values[0])
+        elif paths:
+            self._backup(paths, values)
 
         self.batch_queue.clear()
+        self.search_stats.add_time("backup", time.perf_counter() - start_time)
 
 
     def generate_move_with_sequential_halving(self, board: GoBoard, color: Stone, \
@@ -327,11 +839,11 @@ class MCTSTree: # pylint: disable=R0902
         Returns:
             int: 生成した着手の座標。
         """
-        self.num_nodes = 0
+        self.search_stats.reset()
+        self.clear()
         start_time = time.time()
         self.current_root = self.expand_node(board, color)
-        input_plane = generate_input_planes(board, color)
-        self.batch_queue.push(input_plane, [], self.current_root)
+        self._evaluate_or_push(board, color, [], self.current_root, use_logit=True)
         self.process_mini_batch(board, use_logit=True)
         self.node[self.current_root].set_gumbel_noise()
 
@@ -347,6 +859,7 @@ class MCTSTree: # pylint: disable=R0902
         value = root.calculate_value_evaluation(next_index)
 
         search_time = time.time() - start_time
+        self.search_stats.stop()
 
         time_manager.set_search_speed(self.node[self.current_root].node_visits, search_time)
 
@@ -365,7 +878,7 @@ class MCTSTree: # pylint: disable=R0902
             color (Stone): 評価したい局面の手番の色。
             threshold (int): 実行する探索回数。
         """
-        search_board = copy.deepcopy(board)
+        search_board = self._create_search_board(board)
 
         num_root_children = self.node[self.current_root].get_num_children()
         base_num_considered = num_root_children \
@@ -375,12 +888,14 @@ class MCTSTree: # pylint: disable=R0902
         for num_considered, max_count in search_control_dict.items():
             for count_threshold in range(max_count):
                 for _ in range(num_considered):
-                    copy_board(search_board, board)
                     start_color = color
+                    path = []
 
                     # 探索する
                     self.search_sequential_halving(search_board, start_color, \
-                        self.current_root, [], count_threshold + 1)
+                        self.current_root, path, count_threshold + 1)
+                    for _ in path:
+                        search_board.undo_move()
             self.process_mini_batch(search_board, use_logit=True)
 
 
@@ -395,31 +910,49 @@ class MCTSTree: # pylint: disable=R0902
             path (List[Tuple[int, int]]): 現在のノードまで辿ったインデックス。
             count_threshold (int): 評価対象とする探索回数の閾値。
         """
-        current_node = self.node[current_index]
-        if current_index == self.current_root:
-            next_index = current_node.select_move_by_sequential_halving_for_root(count_threshold)
-        else:
-            next_index = current_node.select_move_by_sequential_halving_for_node()
-        next_move = self.node[current_index].get_child_move(next_index)
+        selection_time = 0.0
+        while True:
+            start_time = time.perf_counter()
+            current_node = self.node[current_index]
+            if current_index == self.current_root:
+                next_index = current_node.select_move_by_sequential_halving_for_root(count_threshold)
+            else:
+                next_index = current_node.select_move_by_sequential_halving_for_node()
+            next_move = current_node.get_child_move(next_index)
 
-        path.append((current_index, next_index))
+            path.append((current_index, next_index))
 
-        board.put_stone(pos=next_move, color=color)
-        color = Stone.get_opponent_color(color)
+            board.put_stone(pos=next_move, color=color)
+            color = Stone.get_opponent_color(color)
 
-        self.node[current_index].add_virtual_loss(next_index)
+            current_node.add_virtual_loss(next_index)
 
-        if self.node[current_index].children_visits[next_index] < 1:
-            # ニューラルネットワークの計算
-            input_plane = generate_input_planes(board, color)
-            next_node_index = self.node[current_index].get_child_index(next_index)
-            self.batch_queue.push(input_plane, path, next_node_index)
-        else:
-            if self.node[current_index].get_child_index(next_index) == NOT_EXPANDED:
+            if current_node.children_visits[next_index] < 1:
+                selection_time += time.perf_counter() - start_time
+                self.search_stats.add_time("selection", selection_time)
+                # ニューラルネットワークの計算
+                next_node_index = current_node.get_child_index(next_index)
+                self._evaluate_or_push(board, color, path, next_node_index, use_logit=True)
+                return
+
+            if current_node.get_child_index(next_index) == NOT_EXPANDED:
+                # ノードの展開はexpand_nodeで計測する
+                selection_time += time.perf_counter() - start_time
                 child_index = self.expand_node(board, color)
-                self.node[current_index].set_child_index(next_index, child_index)
-            next_node_index = self.node[current_index].get_child_index(next_index)
-            self.search_sequential_halving(board, color, next_node_index, path, count_threshold)
+                start_time = time.perf_counter()
+                current_node.set_child_index(next_index, child_index)
+            current_index = current_node.get_child_index(next_index)
+            selection_time += time.perf_counter() - start_time
+
+
+    def get_cache_statistics(self) -> str:
+        """ニューラルネットワークの評価結果のキャッシュの統計情報の文字列を取得する。
+
+        Returns:
+            str: ヒット数、ミス数、ヒット率、エントリ数、メモリ使用量の文字列。
+        """
+        return self.eval_cache.get_statistics()
+
 
     def get_root(self) -> MCTSNode:
         """木のルートを返す。
@@ -458,6 +991,9 @@ class MCTSTree: # pylint: disable=R0902
         Returns:
             List[str]: 最善応手系列。
         """
+        if index == NOT_EXPANDED:
+            return pv_list
+
         node = self.node[index]
 
         if node.node_visits == 0:
@@ -506,6 +1042,34 @@ class MCTSTree: # pylint: disable=R0902
         return state
 
 
+def _get_position_key(board: GoBoard, color: Stone) -> Tuple[int, List[int], \
+    List[Tuple[Stone, int]], Stone]:
+    """探索木を再利用できるか判定するための局面の情報を取得する。
+
+    Args:
+        board (GoBoard): 局面情報。
+        color (Stone): 手番の色。
+
+    Returns:
+        Tuple[int, List[int], List[Tuple[Stone, int]], Stone]: 碁盤の大きさ、置き石の座標、
+            (着手の色、座標)の着手履歴、手番の色。
+    """
+    history = [(move_color, pos) for move_color, pos, _ in board.get_move_history()]
+    return board.get_board_size(), board.get_handicap_history(), history, color
+
+
+def get_value(value_dist: np.ndarray) -> float:
+    """Valueの評価結果から、評価した局面の直前に着手した手番から見たValueを求める。
+
+    Args:
+        value_dist (np.ndarray): Valueの評価結果(負け、引き分け、勝ちの確率)。
+
+    Returns:
+        float: 評価した局面の直前に着手した手番から見たValue。
+    """
+    return float(value_dist[0] + value_dist[1] * 0.5)
+
+
 def get_tentative_policy(candidates: List[int]) -> Dict[int, float]:
     """ニューラルネットワークの計算が行われるまでに使用するPolicyを取得する。
 
@@ -517,3 +1081,20 @@ def get_tentative_policy(candidates: List[int]) -> Dict[int, float]:
     """
     score = np.random.dirichlet(alpha=np.ones(len(candidates)))
     return dict(zip(candidates, score))
+
+
+def create_search_board(board: GoBoard) -> GoBoard:
+    """探索で使用する盤面を生成する。探索中は着手を戻してルートの局面に戻す。
+
+    Args:
+        board (GoBoard): ルートの局面情報。
+
+    Returns:
+        GoBoard: ルートの局面をコピーした盤面。
+    """
+    # copy.deepcopyは着手を戻すための履歴まで複製するので避ける。
+    # 碁盤の実装はルートの局面と同じものを使う。
+    search_board = type(board)(board_size=board.get_board_size(), komi=board.get_komi(), \
+        check_superko=board.check_superko)
+    copy_board(dst=search_board, src=board)
+    return search_board
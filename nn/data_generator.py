@@ -7,8 +7,8 @@ from typing import List, NoReturn
 import numpy as np
 from board.go_board import GoBoard
 from board.stone import Stone
-from nn.feature import generate_input_planes, generate_target_data, \
-    generate_rl_target_data
+from nn.feature import generate_input_planes, generate_input_planes_symmetry8, \
+    generate_target_data_symmetry8, generate_rl_target_data
 from sgf.reader import SGFReader
 from learning_param import BATCH_SIZE, DATA_SET_SIZE
 
@@ -58,10 +58,9 @@ def generate_supervised_learning_data(program_dir: str, kifu_dir: str, \
         value_label = sgf.get_value_label()
 
         for pos in sgf.get_moves():
-            for sym in range(8):
-                input_data.append(generate_input_planes(board, color, sym))
-                policy_data.append(generate_target_data(board, pos, sym))
-                value_data.append(value_label)
+            input_data.extend(generate_input_planes_symmetry8(board, color))
+            policy_data.extend(generate_target_data_symmetry8(board, pos))
+            value_data.extend([value_label] * 8)
             board.put_stone(pos, color)
             color = Stone.get_opponent_color(color)
             # Valueのラベルを入れ替える。
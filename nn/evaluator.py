@@ -0,0 +1,245 @@
+"""ニューラルネットワークの推論を実行するバックエンドの実装。
+"""
+import inspect
+import io
+from typing import Tuple
+import warnings
+
+import torch
+
+from nn.network.dual_net import DualNet
+from nn.quantization import load_quantized_network
+from nn.utility import load_network
+
+# 浮動小数点数のモデルから生成できる推論バックエンドの名前
+FLOAT_EVALUATOR_BACKENDS = ("torch", "torchscript", "onnx")
+
+# 使用できる推論バックエンドの名前。int8はquantize_main.pyで生成した量子化済みモデルを使う
+EVALUATOR_BACKENDS = FLOAT_EVALUATOR_BACKENDS + ("int8",)
+
+
+def get_example_input(network: DualNet, batch_size: int=1) -> torch.Tensor:
+    """モデルの変換に使う入力特徴テンソルを生成する。
+
+    Args:
+        network (DualNet): 変換するニューラルネットワーク。
+        batch_size (int, optional): ミニバッチサイズ。デフォルトは1。
+
+    Returns:
+        torch.Tensor: 全ての要素が0の入力特徴テンソル。
+    """
+    return torch.zeros(batch_size, network.input_planes, network.board_size, network.board_size)
+
+
+class Evaluator:
+    """ニューラルネットワークの推論を実行するクラスの基底クラス。
+    派生クラスはforward_logitsでPolicyとValueのlogitを計算する。
+    """
+    def __init__(self, device: torch.device):
+        """Evaluatorクラスのコンストラクタ。
+
+        Args:
+            device (torch.device): 推論を実行するデバイス。
+        """
+        self.device = device
+        self.softmax = torch.nn.Softmax(dim=1)
+
+
+    def forward_logits(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: CPU上のPolicyとValueのlogit。
+        """
+        raise NotImplementedError
+
+
+    def inference(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Policy, Valueの推論結果。
+        """
+        policy, value = self.forward_logits(input_plane)
+        return self.softmax(policy), self.softmax(value)
+
+
+    def inference_with_policy_logits(self, input_plane: torch.Tensor) \
+        -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。Gumbel AlphaZero用の探索に使う。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: PolicyのlogitとValueの推論結果。
+        """
+        policy, value = self.forward_logits(input_plane)
+        return policy, self.softmax(value)
+
+
+class TorchEvaluator(Evaluator):
+    """PyTorchのモジュールをそのまま実行するEvaluator。
+    """
+    def __init__(self, network: DualNet):
+        """TorchEvaluatorクラスのコンストラクタ。
+
+        Args:
+            network (DualNet): 推論するニューラルネットワーク。
+        """
+        super().__init__(network.device)
+        self.network = network
+
+
+    def forward_logits(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: CPU上のPolicyとValueのlogit。
+        """
+        policy, value = self.network(input_plane.to(self.device))
+        return policy.cpu(), value.cpu()
+
+
+class TorchScriptEvaluator(Evaluator):
+    """ニューラルネットワークをTorchScriptにトレースして実行するEvaluator。
+    Pythonのモジュール呼び出しのオーバーヘッドがなくなる。
+    """
+    def __init__(self, network: DualNet):
+        """TorchScriptEvaluatorクラスのコンストラクタ。ニューラルネットワークをトレースする。
+
+        Args:
+            network (DualNet): 推論するニューラルネットワーク。
+        """
+        super().__init__(network.device)
+        # 新しいPyTorchではTorchScriptが非推奨の警告を出すが、推論には影響しない
+        with torch.no_grad(), warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            module = torch.jit.trace(network.eval(), get_example_input(network).to(self.device))
+            self.module = torch.jit.freeze(module)
+
+
+    def forward_logits(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: CPU上のPolicyとValueのlogit。
+        """
+        policy, value = self.module(input_plane.to(self.device))
+        return policy.cpu(), value.cpu()
+
+
+class OnnxEvaluator(Evaluator):
+    """ニューラルネットワークをONNX形式に変換し、ONNX RuntimeのCPU実行プロバイダで実行するEvaluator。
+    onnxruntimeパッケージが必要。
+    """
+    def __init__(self, network: DualNet):
+        """OnnxEvaluatorクラスのコンストラクタ。ニューラルネットワークをONNX形式に変換して読み込む。
+
+        Args:
+            network (DualNet): 推論するニューラルネットワーク。
+        """
+        super().__init__(network.device)
+        try:
+            import onnxruntime # pylint: disable=C0415
+        except ImportError as error:
+            raise RuntimeError("onnx backend requires onnxruntime package.") from error
+
+        self.device = torch.device("cpu")
+        model = io.BytesIO()
+        # TorchScriptベースの変換器を使う。新しいPyTorchはデフォルトの変換器が異なる
+        export_options = {"dynamo": False} \
+            if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        with torch.no_grad():
+            torch.onnx.export(network.eval().to(self.device), (get_example_input(network),), model, \
+                input_names=["input"], output_names=["policy", "value"], \
+                dynamic_axes={"input": {0: "batch"}, "policy": {0: "batch"}, "value": {0: "batch"}}, \
+                **export_options)
+        self.session = onnxruntime.InferenceSession(model.getvalue(), \
+            providers=["CPUExecutionProvider"])
+
+
+    def forward_logits(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: CPU上のPolicyとValueのlogit。
+        """
+        policy, value = self.session.run(None, {"input": input_plane.cpu().numpy()})
+        return torch.from_numpy(policy), torch.from_numpy(value)
+
+
+class QuantizedEvaluator(Evaluator):
+    """quantize_main.pyでint8に量子化したモジュールをCPUで実行するEvaluator。
+    """
+    def __init__(self, module: torch.jit.ScriptModule):
+        """QuantizedEvaluatorクラスのコンストラクタ。
+
+        Args:
+            module (torch.jit.ScriptModule): 量子化済みのモジュール。
+        """
+        super().__init__(torch.device("cpu"))
+        self.module = module
+
+
+    def forward_logits(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """前向き伝搬処理を実行する。
+
+        Args:
+            input_plane (torch.Tensor): 入力特徴テンソル。
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: CPU上のPolicyとValueのlogit。
+        """
+        return self.module(input_plane.cpu())
+
+
+def create_evaluator(network: DualNet, backend: str="torch") -> Evaluator:
+    """推論バックエンドを指定してEvaluatorを生成する。
+
+    Args:
+        network (DualNet): 推論するニューラルネットワーク。
+        backend (str, optional): 推論バックエンドの名前。"torch"、"torchscript"、"onnx"のいずれか。
+            デフォルトは"torch"。
+
+    Returns:
+        Evaluator: 指定したバックエンドのEvaluator。
+    """
+    if backend == "torch":
+        return TorchEvaluator(network)
+    if backend == "torchscript":
+        return TorchScriptEvaluator(network)
+    if backend == "onnx":
+        return OnnxEvaluator(network)
+    raise ValueError(f"Unknown inference backend : {backend}")
+
+
+def load_evaluator(model_file_path: str, use_gpu: bool, backend: str="torch") -> Evaluator:
+    """モデルファイルを読み込み、指定した推論バックエンドのEvaluatorを生成する。
+
+    Args:
+        model_file_path (str): モデルファイルパス。int8の場合は量子化済みのモデルファイルパス。
+        use_gpu (bool): GPU使用フラグ。int8の場合は無視してCPUで推論する。
+        backend (str, optional): 推論バックエンドの名前。デフォルトは"torch"。
+
+    Returns:
+        Evaluator: 指定したバックエンドのEvaluator。
+    """
+    if backend == "int8":
+        return QuantizedEvaluator(load_quantized_network(model_file_path))
+    return create_evaluator(load_network(model_file_path, use_gpu), backend)
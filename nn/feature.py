@@ -1,60 +1,163 @@
 """ニューラルネットワークの入力特徴生成処理
 """
+from functools import lru_cache
+from typing import Dict, NoReturn, Tuple
+
 import numpy as np
 
-from board.constant import PASS
+from board.constant import OB_SIZE, PASS
 from board.go_board import GoBoard
 from board.stone import Stone
+from board.symmetry import get_symmetry_index, get_symmetry_index_with_pass
+from nn.network.dual_net import NUM_INPUT_PLANES
 
+# 手番ごとに、入力面に並べる石の入力面(空点、黒石、白石)の順番。空点、自分の石、相手の石の順に並べる
+_stone_plane_order = {
+    Stone.BLACK: np.array([0, 1, 2]),
+    Stone.WHITE: np.array([0, 2, 1]),
+}
+
+
+def get_input_plane_shape(board_size: int) -> Tuple[int, int, int]:
+    """1局面分のニューラルネットワークの入力データの形状を取得する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Tuple[int, int, int]: 入力データの形状。(6, board_size, board_size)。
+    """
+    return (NUM_INPUT_PLANES, board_size, board_size)
+
+
+@lru_cache(maxsize=None)
+def _get_plane_position_map(board_size: int) -> np.ndarray:
+    """対称形ごとに、座標から入力面の要素のインデックスへの変換テーブルを取得する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        np.ndarray: 形状は(8, 盤外を含む交点数)。盤外の座標は-1。
+    """
+    sym_index = get_symmetry_index(board_size)
+    position_map = np.full((len(sym_index), (board_size + OB_SIZE * 2) ** 2), -1, dtype=np.int32)
+    for sym, index in enumerate(sym_index):
+        position_map[sym, index] = np.arange(board_size ** 2)
+    position_map.setflags(write=False)
+    return position_map
 
-def generate_input_planes(board: GoBoard, color: Stone, sym: int=0) -> np.ndarray:
-    """ニューラルネットワークの入力データを生成する。
+
+@lru_cache(maxsize=None)
+def _get_stone_plane_index(board_size: int) -> Dict[Stone, np.ndarray]:
+    """手番と対称形ごとに、碁盤の石の入力面を平坦化した配列から、空点、自分の石、相手の石の
+    入力面を1回で取り出すためのインデックスを取得する。
 
     Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        Dict[Stone, np.ndarray]: 手番の色ごとのインデックス。形状は(8, 3, board_size ** 2)。
+    """
+    sym_index = get_symmetry_index(board_size).astype(np.intp)
+    plane_index = {}
+    for color, order in _stone_plane_order.items():
+        index = sym_index[:, np.newaxis, :] * len(order) + order[np.newaxis, :, np.newaxis]
+        index.setflags(write=False)
+        plane_index[color] = index
+    return plane_index
+
+
+def write_input_planes(input_plane: np.ndarray, board: GoBoard, color: Stone, \
+    sym: int=0) -> NoReturn:
+    """ニューラルネットワークの入力データを、確保済みの配列に書き込む。
+    石の入力面は碁盤が着手のたびに更新しているものを対称形の順に並べ替えて使う。
+
+    Args:
+        input_plane (np.ndarray): 書き込み先の配列。形状は(6, board_size, board_size)で、C連続であること。
         board (GoBoard): 碁盤の情報。
         color (Stone): 手番の色。
         sym (int, optional): 対称形の指定. Defaults to 0.
-
-    Returns:
-        numpy.ndarray: ニューラルネットワークの入力データ。
     """
-    board_data = board.get_board_data(sym)
     board_size = board.get_board_size()
-    # 手番が白の時は石の色を反転する.
-    if color is Stone.WHITE:
-        board_data = [datum if datum == 0 else (3 - datum) for datum in board_data]
+    planes = input_plane.reshape(NUM_INPUT_PLANES, board_size ** 2)
 
     # 碁盤の各交点の状態
     #     空点 : 1枚目の入力面
     #     自分の石 : 2枚目の入力面
     #     相手の石 : 3枚目の入力面
-    board_plane = np.identity(3)[board_data].transpose()
-
-    # 直前の着手を取得
-    _, previous_move, _ = board.record.get(board.moves - 1)
+    planes[0:3] = board.stone_planes.ravel()[_get_stone_plane_index(board_size)[color][sym]]
 
     # 直前の着手の座標
     #     着手 : 4枚目の入力面
     #     パス : 5枚目の入力面
+    planes[3:5] = 0.0
+    _, previous_move, _ = board.record.get(board.moves - 1)
     if board.moves > 1 and previous_move == PASS:
-        history_plane = np.zeros(shape=(1, board_size ** 2))
-        pass_plane = np.ones(shape=(1, board_size ** 2))
+        planes[4] = 1.0
     else:
-        previous_move_data = [1 if previous_move == board.get_symmetrical_coordinate(pos, sym) \
-            else 0 for pos in board.onboard_pos]
-        history_plane = np.array(previous_move_data).reshape(1, board_size**2)
-        pass_plane = np.zeros(shape=(1, board_size ** 2))
+        index = _get_plane_position_map(board_size)[sym, previous_move]
+        if index >= 0:
+            planes[3, index] = 1.0
 
     # 手番の色 (6番目の入力面)
     # 黒番は1、白番は-1
-    color_plane = np.ones(shape=(1, board_size**2))
-    if color == Stone.WHITE:
-        color_plane = color_plane * -1
+    planes[5] = -1.0 if color == Stone.WHITE else 1.0
+
+
+def generate_input_planes(board: GoBoard, color: Stone, sym: int=0) -> np.ndarray:
+    """ニューラルネットワークの入力データを生成する。
+
+    Args:
+        board (GoBoard): 碁盤の情報。
+        color (Stone): 手番の色。
+        sym (int, optional): 対称形の指定. Defaults to 0.
+
+    Returns:
+        numpy.ndarray: ニューラルネットワークの入力データ。
+    """
+    input_plane = np.empty(get_input_plane_shape(board.get_board_size()), dtype=np.float32)
+    write_input_planes(input_plane, board, color, sym)
+    return input_plane
+
+
+def generate_input_planes_symmetry8(board: GoBoard, color: Stone) -> np.ndarray:
+    """8対称形全てのニューラルネットワークの入力データをまとめて生成する。
+
+    Args:
+        board (GoBoard): 碁盤の情報。
+        color (Stone): 手番の色。
+
+    Returns:
+        numpy.ndarray: 対称形の番号順に並べた入力データ。形状は(8, 6, board_size, board_size)。
+    """
+    input_planes = np.empty((len(board.sym_index),) \
+        + get_input_plane_shape(board.get_board_size()), dtype=np.float32)
+    for sym, input_plane in enumerate(input_planes):
+        write_input_planes(input_plane, board, color, sym)
+    return input_planes
 
-    input_data = np.concatenate([board_plane, history_plane, pass_plane, color_plane]) \
-        .reshape(6, board_size, board_size).astype(np.float32) # pylint: disable=E1121
 
-    return input_data
+@lru_cache(maxsize=None)
+def get_policy_index_map(board_size: int) -> np.ndarray:
+    """座標から、ニューラルネットワークのPolicyの出力の対応する要素のインデックスへの変換テーブルを取得する。
+
+    Args:
+        board_size (int): 碁盤の大きさ。
+
+    Returns:
+        np.ndarray: 盤外を含む座標をインデックスとした、Policyの出力のインデックスの配列。
+            パスはboard_size ** 2、盤外は-1。
+    """
+    board_size_with_ob = board_size + OB_SIZE * 2
+    index_map = np.full(board_size_with_ob ** 2, -1, dtype=np.int32)
+    for y_coord in range(board_size):
+        for x_coord in range(board_size):
+            pos = (x_coord + OB_SIZE) + (y_coord + OB_SIZE) * board_size_with_ob
+            index_map[pos] = x_coord + y_coord * board_size
+    index_map[PASS] = board_size ** 2
+    index_map.setflags(write=False)
+    return index_map
 
 
 def generate_target_data(board:GoBoard, target_pos: int, sym: int=0) -> np.ndarray:
@@ -68,13 +171,23 @@ def generate_target_data(board:GoBoard, target_pos: int, sym: int=0) -> np.ndarr
     Returns:
         np.ndarray: Policyのターゲットラベル。
     """
-    target = [1 if target_pos == board.get_symmetrical_coordinate(pos, sym) else 0 \
-        for pos in board.onboard_pos]
     # パスだけ対称形から外れた末尾に挿入する。
-    target.append(1 if target_pos == PASS else 0)
-    #target_index = np.where(np.array(target) > 0)
-    #return target_index[0]
-    return np.array(target)
+    sym_index = get_symmetry_index_with_pass(board.get_board_size())
+    return (sym_index[sym] == target_pos).astype(np.int64)
+
+
+def generate_target_data_symmetry8(board: GoBoard, target_pos: int) -> np.ndarray:
+    """8対称形全ての教師あり学習で使用するターゲットデータをまとめて生成する。
+
+    Args:
+        board (GoBoard): 碁盤の情報。
+        target_pos (int): 教師データの着手の座標。
+
+    Returns:
+        np.ndarray: 対称形の番号順に並べたPolicyのターゲットラベル。形状は(8, board_size ** 2 + 1)。
+    """
+    sym_index = get_symmetry_index_with_pass(board.get_board_size())
+    return (sym_index == target_pos).astype(np.int64)
 
 
 def generate_rl_target_data(board: GoBoard, improved_policy_data: str, sym: int=0) -> np.ndarray:
@@ -89,14 +202,11 @@ def generate_rl_target_data(board: GoBoard, improved_policy_data: str, sym: int=
         np.ndarray: Policyのターゲットデータ。
     """
     split_data = improved_policy_data.split(" ")[1:]
-    target_data = [1e-18] * len(board.board)
+    target_data = np.full(len(board.board), 1e-18)
 
     for datum in split_data:
         pos, target = datum.split(":")
         coord = board.coordinate.convert_from_gtp_format(pos)
         target_data[coord] = float(target)
 
-    target = [target_data[board.get_symmetrical_coordinate(pos, sym)] for pos in board.onboard_pos]
-    target.append(target_data[PASS])
-
-    return np.array(target)
+    return target_data[get_symmetry_index_with_pass(board.get_board_size())[sym]]
@@ -10,11 +10,11 @@ from nn.loss import calculate_policy_loss, calculate_value_loss, \
     calculate_policy_kld_loss
 from nn.utility import get_torch_device, print_learning_process, \
     print_evaluation_information, save_model, load_data_set, \
-    split_train_test_set
+    split_train_test_set, restore_network
 
 from learning_param import SL_LEARNING_RATE, RL_LEARNING_RATE, \
     MOMENTUM, WEIGHT_DECAY, SL_VALUE_WEIGHT, RL_VALUE_WEIGHT, \
-    LEARNING_SCHEDULE
+    LEARNING_SCHEDULE, NETWORK_FILTERS, NETWORK_BLOCKS
 
 
 
@@ -36,7 +36,8 @@ def train_on_cpu(program_dir: str, board_size: int, batch_size: \
     # 学習処理を行うデバイスの設定
     device = get_torch_device(use_gpu=False)
 
-    dual_net = DualNet(device=device, board_size=board_size)
+    dual_net = DualNet(device=device, board_size=board_size, filters=NETWORK_FILTERS, \
+        blocks=NETWORK_BLOCKS)
 
     dual_net.to(device)
     optimizer = torch.optim.SGD(dual_net.parameters(),
@@ -140,7 +141,8 @@ def train_on_gpu(program_dir: str, board_size: int, batch_size: int, \
     # 学習処理を行うデバイスの設定
     device = get_torch_device(use_gpu=True)
 
-    dual_net = DualNet(device=device, board_size=board_size)
+    dual_net = DualNet(device=device, board_size=board_size, filters=NETWORK_FILTERS, \
+        blocks=NETWORK_BLOCKS)
 
     dual_net.to(device)
 
@@ -245,7 +247,14 @@ def train_with_gumbel_alphazero_on_cpu(program_dir: str, board_size: int, \
     # 学習処理を行うデバイスの設定
     device = get_torch_device(use_gpu=False)
 
-    dual_net = DualNet(device=device, board_size=board_size)
+    # 強化学習を再開する場合は、保存したモデルの構造とパラメータを引き継ぐ
+    model_file_path = os.path.join(program_dir, "model", "rl-model.bin")
+    if os.path.exists(model_file_path):
+        print(f"load {model_file_path}")
+        dual_net = restore_network(model_file_path, device)
+    else:
+        dual_net = DualNet(device=device, board_size=board_size, filters=NETWORK_FILTERS, \
+            blocks=NETWORK_BLOCKS)
 
     dual_net.to(device)
 
@@ -256,11 +265,6 @@ def train_with_gumbel_alphazero_on_cpu(program_dir: str, board_size: int, \
                                 nesterov=True)
     num_trained_batches = 0
 
-    model_file_path = os.path.join(program_dir, "model", "rl-model.bin")
-    if os.path.exists(model_file_path):
-        print(f"load {model_file_path}")
-        dual_net.load_state_dict(torch.load(model_file_path))
-
     state_file_path = os.path.join(program_dir, "model", "rl-state.ckpt")
     if os.path.exists(state_file_path):
         print(f"load {state_file_path}")
@@ -329,7 +333,14 @@ def train_with_gumbel_alphazero_on_gpu(program_dir: str, board_size: int, \
     # 学習処理を行うデバイスの設定
     device = get_torch_device(use_gpu=True)
 
-    dual_net = DualNet(device=device, board_size=board_size)
+    # 強化学習を再開する場合は、保存したモデルの構造とパラメータを引き継ぐ
+    model_file_path = os.path.join(program_dir, "model", "rl-model.bin")
+    if os.path.exists(model_file_path):
+        print(f"load {model_file_path}")
+        dual_net = restore_network(model_file_path, device)
+    else:
+        dual_net = DualNet(device=device, board_size=board_size, filters=NETWORK_FILTERS, \
+            blocks=NETWORK_BLOCKS)
 
     dual_net.to(device)
 
@@ -343,11 +354,6 @@ def train_with_gumbel_alphazero_on_gpu(program_dir: str, board_size: int, \
 
     num_trained_batches = 0
 
-    model_file_path = os.path.join(program_dir, "model", "rl-model.bin")
-    if os.path.exists(model_file_path):
-        print(f"load {model_file_path}")
-        dual_net.load_state_dict(torch.load(model_file_path))
-
     state_file_path = os.path.join(program_dir, "model", "rl-state.ckpt")
     if os.path.exists(state_file_path):
         print(f"load {state_file_path}")
@@ -1,7 +1,7 @@
 
 """Dual Networkの実装。
 """
-from typing import Tuple
+from typing import Dict, Tuple
 from torch import nn
 import torch
 
@@ -10,24 +10,39 @@ from nn.network.res_block import ResidualBlock
 from nn.network.head.policy_head import PolicyHead
 from nn.network.head.value_head import ValueHead
 
+# 共通ブロック部の畳み込み層のフィルタ数のデフォルト値
+DEFAULT_FILTERS = 64
+
+# 残差ブロック数のデフォルト値
+DEFAULT_BLOCKS = 6
+
+# 入力特徴の平面数
+NUM_INPUT_PLANES = 6
+
 
 class DualNet(nn.Module): # pylint: disable=R0902
     """Dual Networkの実装クラス。
     """
-    def __init__(self, device: torch.device, board_size: int=BOARD_SIZE):
+    def __init__(self, device: torch.device, board_size: int=BOARD_SIZE, \
+        filters: int=DEFAULT_FILTERS, blocks: int=DEFAULT_BLOCKS, \
+        input_planes: int=NUM_INPUT_PLANES): # pylint: disable=R0913
         """Dual Networkの初期化処理
 
         Args:
             device (torch.device): 推論実行デバイス。探索での推論実行時にのみ使用し、学習中には使用しない。
             board_size (int, optional): 碁盤のサイズ。 デフォルト値はBOARD_SIZE。
+            filters (int, optional): 共通ブロック部の畳み込み層のフィルタ数。デフォルト値はDEFAULT_FILTERS。
+            blocks (int, optional): 残差ブロック数。デフォルト値はDEFAULT_BLOCKS。
+            input_planes (int, optional): 入力特徴の平面数。デフォルト値はNUM_INPUT_PLANES。
         """
         super().__init__()
-        filters = 64
-        blocks = 6
-
         self.device = device
+        self.board_size = board_size
+        self.filters = filters
+        self.num_blocks = blocks
+        self.input_planes = input_planes
 
-        self.conv_layer = nn.Conv2d(in_channels=6, out_channels=filters, \
+        self.conv_layer = nn.Conv2d(in_channels=input_planes, out_channels=filters, \
             kernel_size=3, padding=1, bias=False)
         self.bn_layer = nn.BatchNorm2d(num_features=filters)
         self.relu = nn.ReLU()
@@ -38,6 +53,20 @@ class DualNet(nn.Module): # pylint: disable=R0902
         self.softmax = nn.Softmax(dim=1)
 
 
+    def get_architecture(self) -> Dict[str, int]:
+        """ネットワークの構造を決めるパラメータを取得する。モデルファイルにパラメータと一緒に保存する。
+
+        Returns:
+            Dict[str, int]: 碁盤のサイズ、フィルタ数、残差ブロック数、入力特徴の平面数。
+        """
+        return {
+            "board_size": self.board_size,
+            "filters": self.filters,
+            "blocks": self.num_blocks,
+            "input_planes": self.input_planes,
+        }
+
+
     def forward(self, input_plane: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
         """前向き伝搬処理を実行する。
 
@@ -0,0 +1,29 @@
+"""推論用にバッチ正則化層を畳み込み層に畳み込む処理の実装。
+"""
+from torch import nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+# 畳み込み層と、その出力を正規化するバッチ正則化層の属性名の組
+CONV_BN_PAIRS = (("conv_layer", "bn_layer"), ("conv1", "bn1"), ("conv2", "bn2"))
+
+
+def fuse_batch_norm(network: nn.Module) -> nn.Module:
+    """ネットワークに含まれる全てのバッチ正則化層を、直前の畳み込み層の重みとバイアスに畳み込む。
+    バッチ正則化層は恒等写像に置き換えるので、前向き伝搬処理はそのまま使える。
+    推論専用で、畳み込んだ後のネットワークは学習やパラメータの保存に使えない。
+
+    Args:
+        network (nn.Module): 学習済みのパラメータをロードしたネットワーク。
+
+    Returns:
+        nn.Module: バッチ正則化層を畳み込んだネットワーク。引数のネットワーク自体を書き換える。
+    """
+    network.eval()
+    for module in list(network.modules()):
+        for conv_name, bn_name in CONV_BN_PAIRS:
+            conv = getattr(module, conv_name, None)
+            batch_norm = getattr(module, bn_name, None)
+            if isinstance(conv, nn.Conv2d) and isinstance(batch_norm, nn.BatchNorm2d):
+                setattr(module, conv_name, fuse_conv_bn_eval(conv, batch_norm))
+                setattr(module, bn_name, nn.Identity())
+    return network
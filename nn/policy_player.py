@@ -8,13 +8,13 @@ from board.constant import PASS
 from board.go_board import GoBoard
 from board.stone import Stone
 from nn.feature import generate_input_planes
-from nn.network.dual_net import DualNet
+from nn.evaluator import Evaluator
 
-def generate_move_from_policy(network: DualNet, board: GoBoard, color: Stone) -> int:
+def generate_move_from_policy(network: Evaluator, board: GoBoard, color: Stone) -> int:
     """Policy Networkを使用して着手を生成する。
 
     Args:
-        network (DualNet): ニューラルネットワーク。
+        network (Evaluator): ニューラルネットワークの推論バックエンド。
         board (GoBoard): 現在の碁盤の情報。
         color (Stone): 手番の色。
 
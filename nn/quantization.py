@@ -0,0 +1,174 @@
+"""ニューラルネットワークの学習後量子化(int8)の実装。
+"""
+import copy
+import random
+from typing import Dict, List
+import warnings
+
+import numpy as np
+import torch
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from nn.network.dual_net import DualNet
+
+# 量子化演算の実装の優先順位
+QUANTIZATION_ENGINES = ("x86", "fbgemm", "qnnpack")
+
+# キャリブレーションと評価で一度に推論する局面数
+QUANTIZATION_BATCH_SIZE = 256
+
+# 量子化済みモデルファイルに量子化演算の実装の名前を記録するキー
+ENGINE_FILE_KEY = "quantization_engine"
+
+
+def get_quantization_engine() -> str:
+    """使用できる量子化演算の実装の名前を取得する。
+
+    Returns:
+        str: 量子化演算の実装の名前。
+
+    Raises:
+        RuntimeError: 量子化演算の実装が1つも使えない。
+    """
+    for engine in QUANTIZATION_ENGINES:
+        if engine in torch.backends.quantized.supported_engines:
+            return engine
+    raise RuntimeError("No quantized engine is supported on this platform.")
+
+
+def load_calibration_data(file_paths: List[str], num_samples: int, seed: int) -> torch.Tensor:
+    """学習データのnpzファイルから、指定した数の入力データを無作為に取り出す。
+
+    Args:
+        file_paths (List[str]): 学習データのnpzファイルパスのリスト。
+        num_samples (int): 取り出す入力データの数。
+        seed (int): 乱数のシード値。
+
+    Returns:
+        torch.Tensor: 入力特徴テンソル。ファイルにある入力データが足りなければ全ての入力データ。
+    """
+    rng = np.random.default_rng(seed)
+    file_paths = list(file_paths)
+    random.Random(seed).shuffle(file_paths)
+    input_data = []
+    num_inputs = 0
+    for path in file_paths:
+        data = np.load(path)["input"]
+        input_data.append(data[rng.permutation(len(data))])
+        num_inputs += len(data)
+        if num_inputs >= num_samples:
+            break
+    return torch.Tensor(np.concatenate(input_data)[:num_samples].astype(np.float32))
+
+
+def quantize_network(network: DualNet, calibration_data: torch.Tensor, \
+    batch_size: int=QUANTIZATION_BATCH_SIZE) -> torch.jit.ScriptModule:
+    """ニューラルネットワークの重みと活性をint8に量子化する。活性の値域はキャリブレーション用の
+    入力データを推論して決める。
+
+    Args:
+        network (DualNet): 量子化する学習済みのニューラルネットワーク。バッチ正則化層を畳み込む前のもの。
+        calibration_data (torch.Tensor): キャリブレーション用の入力特徴テンソル。
+        batch_size (int, optional): キャリブレーションで一度に推論する局面数。デフォルトはQUANTIZATION_BATCH_SIZE。
+
+    Returns:
+        torch.jit.ScriptModule: PolicyとValueのlogitを出力する、量子化済みのTorchScriptモジュール。
+    """
+    engine = get_quantization_engine()
+    torch.backends.quantized.engine = engine
+    example_input = calibration_data[:1]
+
+    float_network = copy.deepcopy(network).to("cpu").eval()
+    prepared = prepare_fx(float_network, get_default_qconfig_mapping(engine), (example_input,))
+    # 新しいPyTorchではTorchScriptが非推奨の警告を出すが、推論には影響しない
+    with torch.no_grad(), warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        for start in range(0, len(calibration_data), batch_size):
+            prepared(calibration_data[start:start + batch_size])
+        quantized = convert_fx(prepared)
+        module = torch.jit.trace(quantized, example_input)
+        return torch.jit.freeze(module)
+
+
+def save_quantized_network(module: torch.jit.ScriptModule, path: str) -> None:
+    """量子化済みのモジュールを、量子化演算の実装の名前と合わせてファイルに保存する。
+
+    Args:
+        module (torch.jit.ScriptModule): 量子化済みのモジュール。
+        path (str): 保存するファイルパス。
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        torch.jit.save(module, path, \
+            _extra_files={ENGINE_FILE_KEY: torch.backends.quantized.engine})
+
+
+def load_quantized_network(path: str) -> torch.jit.ScriptModule:
+    """save_quantized_networkで保存した量子化済みのモジュールを読み込む。
+
+    Args:
+        path (str): 量子化済みモデルファイルのパス。
+
+    Returns:
+        torch.jit.ScriptModule: 量子化済みのモジュール。
+
+    Raises:
+        RuntimeError: 量子化した時の量子化演算の実装がこの環境で使えない。
+    """
+    extra_files = {ENGINE_FILE_KEY: ""}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        module = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+    engine = extra_files[ENGINE_FILE_KEY]
+    engine = engine.decode() if isinstance(engine, bytes) else engine
+    if engine:
+        if engine not in torch.backends.quantized.supported_engines:
+            raise RuntimeError(f"{path} is quantized for {engine}, which is not supported " \
+                "on this platform.")
+        torch.backends.quantized.engine = engine
+    return module.eval()
+
+
+def evaluate_quantization(network: DualNet, module: torch.jit.ScriptModule, \
+    input_data: torch.Tensor, batch_size: int=QUANTIZATION_BATCH_SIZE) -> Dict[str, float]:
+    """量子化済みのモジュールの推論結果を量子化前のニューラルネットワークと比較する。
+
+    Args:
+        network (DualNet): 量子化前のニューラルネットワーク。
+        module (torch.jit.ScriptModule): 量子化済みのモジュール。
+        input_data (torch.Tensor): 比較に使う入力特徴テンソル。
+        batch_size (int, optional): 一度に推論する局面数。デフォルトはQUANTIZATION_BATCH_SIZE。
+
+    Returns:
+        Dict[str, float]: Policyの最大の着手の一致率と、Value(勝ち+引き分けの半分)の平均絶対誤差。
+    """
+    network = network.to("cpu").eval()
+    num_agreements = 0
+    value_error = 0.0
+    with torch.no_grad():
+        for start in range(0, len(input_data), batch_size):
+            batch = input_data[start:start + batch_size]
+            float_policy, float_value = network(batch)
+            policy, value = module(batch)
+            num_agreements += int((float_policy.argmax(dim=1) == policy.argmax(dim=1)).sum())
+            value_error += float((_get_expected_value(float_value) \
+                - _get_expected_value(value)).abs().sum())
+    return {
+        "num_samples": len(input_data),
+        "policy_top1_agreement": num_agreements / len(input_data),
+        "value_mae": value_error / len(input_data),
+    }
+
+
+def _get_expected_value(value_logits: torch.Tensor) -> torch.Tensor:
+    """Valueのlogitから、手番から見た勝ち+引き分けの半分の値を求める。
+
+    Args:
+        value_logits (torch.Tensor): Valueのlogit(負け、引き分け、勝ち)。
+
+    Returns:
+        torch.Tensor: 局面ごとのValue。
+    """
+    value = torch.softmax(value_logits, dim=1)
+    return value[:, 2] + value[:, 1] * 0.5
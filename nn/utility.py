@@ -1,12 +1,15 @@
 """深層学習に関するユーティリティ。
 """
 from typing import NoReturn, Dict, List, Tuple
+import math
+import pickle
 import time
 import torch
 import numpy as np
 
 from common.print_console import print_err
 from nn.network.dual_net import DualNet
+from nn.network.fusion import fuse_batch_norm
 
 
 def get_torch_device(use_gpu: bool) -> torch.device:
@@ -77,14 +80,17 @@ def print_evaluation_information(loss_data: Dict[str, float], epoch: int, \
     print_err(f"\tvalue loss  : {value_loss:6f}")
 
 
-def save_model(network: torch.nn.Module, path: str) -> NoReturn:
-    """ニューラルネットワークのパラメータを保存する。
+def save_model(network: DualNet, path: str) -> NoReturn:
+    """ニューラルネットワークのパラメータを、ネットワークの構造と一緒に保存する。
 
     Args:
-        network (torch.nnModel): ニューラルネットワークのモデル。
+        network (DualNet): ニューラルネットワークのモデル。
         path (str): パラメータファイルパス。
     """
-    torch.save(network.to("cpu").state_dict(), path)
+    torch.save({
+        "architecture": network.get_architecture(),
+        "state_dict": network.to("cpu").state_dict(),
+    }, path)
 
 
 def load_data_set(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -136,24 +142,98 @@ def apply_softmax(logits: np.array) -> np.array:
     return shift_exp / np.sum(shift_exp)
 
 
-def load_network(model_file_path: str, use_gpu: bool) -> DualNet:
+def _infer_architecture(state_dict: Dict[str, torch.Tensor]) -> Dict[str, int]:
+    """構造を保存していない古い形式のモデルファイルのパラメータの形状から、ネットワークの構造を求める。
+
+    Args:
+        state_dict (Dict[str, torch.Tensor]): ネットワークのパラメータ。
+
+    Returns:
+        Dict[str, int]: 碁盤のサイズ、フィルタ数、残差ブロック数、入力特徴の平面数。
+    """
+    filters, input_planes = state_dict["conv_layer.weight"].shape[:2]
+    blocks = {key.split(".")[1] for key in state_dict if key.startswith("blocks.")}
+    policy_size = state_dict["policy_head.fc_layer.weight"].shape[0]
+    return {
+        "board_size": math.isqrt(policy_size - 1),
+        "filters": filters,
+        "blocks": len(blocks),
+        "input_planes": input_planes,
+    }
+
+
+def load_model_file(model_file_path: str) -> Tuple[Dict[str, int], Dict[str, torch.Tensor]]:
+    """モデルファイルからネットワークの構造とパラメータを読み込む。
+
+    Args:
+        model_file_path (str): ニューラルネットワークのパラメータファイルパス。
+
+    Returns:
+        Tuple[Dict[str, int], Dict[str, torch.Tensor]]: ネットワークの構造とパラメータ。
+
+    Raises:
+        FileNotFoundError: モデルファイルが存在しない。
+        RuntimeError: モデルファイルの形式が正しくない。
+    """
+    try:
+        checkpoint = torch.load(model_file_path, map_location="cpu")
+    except (pickle.UnpicklingError, EOFError, ValueError) as error:
+        raise RuntimeError(f"{model_file_path} is not a model file ({error})") from error
+
+    if not isinstance(checkpoint, dict):
+        raise RuntimeError(f"{model_file_path} is not a model file")
+    # ネットワークの構造を保存する前の形式はパラメータだけを保存している
+    if "state_dict" not in checkpoint:
+        try:
+            return _infer_architecture(checkpoint), checkpoint
+        except (KeyError, ValueError) as error:
+            raise RuntimeError(f"{model_file_path} is not a model file (missing {error})") \
+                from error
+    return checkpoint["architecture"], checkpoint["state_dict"]
+
+
+def restore_network(model_file_path: str, device: torch.device) -> DualNet:
+    """モデルファイルに保存した構造のニューラルネットワークを生成し、パラメータをロードする。
+    学習の再開にも使うので、推論用の設定はしない。
+
+    Args:
+        model_file_path (str): ニューラルネットワークのパラメータファイルパス。
+        device (torch.device): ニューラルネットワークを配置するデバイス。
+
+    Returns:
+        DualNet: パラメータロード済みのニューラルネットワーク。
+
+    Raises:
+        FileNotFoundError: モデルファイルが存在しない。
+        RuntimeError: モデルファイルの形式や、パラメータとネットワークの構造が一致しない。
+    """
+    architecture, state_dict = load_model_file(model_file_path)
+    network = DualNet(device, **architecture)
+    network.load_state_dict(state_dict)
+    network.to(device)
+    return network
+
+
+def load_network(model_file_path: str, use_gpu: bool, fuse: bool=True) -> DualNet:
     """ニューラルネットワークをロードして取得する。
 
     Args:
         model_file_path (str): ニューラルネットワークのパラメータファイルパス。
         use_gpu (bool): GPU使用フラグ。
+        fuse (bool, optional): 推論用にバッチ正則化層を畳み込み層に畳み込むフラグ。デフォルトはTrue。
 
     Returns:
         DualNet: パラメータロード済みのニューラルネットワーク。
+
+    Raises:
+        FileNotFoundError: モデルファイルが存在しない。
+        RuntimeError: モデルファイルの形式や、パラメータとネットワークの構造が一致しない。
     """
     device = get_torch_device(use_gpu=use_gpu)
-    network = DualNet(device)
-    network.to(device)
-    try:
-        network.load_state_dict(torch.load(model_file_path))
-    except: # pylint: disable=W0702
-        print(f"Failed to load {model_file_path}.")
+    network = restore_network(model_file_path, device)
     network.eval()
+    if fuse:
+        fuse_batch_norm(network)
     torch.set_grad_enabled(False)
 
     return network
@@ -0,0 +1,44 @@
+"""PUCB値による着手選択の速度計測のエントリーポイント。
+"""
+import json
+from typing import Tuple
+
+import click
+
+from benchmark.pucb_benchmark import BENCHMARK_NUM_CHILDREN, run_pucb_benchmark
+from common.print_console import print_out
+
+
+@click.command()
+@click.option('--children', type=click.IntRange(min=1), multiple=True, \
+    default=BENCHMARK_NUM_CHILDREN, \
+    help="計測するノードの子ノードの数。複数回指定できる。デフォルトは10, 20, 82, 170, 362。")
+@click.option('--iterations', type=click.IntRange(min=1), default=100000, \
+    help="子ノードの数ごとに計測する着手選択の回数。デフォルトは100000。")
+@click.option('--seed', type=click.INT, default=0, help="乱数のシード値。デフォルトは0。")
+@click.option('--json', 'json_output', type=click.BOOL, default=False, \
+    help="計測結果をJSON形式で出力するフラグ。デフォルトはFalse。")
+def pucb_benchmark_main(children: Tuple[int, ...], iterations: int, seed: int, json_output: bool):
+    """ノードの子ノードの数ごとに、PUCB値による着手選択のスループットを計測して表示する。
+
+    Args:
+        children (Tuple[int, ...]): 子ノードの数のリスト。
+        iterations (int): 計測する着手選択の回数。
+        seed (int): 乱数のシード値。
+        json_output (bool): 計測結果をJSON形式で出力するフラグ。
+    """
+    results = [run_pucb_benchmark(num_children, iterations, seed) for num_children in children]
+
+    if json_output:
+        print_out(json.dumps({"seed": seed, "results": results}, indent=2))
+        return
+
+    for result in results:
+        print_out(f"children {result['num_children']:4d} : " \
+            f"{result['select_per_sec']:.1f} selections/sec " \
+            f"(reference {result['reference_per_sec']:.1f} selections/sec), " \
+            f"matches reference : {result['matches']}")
+
+
+if __name__ == "__main__":
+    pucb_benchmark_main() # pylint: disable=E1120
@@ -0,0 +1,96 @@
+"""ニューラルネットワークのint8量子化のエントリーポイント。
+"""
+import copy
+import glob
+import json
+import os
+
+import click
+import torch
+
+from benchmark.evaluator_benchmark import measure_throughput
+from common.print_console import print_err, print_out
+from nn.evaluator import QuantizedEvaluator, TorchEvaluator
+from nn.network.fusion import fuse_batch_norm
+from nn.quantization import evaluate_quantization, load_calibration_data, quantize_network, \
+    save_quantized_network
+from nn.utility import load_network
+
+
+@click.command()
+@click.option('--model', type=click.STRING, default=os.path.join("model", "model.bin"), \
+    help="量子化するニューラルネットワークのモデルファイルパス。デフォルトはmodel/model.bin。")
+@click.option('--output', type=click.STRING, default=os.path.join("model", "model-int8.pt"), \
+    help="量子化済みモデルの保存先のファイルパス。デフォルトはmodel/model-int8.pt。")
+@click.option('--data', type=click.STRING, default=os.path.join("data", "*.npz"), \
+    help="キャリブレーションと評価に使う学習データのnpzファイルのパターン。デフォルトはdata/*.npz。")
+@click.option('--calibration-size', type=click.IntRange(min=1), default=2048, \
+    help="キャリブレーションに使う局面数。デフォルトは2048。")
+@click.option('--evaluation-size', type=click.IntRange(min=1), default=2048, \
+    help="量子化前のモデルとの比較に使う局面数。キャリブレーションとは別の局面を使う。デフォルトは2048。")
+@click.option('--batch-size', type=click.IntRange(min=1), default=32, \
+    help="推論速度を計測するミニバッチサイズ。デフォルトは32。")
+@click.option('--seed', type=click.INT, default=0, help="乱数のシード値。デフォルトは0。")
+@click.option('--json', 'json_output', type=click.BOOL, default=False, \
+    help="評価結果をJSON形式で出力するフラグ。デフォルトはFalse。")
+def quantize_main(model: str, output: str, data: str, calibration_size: int, \
+    evaluation_size: int, batch_size: int, seed: int, json_output: bool): # pylint: disable=R0913,R0914
+    """学習済みのモデルをint8に量子化して保存し、量子化前のモデルとの推論結果の一致度と推論速度を表示する。
+
+    Args:
+        model (str): 量子化するモデルファイルパス。
+        output (str): 量子化済みモデルの保存先のファイルパス。
+        data (str): 学習データのnpzファイルのパターン。
+        calibration_size (int): キャリブレーションに使う局面数。
+        evaluation_size (int): 比較に使う局面数。
+        batch_size (int): 推論速度を計測するミニバッチサイズ。
+        seed (int): 乱数のシード値。
+        json_output (bool): 評価結果をJSON形式で出力するフラグ。
+    """
+    program_dir = os.path.dirname(__file__)
+    data_files = sorted(glob.glob(os.path.join(program_dir, data)))
+    if len(data_files) == 0:
+        print_err(f"No calibration data matches {data}.")
+        return
+
+    torch.manual_seed(seed)
+    # 量子化ではバッチ正則化層を畳み込み層と一緒に量子化するので、畳み込む前のモデルを使う
+    network = load_network(os.path.join(program_dir, model), False, fuse=False)
+
+    input_data = load_calibration_data(data_files, calibration_size + evaluation_size, seed)
+    if len(input_data) <= calibration_size:
+        print_err(f"Data has only {len(input_data)} positions, which is not enough for " \
+            f"{calibration_size} calibration and {evaluation_size} evaluation positions.")
+        return
+    calibration_data = input_data[:calibration_size]
+    evaluation_data = input_data[calibration_size:]
+
+    module = quantize_network(network, calibration_data)
+    save_quantized_network(module, os.path.join(program_dir, output))
+
+    result = evaluate_quantization(network, module, evaluation_data)
+    speed_batch_size = min(batch_size, len(evaluation_data))
+    with torch.no_grad():
+        result["float_positions_per_sec"] = measure_throughput( \
+            TorchEvaluator(fuse_batch_norm(copy.deepcopy(network))), evaluation_data, \
+            speed_batch_size, 20)
+        result["int8_positions_per_sec"] = measure_throughput(QuantizedEvaluator(module), \
+            evaluation_data, speed_batch_size, 20)
+
+    if json_output:
+        print_out(json.dumps({"output": output, "calibration_size": len(calibration_data), \
+            "batch_size": speed_batch_size, **result}, indent=2))
+        return
+
+    print_out(f"Saved quantized model to {output}")
+    print_out(f"policy top-1 agreement : {result['policy_top1_agreement']:.4f} " \
+        f"({result['num_samples']} positions)")
+    print_out(f"value MAE              : {result['value_mae']:.4f}")
+    print_out(f"float (batch size {speed_batch_size:3d}) : " \
+        f"{result['float_positions_per_sec']:.1f} positions/sec")
+    print_out(f"int8  (batch size {speed_batch_size:3d}) : " \
+        f"{result['int8_positions_per_sec']:.1f} positions/sec")
+
+
+if __name__ == "__main__":
+    quantize_main() # pylint: disable=E1120
@@ -14,12 +14,12 @@ from board.stone import Stone
 from sgf.selfplay_record import SelfPlayRecord
 from mcts.tree import MCTSTree
 from mcts.time_manager import TimeManager, TimeControl
-from nn.utility import load_network
+from nn.evaluator import load_evaluator
 from learning_param import SELF_PLAY_VISITS
 
 # pylint: disable=R0913,R0914
 def selfplay_worker(save_dir: str, model_file_path: str, index_list: List[int], \
-    size: int, visits: int, use_gpu: bool) -> NoReturn:
+    size: int, visits: int, use_gpu: bool, backend: str="torch") -> NoReturn:
     """自己対戦実行ワーカ。
 
     Args:
@@ -29,12 +29,12 @@ def selfplay_worker(save_dir: str, model_file_path: str, index_list: List[int],
         size (int): 碁盤の大きさ。
         visits (int): 自己対戦実行時の探索回数。
         use_gpu (bool): GPU使用フラグ。
+        backend (str, optional): ニューラルネットワークの推論バックエンドの名前。デフォルトは"torch"。
     """
     board = GoBoard(board_size=size, komi=7.0, check_superko=True)
     init_board = GoBoard(board_size=size, komi=7.0, check_superko=True)
     record = SelfPlayRecord(save_dir, board.coordinate)
-    network = load_network(model_file_path=model_file_path, use_gpu=use_gpu)
-    network.training = False
+    network = load_evaluator(model_file_path, use_gpu, backend)
 
     np.random.seed(random.choice(index_list))
 
@@ -8,6 +8,7 @@ import time
 from concurrent.futures import ProcessPoolExecutor
 import click
 from board.constant import BOARD_SIZE
+from nn.evaluator import EVALUATOR_BACKENDS
 from selfplay.worker import selfplay_worker, display_selfplay_progress_worker
 from learning_param import SELF_PLAY_VISITS, NUM_SELF_PLAY_WORKERS, \
     NUM_SELF_PLAY_GAMES
@@ -28,8 +29,11 @@ from learning_param import SELF_PLAY_VISITS, NUM_SELF_PLAY_WORKERS, \
     help=f"自己対戦時の探索回数。デフォルトは{SELF_PLAY_VISITS}。")
 @click.option('--model', type=click.STRING, default=os.path.join("model", "rl-model.bin"), \
     help="ニューラルネットワークのモデルファイルパス。デフォルトはmodelディレクトリ内のrl-model.bin。")
+@click.option('--backend', type=click.Choice(EVALUATOR_BACKENDS), default="torch", \
+    help="ニューラルネットワークの推論バックエンド。torch、torchscript、onnx、int8のいずれか。\
+    int8はquantize_main.pyで量子化したモデルファイルを使う。デフォルトはtorch。")
 def selfplay_main(save_dir: str, process: int, num_data: int, size: int, \
-    use_gpu: bool, visits: int, model: str):
+    use_gpu: bool, visits: int, model: str, backend: str):
     """自己対戦を実行する。
 
     Args:
@@ -40,6 +44,7 @@ def selfplay_main(save_dir: str, process: int, num_data: int, size: int, \
         use_gpu (bool): GPU使用フラグ。デフォルトはTrue
         visits (int): 自己対戦実行時の探索回数。デフォルトはSELF_PLAY_VISITS。
         model (str): 使用するモデルファイルのパス。デフォルトはmodel/model.bin。
+        backend (str): ニューラルネットワークの推論バックエンドの名前。デフォルトはtorch。
     """
     file_index_list = list(range(1, num_data + 1))
     split_size = math.ceil(num_data / process)
@@ -57,7 +62,7 @@ def selfplay_main(save_dir: str, process: int, num_data: int, size: int, \
 
     with ProcessPoolExecutor(max_workers=process) as executor:
         futures = [executor.submit(selfplay_worker, os.path.join(save_dir, str(kifu_dir_index)), \
-            model, file_list, size, visits, use_gpu) for file_list in file_indice]
+            model, file_list, size, visits, use_gpu, backend) for file_list in file_indice]
         monitoring_worker = threading.Thread(target=display_selfplay_progress_worker, \
             args=(os.path.join(save_dir, str(kifu_dir_index)), num_data, ), daemon=True)
         monitoring_worker.start()